@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Statistics shared by benchmark result tools (stress_tool, disk_performance).
+
+Only the standard library is used, so that the tools importing it keep their dependencies.
+"""
+
+import math
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+
+# Little's law ratio q / (IOPS * latency) outside [1 / x, x] means that the requested
+# queue depth is not what the device sees (e.g. submission is the bottleneck) or that
+# the latency does not include queueing.
+LITTLE_RATIO_TOLERANCE = 1.25
+
+
+def _weighted_linear_fit(
+    xs: Sequence[float], ys: Sequence[float], ws: Sequence[float]
+) -> Optional[Tuple[float, float]]:
+    """
+    Weighted least squares y = a + b * x, returns (a, b) or None when x is degenerate.
+    """
+    sw = sum(ws)
+    if sw <= 0:
+        return None
+    mx = sum(w * x for x, w in zip(xs, ws)) / sw
+    my = sum(w * y for y, w in zip(ys, ws)) / sw
+    sxx = sum(w * (x - mx) ** 2 for x, w in zip(xs, ws))
+    if sxx <= 0:
+        return None
+    sxy = sum(w * (x - mx) * (y - my) for x, y, w in zip(xs, ys, ws))
+    b = sxy / sxx
+    return my - b * mx, b
+
+
+def fit_saturation(points: Sequence[Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+    """
+    Fit IOPS(q) = Pmax * q / (q + q_half) to (queue depth, IOPS) points.
+
+    The model is linear in reciprocals (Lineweaver-Burk): 1 / IOPS = 1 / Pmax + (q_half / Pmax) / q.
+    Points are weighted by IOPS^2, so that residuals are relative and the noisy low queue depths
+    do not dominate. Returns (Pmax, q_half) or None when saturation is not visible in the data.
+    """
+    valid = [(q, iops) for q, iops in points if q > 0 and iops > 0 and math.isfinite(iops)]
+    if len(valid) < 3:
+        return None
+    fit = _weighted_linear_fit(
+        [1.0 / q for q, _ in valid],
+        [1.0 / iops for _, iops in valid],
+        [iops**2 for _, iops in valid],
+    )
+    if fit is None:
+        return None
+    intercept, slope = fit
+    if intercept <= 0 or slope <= 0:
+        return None
+    pmax = 1.0 / intercept
+    return pmax, slope * pmax
+
+
+def median_ci(values: Sequence[float], confidence: float = 0.95) -> Optional[Tuple[float, float]]:
+    """
+    Distribution-free confidence interval of the median: the order statistics x(k) and x(n - k + 1)
+    with the largest k for which Binomial(n, 1/2) gives the requested coverage.
+    Returns None when there are too few values (e.g. fewer than 6 for 95%).
+    """
+    xs = sorted(v for v in values if math.isfinite(v))
+    n = len(xs)
+    # coverage of [x(k), x(n - k + 1)] is 1 - 2 * P(Binomial(n, 1/2) < k)
+    tail = 0.0
+    k = 0
+    while k < n // 2:
+        tail += math.comb(n, k) / 2.0**n
+        if 1.0 - 2.0 * tail < confidence:
+            break
+        k += 1
+    if k == 0:
+        return None
+    return xs[k - 1], xs[n - k]
+
+
+def relative_median_ci(values: Sequence[float], confidence: float = 0.95) -> Optional[float]:
+    """
+    Width of median_ci() relative to the median, None when the interval is not defined.
+    """
+    ci = median_ci(values, confidence)
+    if ci is None:
+        return None
+    xs = sorted(v for v in values if math.isfinite(v))
+    n = len(xs)
+    median = (xs[(n - 1) // 2] + xs[n // 2]) / 2.0
+    if median <= 0:
+        return None
+    return (ci[1] - ci[0]) / median
+
+
+# SNIA PTS steady state: over a window of 5 rounds the data range stays within 20% and the
+# least squares line moves by at most 10% of the window average.
+STEADY_STATE_WINDOW = 5
+STEADY_STATE_MAX_EXCURSION = 0.2
+STEADY_STATE_MAX_SLOPE_EXCURSION = 0.1
+
+
+def steady_state(
+    values: Sequence[float],
+    window: int = STEADY_STATE_WINDOW,
+    max_excursion: float = STEADY_STATE_MAX_EXCURSION,
+    max_slope_excursion: float = STEADY_STATE_MAX_SLOPE_EXCURSION,
+) -> Optional[Dict[str, object]]:
+    """
+    SNIA PTS steady state check of the last `window` rounds of a tracking variable (e.g. 4K random write IOPS).
+    Excursion is (max - min) / average, SlopeExcursion is |slope| * (window - 1) / average of the linear fit.
+    Returns None when there are fewer rounds than the window.
+    """
+    if window < 2 or len(values) < window:
+        return None
+    ys = [float(v) for v in values[-window:]]
+    average = sum(ys) / window
+    fit = _weighted_linear_fit(range(window), ys, [1.0] * window)
+    if average <= 0 or fit is None:
+        return {"Steady": False, "Average": average, "Excursion": math.inf, "SlopeExcursion": math.inf}
+    excursion = (max(ys) - min(ys)) / average
+    slope_excursion = abs(fit[1]) * (window - 1) / average
+    return {
+        "Steady": excursion <= max_excursion and slope_excursion <= max_slope_excursion,
+        "Average": average,
+        "Excursion": excursion,
+        "SlopeExcursion": slope_excursion,
+    }
+
+
+# Iglewicz and Hoaglin: |modified z-score| above 3.5 is a potential outlier.
+OUTLIER_Z = 3.5
+
+
+def modified_z_scores(values: Sequence[float]) -> List[float]:
+    """
+    Robust z-scores 0.6745 * (x - median) / MAD (median absolute deviation), so a few bad values can't hide
+    themselves by inflating the spread. With MAD == 0 values off the median get +-inf.
+    """
+    if not values:
+        return []
+    xs = sorted(values)
+    n = len(xs)
+    median = (xs[(n - 1) // 2] + xs[n // 2]) / 2.0
+    deviations = sorted(abs(v - median) for v in values)
+    mad = (deviations[(n - 1) // 2] + deviations[n // 2]) / 2.0
+    scores = []
+    for v in values:
+        if mad > 0:
+            scores.append(0.6745 * (v - median) / mad)
+        else:
+            scores.append(0.0 if v == median else math.copysign(math.inf, v - median))
+    return scores
+
+
+def little_ratio(queue_depth: float, iops: float, latency_us: float) -> float:
+    """
+    Queue depth over the concurrency implied by Little's law (IOPS * latency), 1.0 when consistent.
+    """
+    in_flight = iops * latency_us / 1_000_000.0
+    if in_flight <= 0 or not math.isfinite(in_flight):
+        return float("nan")
+    return queue_depth / in_flight
+
+
+def knee_point(points: Sequence[Tuple[float, float, float]]) -> Dict[str, object]:
+    """
+    Saturation knee of a queue depth sweep given (queue depth, IOPS, latency us) points.
+
+    By Little's law the device is saturated once the queue depth covers Pmax * L0: the fitted
+    max IOPS times the unloaded latency (derived from the smallest queue depth). This is the
+    intersection of the linear-scaling and the plateau asymptotes of IOPS(q), where
+    IOPS / latency peaks. KneeQD is the measured queue depth closest to it (in log scale).
+
+    Without visible saturation (IOPS still scale linearly) KneeQD is the largest measured queue
+    depth, Saturated is False and fitted values are None. The result is JSON-serializable.
+    """
+    pts = sorted(
+        (float(q), float(iops), float(lat))
+        for q, iops, lat in points
+        if q > 0 and math.isfinite(iops) and math.isfinite(lat) and iops > 0 and lat > 0
+    )
+    if not pts:
+        return {}
+
+    peak_q, peak_iops, _ = max(pts, key=lambda p: (p[1], -p[0]))
+    unloaded_latency_us = pts[0][2]
+
+    fit = fit_saturation([(q, iops) for q, iops, _ in pts])
+    knee_fit: Optional[float] = None
+    fit_max_iops: Optional[float] = None
+    fit_half_qd: Optional[float] = None
+    saturated = False
+    if fit is not None:
+        fit_max_iops, fit_half_qd = fit
+        if pts[0][1] < fit_max_iops:
+            # Even the smallest queue depth waits for requests ahead of it: with latency growing by
+            # 1 / Pmax per queued request, the latency without queueing is L * (1 - IOPS / Pmax).
+            unloaded_latency_us *= 1.0 - pts[0][1] / fit_max_iops
+        # Otherwise the smallest queue depth already reaches the fitted Pmax (noise or a sweep starting
+        # past the knee): the queueing share is unknown, so its measured latency is kept as an upper
+        # bound and the knee lands at the smallest queue depth.
+        knee_fit = fit_max_iops * unloaded_latency_us / 1_000_000.0
+        saturated = knee_fit <= pts[-1][0]
+
+    if saturated:
+        knee = min(pts, key=lambda p: abs(math.log(p[0] / knee_fit)))
+    else:
+        knee = pts[-1]
+    knee_q, knee_iops, knee_lat = knee
+
+    return {
+        "KneeQD": int(knee_q) if knee_q.is_integer() else knee_q,
+        "KneeQDFit": knee_fit,
+        "Saturated": saturated,
+        "PeakIOPS": peak_iops,
+        "PeakQD": int(peak_q) if peak_q.is_integer() else peak_q,
+        "FitMaxIOPS": fit_max_iops,
+        "FitHalfQD": fit_half_qd,
+        "UnloadedLatency_us": unloaded_latency_us,
+        "IOPSAtKnee": knee_iops,
+        "LatencyAtKnee_us": knee_lat,
+        "LittleRatioAtKnee": little_ratio(knee_q, knee_iops, knee_lat),
+        "LittleInconsistentQD": [
+            int(q) if q.is_integer() else q
+            for q, iops, lat in pts
+            if not (1.0 / LITTLE_RATIO_TOLERANCE <= little_ratio(q, iops, lat) <= LITTLE_RATIO_TOLERANCE)
+        ],
+    }
+
+
+def format_knee(knee: Dict[str, object]) -> List[str]:
+    """
+    Human-readable values of knee_point(): knee QD, peak IOPS (kIOPS), latency at knee (us), Little's ratio.
+    """
+    if not knee:
+        return ["-", "-", "-", "-"]
+
+    def num(v: object, fmt: str) -> str:
+        if v is None or (isinstance(v, float) and math.isnan(v)):
+            return "-"
+        return format(v, fmt)
+
+    knee_qd = str(knee["KneeQD"])
+    if not knee["Saturated"]:
+        knee_qd = f">={knee_qd}"
+    return [
+        knee_qd,
+        num(float(knee["PeakIOPS"]) / 1000.0, ".1f"),
+        num(knee["LatencyAtKnee_us"], ".1f"),
+        num(knee["LittleRatioAtKnee"], ".2f"),
+    ]
+
+
+def merge_latency_bins(histograms: Iterable[Mapping[str, int]]) -> Dict[int, int]:
+    """
+    Merge fio json+ latency histograms ("bins" of clat_ns / lat_ns: latency in ns -> count) of several jobs.
+    """
+    merged: Dict[int, int] = {}
+    for bins in histograms:
+        for value, count in bins.items():
+            key = int(value)
+            merged[key] = merged.get(key, 0) + int(count)
+    return merged
+
+
+def bins_percentiles(bins: Mapping[int, int], percentiles: Sequence[float]) -> Dict[float, Optional[int]]:
+    """
+    Percentiles of a latency histogram with fio's rule: the first bin whose cumulative count reaches p% of
+    all samples. For a single job this gives exactly the percentiles fio reports; None for an empty histogram.
+    """
+    total = sum(bins.values())
+    out: Dict[float, Optional[int]] = {p: None for p in percentiles}
+    if total <= 0:
+        return out
+
+    pending = sorted(percentiles)
+    cumulative = 0
+    for value in sorted(bins):
+        cumulative += bins[value]
+        while pending and cumulative >= pending[0] / 100.0 * total:
+            out[pending.pop(0)] = value
+        if not pending:
+            break
+    return out
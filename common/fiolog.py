@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Per-second timelines from fio latency and IOPS logs (write_lat_log / write_iops_log with log_avg_msec=0).
+
+Such logs have a line per I/O ("time ms, value, direction, block size, offset[, priority]") and easily grow to
+several GB, so they are memory-mapped and parsed in chunks by NumPy instead of line by line. Latencies are
+accumulated into per-second histograms with fio's own bucketing (64 buckets per power of two, ~1.6% error),
+so logs of several jobs merge exactly like fio merges its percentiles, and memory does not depend on the log size.
+"""
+
+import glob
+import mmap
+import os
+import re
+import warnings
+from typing import Dict, Iterator, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ModuleNotFoundError as e:
+    raise SystemExit(
+        "Missing dependency: numpy\n"
+        "Install it with: pip3 install numpy\n"
+        f"Original error: {e}"
+    )
+
+
+CHUNK_BYTES = 64 * 1024 * 1024
+
+# fio latency histogram layout (FIO_IO_U_PLAT_BITS): values below 2 * PLAT_VAL are exact.
+PLAT_BITS = 6
+PLAT_VAL = 1 << PLAT_BITS
+
+LOG_FILE_RE = re.compile(r"_(?P<kind>lat|clat|slat|iops|bw)\.(?P<job>\d+)\.log$")
+
+
+def _parse_chunk(chunk: bytes, path: str) -> np.ndarray:
+    """
+    Integer fields of complete log lines, shape [lines, fields].
+    """
+    chunk = chunk.rstrip(b"\n")
+    lines = chunk.count(b"\n") + 1
+    fields = chunk[: chunk.find(b"\n")].count(b",") + 1 if lines > 1 else chunk.count(b",") + 1
+    # numpy's text parser in one pass: every line becomes `fields` more comma separated numbers
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        values = np.fromstring(chunk.replace(b"\n", b","), dtype=np.int64, sep=",")
+    if fields < 2 or values.size != lines * fields:
+        raise ValueError(f"{path}: unexpected fio log format (expected the same number of integer fields per line)")
+    return values.reshape(lines, fields)
+
+
+def read_log(path: str, chunk_bytes: int = CHUNK_BYTES) -> Iterator[np.ndarray]:
+    """
+    Memory-mapped fio log as [lines, fields] int64 arrays, one per chunk of about chunk_bytes.
+    Column 0 is the time in ms, column 1 the value (latency in ns, IOPS or KiB/s), column 2 the direction.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            while start < size:
+                end = min(start + chunk_bytes, size)
+                if end < size:
+                    # cut at the last complete line
+                    newline = mm.rfind(b"\n", start, end)
+                    if newline == -1:
+                        newline = mm.find(b"\n", end)
+                    end = size if newline == -1 else newline + 1
+                chunk = mm[start:end]
+                if chunk.strip():
+                    yield _parse_chunk(chunk, path)
+                start = end
+
+
+def latency_buckets(values_ns: np.ndarray) -> np.ndarray:
+    """
+    fio histogram bucket of every latency (plat_val_to_idx).
+    """
+    v = np.maximum(values_ns.astype(np.int64), 0)
+    _, exponent = np.frexp(v.astype(np.float64))
+    msb = exponent.astype(np.int64) - 1
+    error_bits = np.maximum(msb - PLAT_BITS, 0)
+    idx = ((error_bits + 1) << PLAT_BITS) + ((v >> error_bits) & (PLAT_VAL - 1))
+    return np.where(msb <= PLAT_BITS, v, idx)
+
+
+def bucket_values(idx: np.ndarray) -> np.ndarray:
+    """
+    Representative latency (ns) of fio histogram buckets (plat_idx_to_val).
+    """
+    idx = np.asarray(idx, dtype=np.int64)
+    error_bits = np.maximum((idx >> PLAT_BITS) - 1, 0)
+    base = np.left_shift(1, error_bits + PLAT_BITS).astype(np.float64)
+    value = base + ((idx % PLAT_VAL) + 0.5) * np.left_shift(1, error_bits)
+    return np.where(idx < (PLAT_VAL << 1), idx.astype(np.float64), value)
+
+
+class LogTimeline:
+    """
+    Per-second (per interval_ms) statistics of the fio logs of one test (all jobs).
+    """
+
+    def __init__(self, interval_ms: int = 1000) -> None:
+        self.interval_ms = interval_ms
+        # [interval, bucket] latency counts, per-interval max latency (ns)
+        self.hist = np.zeros((0, 0), dtype=np.int64)
+        self.max_ns = np.zeros(0, dtype=np.int64)
+        # IOPS from the IOPS logs, summed over jobs
+        self.iops_log = np.zeros(0, dtype=np.float64)
+
+    def _grow(self, seconds: int, buckets: int = 0) -> None:
+        rows, cols = self.hist.shape
+        if seconds > rows or buckets > cols:
+            hist = np.zeros((max(seconds, rows), max(buckets, cols)), dtype=np.int64)
+            hist[:rows, :cols] = self.hist
+            self.hist = hist
+        if seconds > self.max_ns.size:
+            self.max_ns = np.concatenate([self.max_ns, np.zeros(seconds - self.max_ns.size, dtype=np.int64)])
+        if seconds > self.iops_log.size:
+            self.iops_log = np.concatenate([self.iops_log, np.zeros(seconds - self.iops_log.size)])
+
+    def add_latency_log(self, path: str, chunk_bytes: int = CHUNK_BYTES) -> None:
+        for rows in read_log(path, chunk_bytes):
+            second = rows[:, 0] // self.interval_ms
+            bucket = latency_buckets(rows[:, 1])
+            self._grow(int(second.max()) + 1, int(bucket.max()) + 1)
+
+            # chunks cover a few seconds: count (second, bucket) pairs in the key range of the chunk only
+            width = self.hist.shape[1]
+            key = second * width + bucket
+            lo = int(key.min())
+            counts = np.bincount(key - lo)
+            flat = self.hist.reshape(-1)
+            flat[lo : lo + counts.size] += counts
+            np.maximum.at(self.max_ns, second, rows[:, 1])
+
+    def add_iops_log(self, path: str, chunk_bytes: int = CHUNK_BYTES) -> None:
+        """
+        With log_avg_msec=0 fio logs a sample of value 1 per I/O, so samples are counted per interval;
+        averaged logs (values are IOPS over log_avg_msec) give the mean of the samples of the interval.
+        """
+        sums = np.zeros(0, dtype=np.float64)
+        counts = np.zeros(0, dtype=np.int64)
+        per_io = True
+        for rows in read_log(path, chunk_bytes):
+            second = rows[:, 0] // self.interval_ms
+            n = int(second.max()) + 1
+            if n > sums.size:
+                sums = np.concatenate([sums, np.zeros(n - sums.size)])
+                counts = np.concatenate([counts, np.zeros(n - counts.size, dtype=np.int64)])
+            sums[:n] += np.bincount(second, weights=rows[:, 1], minlength=n)
+            counts[:n] += np.bincount(second, minlength=n)
+            per_io = per_io and bool(np.all(rows[:, 1] == 1))
+        self._grow(sums.size)
+        if per_io:
+            self.iops_log[: sums.size] += sums * (1000.0 / self.interval_ms)
+        else:
+            self.iops_log[: sums.size] += np.where(counts > 0, sums / np.maximum(counts, 1), 0.0)
+
+    def percentile_us(self, percentile: float) -> np.ndarray:
+        """
+        Per-second latency percentile with fio's rule (first bucket reaching p% of samples), NaN without samples.
+        """
+        total = self.hist.sum(axis=1)
+        if self.hist.size == 0:
+            return np.full(total.size, np.nan)
+        cumulative = np.cumsum(self.hist, axis=1)
+        idx = np.argmax(cumulative >= (percentile / 100.0) * total[:, None], axis=1)
+        return np.where(total > 0, bucket_values(idx) / 1000.0, np.nan)
+
+    def series(self) -> Dict[str, np.ndarray]:
+        """
+        second, iops (completed I/Os per second from the latency log, the IOPS log otherwise), p50_us, p99_us, max_us.
+        With interval_ms other than 1000 values are per interval and `second` is the start of the interval.
+        """
+        seconds = max(self.hist.shape[0], self.iops_log.size)
+        self._grow(seconds)
+        completed = self.hist.sum(axis=1).astype(np.float64)
+        has_latency = completed.sum() > 0
+        return {
+            "second": np.arange(seconds) * (self.interval_ms / 1000.0),
+            "iops": completed * (1000.0 / self.interval_ms) if has_latency else self.iops_log.copy(),
+            "p50_us": self.percentile_us(50.0),
+            "p99_us": self.percentile_us(99.0),
+            "max_us": np.where(completed > 0, self.max_ns / 1000.0, np.nan),
+        }
+
+
+def find_logs(prefix: str) -> Dict[str, List[str]]:
+    """
+    fio logs written with --write_lat_log/--write_iops_log=<prefix>: kind (lat, clat, slat, iops, bw) -> files.
+    """
+    logs: Dict[str, List[str]] = {}
+    for path in sorted(glob.glob(glob.escape(prefix) + "_*.log")):
+        m = LOG_FILE_RE.search(path[len(prefix) :])
+        if m and path[len(prefix) :] == m.group(0):
+            logs.setdefault(m.group("kind"), []).append(path)
+    return logs
+
+
+def load_timeline(prefix: str, chunk_bytes: int = CHUNK_BYTES, interval_ms: int = 1000) -> Optional[LogTimeline]:
+    """
+    Timeline of the logs of one fio run (all jobs), None when there are no logs.
+    Total latency (_lat) is used when logged, completion latency (_clat) otherwise.
+    """
+    logs = find_logs(prefix)
+    latency_logs = logs.get("lat") or logs.get("clat") or []
+    iops_logs = logs.get("iops", [])
+    if not latency_logs and not iops_logs:
+        return None
+    timeline = LogTimeline(interval_ms)
+    for path in latency_logs:
+        timeline.add_latency_log(path, chunk_bytes)
+    for path in iops_logs:
+        timeline.add_iops_log(path, chunk_bytes)
+    return timeline
+
+
+def find_stalls(
+    series: Dict[str, np.ndarray], iops_fraction: float = 0.5, latency_factor: float = 10.0
+) -> List[Dict[str, object]]:
+    """
+    Intervals of consecutive seconds with IOPS below iops_fraction x the median per-second IOPS or with max
+    latency above latency_factor x the median per-second max latency. The last (partial) second is ignored.
+    """
+    iops = series["iops"][:-1]
+    max_us = series["max_us"][:-1]
+    if iops.size == 0:
+        return []
+    iops_baseline = float(np.median(iops))
+    finite_max = max_us[np.isfinite(max_us)]
+    latency_baseline = float(np.median(finite_max)) if finite_max.size else float("nan")
+
+    low_iops = iops < iops_fraction * iops_baseline
+    with np.errstate(invalid="ignore"):
+        slow = max_us > latency_factor * latency_baseline
+    stalled = low_iops | slow
+
+    stalls: List[Dict[str, object]] = []
+    # boundaries of runs of stalled seconds
+    edges = np.diff(np.concatenate(([0], stalled.view(np.int8), [0])))
+    for start, end in zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()):
+        reasons = []
+        if low_iops[start:end].any():
+            reasons.append("iops")
+        if slow[start:end].any():
+            reasons.append("latency")
+        window_max = max_us[start:end]
+        stalls.append(
+            {
+                "StartSecond": start,
+                "Seconds": end - start,
+                "MinIOPS": float(iops[start:end].min()),
+                "MedianIOPS": iops_baseline,
+                "MaxLatency_us": float(np.nanmax(window_max)) if np.isfinite(window_max).any() else float("nan"),
+                "MedianMaxLatency_us": latency_baseline,
+                "Reason": "+".join(reasons),
+            }
+        )
+    return stalls
+
+
+def summarize(series: Dict[str, np.ndarray], percentiles: Sequence[float] = (50.0,)) -> Dict[str, float]:
+    """
+    Spread of the per-second series: IOPS min/median, p99 median/max and the overall max latency (full seconds).
+    """
+    full = slice(0, max(1, series["iops"].size - 1))
+    iops = series["iops"][full]
+    p99 = series["p99_us"][full]
+    max_us = series["max_us"][full]
+
+    def stat(fn, values: np.ndarray) -> float:
+        values = values[np.isfinite(values)]
+        return float(fn(values)) if values.size else float("nan")
+
+    return {
+        "Seconds": int(iops.size),
+        "IOPSMin": stat(np.min, iops),
+        "IOPSMedian": stat(np.median, iops),
+        "P99Median_us": stat(np.median, p99),
+        "P99Max_us": stat(np.max, p99),
+        "Max_us": stat(np.max, max_us),
+    }
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Latency-over-time heatmaps (time x latency bucket x I/O count) from fio per-I/O latency logs.
+
+Percentile lines average a bimodal latency distribution into one curve (e.g. io_uring SQPOLL thread wakeups give a
+second mode far above the first); a heatmap keeps both. The counts come from the per-interval fio histograms of
+fiolog.LogTimeline and are regrouped into log2 display buckets with one reduceat, so logs with millions of I/Os
+render in seconds.
+
+Standalone use (e.g. for fio logs taken next to a stress tool sweep, whose results have only per-run percentiles):
+
+    heatmap.py <log_prefix> [<log_prefix> ...] --output-dir /tmp/heatmaps --interval-ms 100
+"""
+
+import argparse
+import os
+import sys
+from typing import Optional, Tuple
+
+from fiolog import LogTimeline, bucket_values, load_timeline
+
+try:
+    import numpy as np
+except ModuleNotFoundError as e:
+    raise SystemExit(
+        "Missing dependency: numpy\n"
+        "Install it with: pip3 install numpy\n"
+        f"Original error: {e}"
+    )
+
+
+BUCKETS_PER_OCTAVE = 4
+
+
+def _import_pyplot():
+    # Optional dependency: matplotlib (headless-safe backend), imported only to render.
+    try:
+        import matplotlib  # type: ignore
+    except ModuleNotFoundError as e:
+        raise SystemExit(
+            "Missing dependency: matplotlib\n"
+            "Install it with: pip3 install matplotlib\n"
+            f"Original error: {e}"
+        )
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def timeline_heatmap(
+    timeline: LogTimeline, buckets_per_octave: int = BUCKETS_PER_OCTAVE
+) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    (time edges in s, latency edges in us, counts [interval, latency bucket]) of a timeline, None without latencies.
+    Latency buckets are 2^(1 / buckets_per_octave) wide.
+    """
+    hist = timeline.hist
+    if hist.size == 0 or hist.sum() == 0:
+        return None
+
+    # fio buckets are log-linear, so display buckets of their values are non-decreasing
+    values_ns = np.maximum(bucket_values(np.arange(hist.shape[1])), 1.0)
+    display = np.floor(np.log2(values_ns) * buckets_per_octave).astype(np.int64)
+    used = np.flatnonzero(hist.sum(axis=0))
+    display_lo, display_hi = display[used[0]], display[used[-1]]
+
+    unique, starts = np.unique(display, return_index=True)
+    grouped = np.add.reduceat(hist, starts, axis=1)
+    counts = np.zeros((hist.shape[0], display_hi - display_lo + 1), dtype=np.int64)
+    keep = (unique >= display_lo) & (unique <= display_hi)
+    counts[:, unique[keep] - display_lo] = grouped[:, keep]
+
+    time_edges = np.arange(hist.shape[0] + 1) * timeline.interval_ms / 1000.0
+    latency_edges = 2.0 ** (np.arange(display_lo, display_hi + 2) / buckets_per_octave) / 1000.0
+    return time_edges, latency_edges, counts
+
+
+def render_heatmap(
+    time_edges: np.ndarray,
+    latency_edges: np.ndarray,
+    counts: np.ndarray,
+    out_path: str,
+    title: str,
+    percentile_lines: Optional[dict] = None,
+) -> None:
+    """
+    Heatmap with log latency and log color scales; percentile_lines ({label: per-interval values in us}) are
+    drawn on top to show what they hide.
+    """
+    plt = _import_pyplot()
+    from matplotlib.colors import LogNorm
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    masked = np.ma.masked_equal(counts.T, 0)
+    mesh = ax.pcolormesh(
+        time_edges, latency_edges, masked, norm=LogNorm(vmin=1, vmax=max(1, int(counts.max()))), cmap="viridis"
+    )
+    fig.colorbar(mesh, ax=ax, label="I/Os per interval")
+
+    centers = (time_edges[:-1] + time_edges[1:]) / 2.0
+    for label, values in (percentile_lines or {}).items():
+        ax.plot(centers, values[: centers.size], linewidth=1, label=label)
+    if percentile_lines:
+        ax.legend(loc="upper right")
+
+    ax.set_yscale("log")
+    ax.set_xlabel("Time (s)")
+    ax.set_ylabel("Latency (us)")
+    ax.set_title(title)
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=120)
+    plt.close(fig)
+
+
+def render_log_heatmap(
+    log_prefix: str,
+    out_path: str,
+    title: str = "",
+    interval_ms: int = 1000,
+    buckets_per_octave: int = BUCKETS_PER_OCTAVE,
+    timeline: Optional[LogTimeline] = None,
+) -> bool:
+    """
+    Heatmap of the fio logs <log_prefix>_lat.N.log (or _clat) with p50/p99 lines; False when there is nothing to plot.
+    """
+    if timeline is None:
+        timeline = load_timeline(log_prefix, interval_ms=interval_ms)
+    heatmap = timeline_heatmap(timeline, buckets_per_octave) if timeline is not None else None
+    if heatmap is None:
+        return False
+    time_edges, latency_edges, counts = heatmap
+    render_heatmap(
+        time_edges,
+        latency_edges,
+        counts,
+        out_path,
+        title or f"Latency over time: {os.path.basename(log_prefix)}",
+        {"p50": timeline.percentile_us(50.0), "p99": timeline.percentile_us(99.0)},
+    )
+    return True
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Latency-over-time heatmaps of fio per-I/O latency logs <log_prefix>_lat.N.log (or _clat.N.log)."
+    )
+    ap.add_argument(
+        "log_prefix",
+        nargs="+",
+        help="Prefix of fio logs, e.g. of fio --write_lat_log=<log_prefix> --log_avg_msec=0.",
+    )
+    ap.add_argument(
+        "--output-dir", default=".", help="Directory for <log name>_heatmap.png files (default: current directory)."
+    )
+    ap.add_argument("--interval-ms", type=int, default=100, help="Time bucket width, ms (default: 100).")
+    ap.add_argument(
+        "--buckets-per-octave",
+        type=int,
+        default=BUCKETS_PER_OCTAVE,
+        help=f"Latency buckets per power of two (default: {BUCKETS_PER_OCTAVE}).",
+    )
+    args = ap.parse_args()
+
+    status = 0
+    for log_prefix in args.log_prefix:
+        out_path = os.path.join(args.output_dir, f"{os.path.basename(log_prefix)}_heatmap.png")
+        if render_log_heatmap(
+            log_prefix, out_path, interval_ms=args.interval_ms, buckets_per_octave=args.buckets_per_octave
+        ):
+            print(out_path)
+        else:
+            print(f"No latency logs with I/Os: {log_prefix}", file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+import math
+import unittest
+
+from benchstats import (
+    bins_percentiles,
+    fit_saturation,
+    format_knee,
+    knee_point,
+    little_ratio,
+    median_ci,
+    merge_latency_bins,
+    modified_z_scores,
+    relative_median_ci,
+    steady_state,
+)
+
+
+def saturating_sweep(pmax, q_half, queue_depths):
+    # IOPS(q) = Pmax * q / (q + q_half), latency by Little's law
+    points = []
+    for q in queue_depths:
+        iops = pmax * q / (q + q_half)
+        points.append((q, iops, q / iops * 1_000_000))
+    return points
+
+
+class TestKnee(unittest.TestCase):
+    def test_fit_saturation(self):
+        points = saturating_sweep(200_000, 10, [1, 2, 4, 8, 16, 32, 64, 128])
+        pmax, q_half = fit_saturation([(q, iops) for q, iops, _ in points])
+        self.assertAlmostEqual(pmax, 200_000, delta=1)
+        self.assertAlmostEqual(q_half, 10, places=3)
+
+    def test_knee(self):
+        knee = knee_point(saturating_sweep(200_000, 10, [1, 2, 4, 8, 16, 32, 64, 128]))
+        self.assertTrue(knee["Saturated"])
+        self.assertAlmostEqual(knee["KneeQDFit"], 10, places=3)
+        self.assertAlmostEqual(knee["UnloadedLatency_us"], 50, places=3)
+        self.assertEqual(knee["KneeQD"], 8)
+        self.assertEqual(knee["PeakQD"], 128)
+        self.assertAlmostEqual(knee["LatencyAtKnee_us"], 90)
+        self.assertAlmostEqual(knee["LittleRatioAtKnee"], 1)
+        self.assertEqual(knee["LittleInconsistentQD"], [])
+        self.assertEqual(format_knee(knee), ["8", "185.5", "90.0", "1.00"])
+
+    def test_not_saturated(self):
+        knee = knee_point([(q, 10_000 * q, 100) for q in [1, 2, 4, 8]])
+        self.assertFalse(knee["Saturated"])
+        self.assertEqual(knee["KneeQD"], 8)
+        self.assertIsNone(knee["FitMaxIOPS"])
+        self.assertEqual(format_knee(knee)[0], ">=8")
+
+    def test_saturated_at_smallest_qd(self):
+        # the smallest queue depth is above the fitted Pmax, its latency is not corrected
+        points = [(q, iops, q / iops * 1_000_000) for q, iops in [
+            (1, 95_000), (2, 60_000), (4, 75_000), (8, 85_000), (16, 90_000), (32, 92_000), (64, 93_000)]]
+        knee = knee_point(points)
+        self.assertTrue(knee["Saturated"])
+        self.assertLess(knee["FitMaxIOPS"], 95_000)
+        self.assertAlmostEqual(knee["UnloadedLatency_us"], points[0][2])
+        self.assertEqual(knee["KneeQD"], 1)
+
+    def test_little_inconsistent(self):
+        # latency does not grow with the queue depth: requests are queued before the device
+        knee = knee_point([(q, 100_000, 10) for q in [1, 2, 4]])
+        self.assertEqual(knee["LittleInconsistentQD"], [2, 4])
+        self.assertAlmostEqual(little_ratio(4, 100_000, 10), 4)
+
+    def test_median_ci(self):
+        self.assertIsNone(median_ci([1, 2, 3, 4, 5]))
+        self.assertEqual(median_ci([1, 2, 3, 4, 5], confidence=0.9), (1, 5))
+        self.assertEqual(median_ci([6, 1, 5, 2, 4, 3]), (1, 6))
+        # P(Binomial(10, 1/2) < 2) = 11 / 1024, coverage 0.979; k = 3 covers only 0.891
+        self.assertEqual(median_ci(list(range(1, 11))), (2, 9))
+        self.assertEqual(median_ci(list(range(1, 11)) + [float("nan")]), (2, 9))
+        self.assertAlmostEqual(relative_median_ci(list(range(1, 11))), 7 / 5.5)
+        self.assertIsNone(relative_median_ci([1, 2, 3]))
+
+    def test_bins_percentiles(self):
+        merged = merge_latency_bins([{"1000": 50, "2000": 40, "9000": 10}, {"2000": 60, "5000": 39, "9000": 1}])
+        self.assertEqual(merged, {1000: 50, 2000: 100, 5000: 39, 9000: 11})
+        # 200 samples: p25 -> 50th sample, p50 -> 100th, p99 -> 198th
+        self.assertEqual(
+            bins_percentiles(merged, [50, 25, 99, 99.9]),
+            {25: 1000, 50: 2000, 99: 9000, 99.9: 9000},
+        )
+        self.assertEqual(bins_percentiles(merged, [75]), {75: 2000})
+        self.assertEqual(bins_percentiles({}, [50]), {50: None})
+
+    def test_steady_state(self):
+        # decaying after-fill IOPS settle at 100k
+        rounds = [400_000, 250_000, 160_000, 120_000, 105_000, 101_000, 100_000, 99_000, 100_500]
+        self.assertIsNone(steady_state(rounds[:4]))
+        self.assertFalse(steady_state(rounds[:5])["Steady"])
+        self.assertFalse(steady_state(rounds[:7])["Steady"])
+        state = steady_state(rounds)
+        self.assertTrue(state["Steady"])
+        self.assertAlmostEqual(state["Average"], 101_100)
+        self.assertAlmostEqual(state["Excursion"], 6_000 / 101_100)
+        # within the range limit, but trending by 4 x 2.4% of the average
+        trending = [95_000, 97_500, 100_000, 102_500, 105_000]
+        state = steady_state(trending)
+        self.assertLess(state["Excursion"], 0.2)
+        self.assertAlmostEqual(state["SlopeExcursion"], 0.1)
+        self.assertFalse(steady_state(trending, max_slope_excursion=0.09)["Steady"])
+        self.assertFalse(steady_state([0, 0, 0, 0, 0])["Steady"])
+
+    def test_modified_z_scores(self):
+        # the degraded 60k drive does not widen the spread of the others
+        scores = modified_z_scores([100, 102, 98, 101, 99, 60])
+        self.assertAlmostEqual(scores[0], 0.6745 * 0.5 / 1.5)
+        self.assertLess(scores[-1], -3.5)
+        self.assertEqual(modified_z_scores([5, 5, 5, 7]), [0.0, 0.0, 0.0, math.inf])
+        self.assertEqual(modified_z_scores([]), [])
+
+    def test_empty(self):
+        self.assertEqual(knee_point([(1, float("nan"), 10)]), {})
+        self.assertEqual(format_knee({}), ["-", "-", "-", "-"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from fiolog import bucket_values, find_logs, find_stalls, latency_buckets, load_timeline, read_log
+
+
+def write_log(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        for time_ms, value in lines:
+            f.write(f"{time_ms}, {value}, 1, 4096, 0, 0\n")
+
+
+class TestFioLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.prefix = os.path.join(self.tmp.name, "write_iops_test")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_buckets_match_fio(self):
+        values = np.array([0, 1, 127, 128, 129, 1000, 123456, 10**9])
+        idx = latency_buckets(values)
+        self.assertEqual(idx[:4].tolist(), [0, 1, 127, 128])
+        # representative value within fio's 1/64 relative error
+        self.assertTrue(np.all(np.abs(bucket_values(idx) - values) <= values / 64 + 1))
+
+    def test_chunks_split_at_lines(self):
+        path = self.prefix + "_lat.1.log"
+        write_log(path, [(t, 1000 + t) for t in range(5000)])
+        chunks = list(read_log(path, chunk_bytes=4096))
+        self.assertGreater(len(chunks), 1)
+        rows = np.concatenate(chunks)
+        self.assertEqual(rows.shape, (5000, 6))
+        self.assertEqual(rows[:, 0].tolist(), list(range(5000)))
+        self.assertEqual(rows[:, 1].tolist(), [1000 + t for t in range(5000)])
+
+    def test_jobs_merge_per_second(self):
+        # two jobs, 1000 I/Os per second each, second 2 stalls
+        for job, latency_ns in ((1, 100_000), (2, 300_000)):
+            lines = []
+            for ms in range(5500):
+                if 2000 <= ms < 3000 and ms % 50:
+                    continue
+                lines.append((ms, 50_000_000 if ms == 2000 else latency_ns))
+            write_log(f"{self.prefix}_lat.{job}.log", lines)
+        self.assertEqual(sorted(find_logs(self.prefix)), ["lat"])
+
+        series = load_timeline(self.prefix).series()
+        self.assertEqual(series["iops"].tolist(), [2000, 2000, 40, 2000, 2000, 1000])
+        self.assertAlmostEqual(series["p50_us"][0], 100, delta=2)
+        self.assertAlmostEqual(series["p99_us"][0], 300, delta=5)
+        self.assertAlmostEqual(series["max_us"][2], 50_000)
+
+        stalls = find_stalls(series)
+        self.assertEqual(len(stalls), 1)
+        self.assertEqual((stalls[0]["StartSecond"], stalls[0]["Seconds"]), (2, 1))
+        self.assertEqual(stalls[0]["Reason"], "iops+latency")
+
+    def test_iops_log_only(self):
+        write_log(self.prefix + "_iops.1.log", [(ms, 900 if ms < 1000 else 1100) for ms in range(0, 2500, 100)])
+        series = load_timeline(self.prefix).series()
+        self.assertEqual(series["iops"].tolist(), [900, 1100, 1100])
+        self.assertTrue(np.isnan(series["p99_us"]).all())
+        self.assertIsNone(load_timeline(os.path.join(self.tmp.name, "missing")))
+
+    def test_per_io_iops_log(self):
+        # log_avg_msec=0: a sample of value 1 per I/O, 500 and 250 I/Os per second in two jobs
+        write_log(self.prefix + "_iops.1.log", [(ms * 2, 1) for ms in range(1000)])
+        write_log(self.prefix + "_iops.2.log", [(ms * 4, 1) for ms in range(500)])
+        series = load_timeline(self.prefix).series()
+        self.assertEqual(series["iops"].tolist(), [750, 750])
+        series = load_timeline(self.prefix, interval_ms=500).series()
+        self.assertEqual(series["iops"].tolist(), [750] * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from fiolog import load_timeline
+from heatmap import timeline_heatmap
+
+
+class TestHeatmap(unittest.TestCase):
+    def test_bimodal(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prefix = os.path.join(tmp, "uring_qd1_read")
+            # 50 I/Os per 100 ms at ~20 us, every 5th at ~160 us (e.g. SQPOLL thread wakeups)
+            with open(prefix + "_lat.1.log", "w", encoding="utf-8") as f:
+                for i in range(1000):
+                    latency_ns = 160_000 if i % 5 == 0 else 20_000
+                    f.write(f"{i * 2}, {latency_ns + i % 7}, 0, 4096, 0\n")
+            timeline = load_timeline(prefix, interval_ms=100)
+            time_edges, latency_edges, counts = timeline_heatmap(timeline, buckets_per_octave=2)
+
+        self.assertEqual(time_edges.tolist(), [i / 10 for i in range(21)])
+        self.assertEqual(counts.shape, (20, latency_edges.size - 1))
+        self.assertTrue(np.all(np.diff(latency_edges) > 0))
+        self.assertEqual(int(counts.sum()), 1000)
+        # the modes are 3 octaves apart with empty buckets between them
+        per_bucket = counts.sum(axis=0)
+        modes = np.flatnonzero(per_bucket)
+        self.assertEqual(per_bucket[modes].tolist(), [800, 200])
+        self.assertEqual(modes[1] - modes[0], 6)
+        self.assertLessEqual(latency_edges[modes[0]], 20)
+        self.assertGreater(latency_edges[modes[0] + 1], 20)
+        self.assertTrue(np.all(counts[:, modes] == [40, 10]))
+
+    def test_empty(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prefix = os.path.join(tmp, "iops_only")
+            with open(prefix + "_iops.1.log", "w", encoding="utf-8") as f:
+                f.write("1000, 5000, 0, 4096, 0\n")
+            self.assertIsNone(timeline_heatmap(load_timeline(prefix)))
+
+
+if __name__ == "__main__":
+    unittest.main()
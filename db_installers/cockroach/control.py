@@ -2,16 +2,21 @@
 # -*- coding: UTF-8 -*-
 
 import argparse
+import functools
 import logging
 import os
 import pipes
 import sys
 
 if __package__:
-    from ..pylib.common import ErrorExit, SSHAction, PSSHAction, BaseAction, Hosts
+    from ..pylib.common import ErrorExit, SSHAction, PSSHAction, BaseAction, Hosts, run_parallel, ControlMaster
+    from ..pylib.common import PACKAGE_HASH_FILE, file_sha256
+    from ..pylib.readiness import HTTPProbe, NotReadyError, TCPProbe, print_ready_times, wait_ready
 else:
     sys.path.append(os.path.dirname(__file__) + '/..')
-    from pylib.common import ErrorExit, SSHAction, PSSHAction, BaseAction, Hosts
+    from pylib.common import ErrorExit, SSHAction, PSSHAction, BaseAction, Hosts, run_parallel, ControlMaster
+    from pylib.common import PACKAGE_HASH_FILE, file_sha256
+    from pylib.readiness import HTTPProbe, NotReadyError, TCPProbe, print_ready_times, wait_ready
 
 
 logger = logging.getLogger(__name__)
@@ -28,6 +33,7 @@ class Deploy(PSSHAction):
         super().__init__(args)
         self.package = args.deploy
         self.config = args.config
+        self.relay_fanout = args.relay_fanout
 
     @staticmethod
     def _get_mkdir_cmd():
@@ -39,15 +45,39 @@ class Deploy(PSSHAction):
         self._logger.info("Deploy %s", self.package)
         filename = os.path.basename(self.package)
         upload_path = os.path.join(DEPLOY_TMP_PATH, filename)
-        self._logger.info("Upload %s", self.package)
-        self.pssh_upload(self.package, DEPLOY_TMP_PATH)
 
+        if not self.relay_fanout:
+            self._logger.info("Upload %s", self.package)
+            self.pssh_upload(self.package, DEPLOY_TMP_PATH)
+
+            pssh_cmd = self._get_mkdir_cmd()
+            pssh_cmd += "; sudo -u {user} tar -xzf {src} -C {dst} --strip-components=1 | tail; rm -f {src}".format(
+                src=pipes.quote(upload_path), dst=pipes.quote(DEPLOY_PATH), user=self.sudo_user)
+
+            self._logger.info("Extract to %s", DEPLOY_PATH)
+            self.pssh_run(pssh_cmd)
+            return
+
+        package_hash = file_sha256(self.package)
+        hash_path = os.path.join(DEPLOY_PATH, PACKAGE_HASH_FILE)
+        hosts = self.stale_hosts(hash_path, package_hash)
+        self._logger.info("%d of %d hosts already have %s", len(self.pssh_hosts) - len(hosts), len(self.pssh_hosts), filename)
+        if not hosts:
+            return
+
+        self._logger.info("Upload %s to %d hosts, relay fanout %d", self.package, len(hosts), self.relay_fanout)
+        hosts = self.relay_upload(self.package, DEPLOY_TMP_PATH, hosts, self.relay_fanout)
+
+        # the hash is written after a complete extraction only
         pssh_cmd = self._get_mkdir_cmd()
-        pssh_cmd += "; sudo -u {user} tar -xzf {src} -C {dst} --strip-components=1 | tail; rm -f {src}".format(
-            src=pipes.quote(upload_path), dst=pipes.quote(DEPLOY_PATH), user=self.sudo_user)
+        pssh_cmd += "; sudo rm -f {hash_path}; sudo -u {user} tar -xzf {src} -C {dst} --strip-components=1"
+        pssh_cmd += " && echo {hash} | sudo tee {hash_path} > /dev/null; rm -f {src}"
+        pssh_cmd = pssh_cmd.format(
+            src=pipes.quote(upload_path), dst=pipes.quote(DEPLOY_PATH), user=self.sudo_user,
+            hash=package_hash, hash_path=pipes.quote(hash_path))
 
         self._logger.info("Extract to %s", DEPLOY_PATH)
-        self.pssh_run(pssh_cmd)
+        self.pssh_run(pssh_cmd, hosts=hosts)
 
 
 class Init(SSHAction):
@@ -73,6 +103,7 @@ class Start(PSSHAction):
         super().__init__(args)
         self.task_set = args.task_set
         self.per_disk_instance = args.per_disk_instance
+        self.start_parallelism = args.start_parallelism
 
         if hasattr(args, "ssh_user"):
             self.ssh_user = args.ssh_user
@@ -116,8 +147,24 @@ class Start(PSSHAction):
             join_hosts.append(host + ":" + str(LISTEN_PORT))
         return join_hosts
 
+    def start_instances(self, instances):
+        """
+        instances: (host, start_instance() keyword arguments). Starts are sent concurrently, the join targets
+        first, so that the other nodes find them listening.
+        """
+        join_hosts = set(self.get_join_hosts())
+        join_targets = [i for i in instances if i[0] + i[1]["listen_addr"] in join_hosts]
+        others = [i for i in instances if i[0] + i[1]["listen_addr"] not in join_hosts]
+        for wave in (join_targets, others):
+            tasks = [
+                (host + kwargs["listen_addr"], functools.partial(self.start_instance, host, **kwargs))
+                for host, kwargs in wave
+            ]
+            run_parallel(tasks, self.start_parallelism, "Start")
+
     def run_per_disk(self):
         join_hosts = self.get_join_hosts()
+        instances = []
 
         cores_per_instance = max(1, Cores // len(Disks))
         cache_per_instance = max(1, CacheSizeGB // len(Disks))
@@ -136,22 +183,22 @@ class Start(PSSHAction):
                     http_listen = ":" + str(http_port)
                     end_core = start_core + cores_per_instance - 1 + (cores_reminder > 0)
                     task_set = str(start_core) + "-" + str(end_core)
-                    self.start_instance(
-                        host,
-                        store_args,
-                        listen_host,
-                        http_listen,
-                        join_hosts,
-                        task_set,
-                        region.Name,
-                        cache_per_instance + (cache_reminder > 0),
-                        sql_mem_per_instance + (sql_mem_reminder > 0))
+                    instances.append((host, dict(
+                        store_args=store_args,
+                        listen_addr=listen_host,
+                        http_addr=http_listen,
+                        join_hosts=join_hosts,
+                        task_set=task_set,
+                        region=region.Name,
+                        cache_size=cache_per_instance + (cache_reminder > 0),
+                        sql_mem_size=sql_mem_per_instance + (sql_mem_reminder > 0))))
                     port += 1
                     http_port += 1
                     start_core = end_core + 1
                     cores_reminder -= (cores_reminder > 0)
                     cache_reminder -= (cache_reminder > 0)
                     sql_mem_reminder -= (sql_mem_reminder > 0)
+        self.start_instances(instances)
 
     def run(self):
         super().run()
@@ -164,20 +211,51 @@ class Start(PSSHAction):
             store_args += "--store " + disk2mnt(d) + " "
 
         join_hosts = self.get_join_hosts()
+        instances = []
         for region in Regions:
             for host in region.Hosts:
                 http_listen = ":" + str(HTTP_PORT)
                 listen_host = ":" + str(LISTEN_PORT)
-                self.start_instance(
-                    host,
-                    store_args,
-                    listen_host,
-                    http_listen,
-                    join_hosts,
-                    self.task_set,
-                    region.Name,
-                    CacheSizeGB,
-                    SqlMemorySizeGB)
+                instances.append((host, dict(
+                    store_args=store_args,
+                    listen_addr=listen_host,
+                    http_addr=http_listen,
+                    join_hosts=join_hosts,
+                    task_set=self.task_set,
+                    region=region.Name,
+                    cache_size=CacheSizeGB,
+                    sql_mem_size=SqlMemorySizeGB)))
+        self.start_instances(instances)
+
+
+class WaitReady(BaseAction):
+
+    def __init__(self, args):
+        super().__init__(args)
+        self.per_disk_instance = args.per_disk_instance
+        self.timeout = args.ready_timeout
+        self.since = args.ready_since
+
+    def run(self):
+        super().run()
+        # nodes serve after init: /health?ready=1 answers 503 until then
+        instances = len(Disks) if self.per_disk_instance else 1
+        nodes = []
+        for host in Hosts:
+            for i in range(instances):
+                probes = [
+                    HTTPProbe("http://{}:{}/health?ready=1".format(host, HTTP_PORT + i)),
+                    TCPProbe(host, LISTEN_PORT + i),
+                ]
+                nodes.append((host + ":" + str(LISTEN_PORT + i), probes))
+
+        self._logger.info("Wait for %d nodes to be ready", len(nodes))
+        try:
+            times = wait_ready(nodes, self.timeout, since=self.since)
+        except NotReadyError as e:
+            print_ready_times(e.times, e.not_ready)
+            raise ErrorExit()
+        print_ready_times(times)
 
 
 class Stop(PSSHAction):
@@ -313,6 +391,7 @@ class ReturnHaProxySetupPath(BaseAction):
 # control.py -c cluster_config.py deploy
 # control.py -c cluster_config.py start
 # control.py -c cluster_config.py init
+# control.py -c cluster_config.py wait-ready
 class Main(object):
 
     def __init__(self):
@@ -341,6 +420,7 @@ class Main(object):
         self.add_cmd("format", Format, "format hosts")
         self.add_cmd("clean", Clean, "umount fs, etc")
         self.add_cmd("init", Init, "init Cockroach cluster")
+        self.add_cmd("wait-ready", WaitReady, "wait until all nodes serve HTTP and SQL, report time to ready")
         self.add_cmd("deploy", Deploy, "deploy release to cluster", has_arg=True)
         self.add_cmd("list-hosts", ReturnHosts, "return list of hosts")
         self.add_cmd("listen-port", ReturnListenPort, "return listen port")
@@ -359,12 +439,28 @@ class Main(object):
         self.parser.add_argument("--task-set", type=str, help="Specify cpus to run on")
         self.parser.add_argument("--fail-on-error", action="store_true", help="Abort if any subcommand failed")
         self.parser.add_argument("--dry-run", action="store_true", help="Don't execute commands")
+        self.parser.add_argument("--no-ssh-mux", action="store_true",
+                                 help="Open a new ssh connection per command instead of one multiplexed per host")
         self.parser.add_argument("--per-disk-instance", action="store_true", help="Run per disk cockroach instances")
+        self.parser.add_argument("--ready-timeout", action="store", type=float, default=600,
+                                 help="Max seconds --wait-ready waits for the nodes (default: 600)")
+        self.parser.add_argument("--ready-since", action="store", type=float,
+                                 help="Epoch seconds taken before --start, --wait-ready counts time to ready from it "
+                                      "(default: from the first probe)")
+        self.parser.add_argument("--relay-fanout", action="store", type=int, default=0,
+                                 help="Deploy: skip hosts which already have the package (by sha256) and send it to the "
+                                      "others through a relay tree, each holder forwarding it to this many hosts "
+                                      "per round (default: 0, upload from here to all hosts)")
+        self.parser.add_argument("--start-parallelism", action="store", type=int, default=64,
+                                 help="Max instances started at once (default: 64)")
         self.args = self.parser.parse_args()
+        if self.args.relay_fanout < 0:
+            self.parser.error("--relay-fanout must be >= 0")
 
     def run(self):
         logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO)
         self.parse_args()
+        ControlMaster.enabled = not self.args.no_ssh_mux
 
         try:
             with open(self.args.config) as f:
@@ -78,9 +78,14 @@ parallel-ssh --user $user -H "$NODES" -p 30 "sudo mkdir -p $COCKROACH_DEPLOY_PAT
 "$PATH_TO_SCRIPT"/control.py --ssh-user $user -c "$COCKROACH_CONFIG" --clean
 "$PATH_TO_SCRIPT"/control.py --ssh-user $user -c "$COCKROACH_CONFIG" --format
 "$PATH_TO_SCRIPT"/control.py --ssh-user $user -c "$COCKROACH_CONFIG" --deploy "$COCKROACH_TAR" --hosts "$NODES"
+start_ts=$(date +%s.%N)
 "$PATH_TO_SCRIPT"/control.py --ssh-user $user -c "$COCKROACH_CONFIG" --start "$START_ARGS"
 "$PATH_TO_SCRIPT"/control.py --ssh-user $user -c "$COCKROACH_CONFIG" --init --hosts "$INIT_NODE"
-sleep 10s
+"$PATH_TO_SCRIPT"/control.py --ssh-user $user -c "$COCKROACH_CONFIG" --wait-ready --ready-since $start_ts $START_ARGS
+if [[ $? -ne 0 ]]; then
+    echo "Cockroach nodes are not ready"
+    exit 1
+fi
 
 if [[ -n "$HA_PROXY_BIN" ]]; then
     echo "Deploy HAProxy"
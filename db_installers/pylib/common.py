@@ -1,15 +1,83 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
+import atexit
+import concurrent.futures
+import functools
+import hashlib
 import logging
+import os
+import select
+import shlex
+import shutil
+import statistics
 import subprocess
 import sys
+import tempfile
+import threading
 import time
 
 
 logger = logging.getLogger(__name__)
 Hosts = []
 
+# written to the deploy path after a successful deploy, see PSSHAction.stale_hosts()
+PACKAGE_HASH_FILE = ".deployed_package_sha256"
+
+
+class SSHControlMaster(object):
+    """
+    One multiplexed ssh connection per host (OpenSSH ControlMaster) for the whole process: the first ssh/pssh
+    command to a host opens the connection, the next ones only open a channel in it. The connections are
+    closed at exit.
+    """
+    PERSIST = 600
+
+    def __init__(self):
+        super().__init__()
+        self._logger = logger.getChild(self.__class__.__name__)
+        self.enabled = True
+        self._control_dir = None
+        self._lock = threading.Lock()
+
+    def ssh_options(self):
+        """-o options for ssh, empty when disabled"""
+        if not self.enabled:
+            return []
+        with self._lock:
+            if self._control_dir is None:
+                # short path: unix socket paths are limited to ~100 bytes
+                self._control_dir = tempfile.mkdtemp(prefix="ssh-mux-", dir="/tmp")
+                atexit.register(self.close)
+        options = [
+            "ControlMaster=auto",
+            # %C - hash of local host, remote host, port and user
+            "ControlPath=" + os.path.join(self._control_dir, "%C"),
+            "ControlPersist=" + str(self.PERSIST),
+        ]
+        return [arg for option in options for arg in ("-o", option)]
+
+    def pssh_options(self):
+        """The same options for parallel-ssh/parallel-scp"""
+        return ["-O" if arg == "-o" else arg for arg in self.ssh_options()]
+
+    def close(self):
+        with self._lock:
+            control_dir, self._control_dir = self._control_dir, None
+        if control_dir is None:
+            return
+        for name in os.listdir(control_dir):
+            path = os.path.join(control_dir, name)
+            try:
+                subprocess.run(["ssh", "-o", "ControlPath=" + path, "-O", "exit", "mux"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10)
+            except Exception:
+                self._logger.warning("Failed to close ssh connection %s", path, exc_info=True)
+        shutil.rmtree(control_dir, ignore_errors=True)
+
+
+ControlMaster = SSHControlMaster()
+
 
 class ErrorExit(Exception):
     pass
@@ -31,9 +99,13 @@ class Job(object):
         self.timeout = timeout
         self.kill_timeout = kill_timeout
         self.shell = shell
+        # time_elapsed - seconds since the start on the monotonic clock, wall_time - start to exit of the last run
         self.time_elapsed = 0
+        self.wall_time = None
         self.terminated = False
         self.process = None
+        self._start_time = None
+        self._pidfd = None
 
     def check_terminate_timeout(self):
         if self.terminated or self.time_elapsed <= self.timeout:
@@ -55,32 +127,59 @@ class Job(object):
             self._logger.error("Failed to kill job.", exc_info=True)
         return True
 
-    def wait_exit_code(self):
-        while True:
-            time.sleep(0.1)
-            self.time_elapsed += 0.1
-
-            return_code = self.process.poll()
-            if return_code is not None:
-                return return_code
+    def _start(self, stdout):
+        self.time_elapsed = 0
+        self.wall_time = None
+        self.terminated = False
+        self._start_time = time.monotonic()
+        self.process = subprocess.Popen(
+            self.command,
+            stdout=stdout,
+            stderr=sys.stderr,
+            shell=self.shell
+        )
+        try:
+            # exit of the process makes its pidfd readable (Linux 5.3+): wait without polling
+            self._pidfd = os.pidfd_open(self.process.pid)
+        except (AttributeError, OSError):
+            self._pidfd = None
+
+    def _wait(self, timeout):
+        """Exit code of the process, None if it is still running after timeout seconds"""
+        if self._pidfd is not None:
+            if not select.select([self._pidfd], [], [], timeout)[0]:
+                return None
+            return self.process.wait()
+        try:
+            return self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return None
 
-            self.check_terminate_timeout()
-            if self.check_kill_timeout():
-                return -9
+    def wait_exit_code(self):
+        try:
+            while True:
+                deadline = self.timeout + (self.kill_timeout if self.terminated else 0)
+                return_code = self._wait(max(0, deadline - self.time_elapsed))
+                self.time_elapsed = time.monotonic() - self._start_time
+                if return_code is not None:
+                    return return_code
+
+                self.check_terminate_timeout()
+                if self.check_kill_timeout():
+                    return -9
+        finally:
+            self.wall_time = time.monotonic() - self._start_time
+            self._logger.debug("'%r' finished in %.3f s", self.command, self.wall_time)
+            if self._pidfd is not None:
+                os.close(self._pidfd)
+                self._pidfd = None
 
     def run(self):
         """Run command with timeout"""
         logging.debug("Executing: '%r'", self.command)
-        self.time_elapsed = 0
-        self.terminated = False
 
         try:
-            self.process = subprocess.Popen(
-                self.command,
-                stdout=sys.stdout,
-                stderr=sys.stderr,
-                shell=self.shell
-            )
+            self._start(sys.stdout)
         except Exception:
             self._logger.warning("Execution of '%r' failed with:", self.command, exc_info=True)
             raise
@@ -98,12 +197,7 @@ class Job(object):
 
     def get_output(self):
         try:
-            self.process = subprocess.Popen(
-                self.command,
-                stdout=subprocess.PIPE,
-                stderr=sys.stderr,
-                shell=self.shell
-            )
+            self._start(subprocess.PIPE)
         except Exception:
             self._logger.warning("Execution of '%r' failed with:", self.command, exc_info=True)
             raise
@@ -115,6 +209,55 @@ class Job(object):
         return output
 
 
+def run_parallel(tasks, parallelism, title="Task"):
+    """
+    Run (name, func) tasks, at most parallelism at once, and log the wall time of every task.
+    Returns {name: seconds}; the first failure is re-raised after all tasks finished.
+    """
+    if not tasks:
+        return {}
+    times = {}
+    errors = []
+
+    def timed(name, func):
+        start = time.monotonic()
+        try:
+            func()
+        finally:
+            times[name] = time.monotonic() - start
+
+    start = time.monotonic()
+    workers = max(1, min(parallelism, len(tasks)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(timed, name, func): name for name, func in tasks}
+        for future in concurrent.futures.as_completed(futures):
+            name = futures[future]
+            try:
+                future.result()
+            except BaseException as e:
+                errors.append(e)
+                logger.error("%s %s failed after %.2f s", title, name, times.get(name, 0))
+            else:
+                logger.info("%s %s: %.2f s", title, name, times[name])
+
+    latencies = sorted(times.values())
+    logger.info(
+        "%s: %d done, %d failed in %.2f s (parallelism %d), latency min %.2f s, median %.2f s, max %.2f s",
+        title, len(tasks) - len(errors), len(errors), time.monotonic() - start, workers,
+        latencies[0], statistics.median(latencies), latencies[-1])
+    if errors:
+        raise errors[0]
+    return times
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(functools.partial(f.read, 1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
 class BaseAction(object):
 
     def __init__(self, _args):
@@ -144,7 +287,7 @@ class SSHAction(BaseAction):
         ssh_cmd = list()
         if self.dry_run:
             ssh_cmd.append("echo")
-        ssh_cmd += ["ssh", self.host, cmd]
+        ssh_cmd += ["ssh"] + ControlMaster.ssh_options() + [self.host, cmd]
         job = Job(ssh_cmd, timeout=self.TIMEOUT)
         try:
             job.safe_run()
@@ -177,11 +320,12 @@ class PSSHAction(BaseAction):
                 if "@" not in self.pssh_hosts[i]:
                     self.pssh_hosts[i] = args.ssh_user + "@" + self.pssh_hosts[i]
 
-    def pssh_cmd(self, cmd, add_hosts=None):
+    def pssh_cmd(self, cmd, add_hosts=None, hosts=None):
         pssh_cmd = list()
         if self.dry_run:
             pssh_cmd.append("echo")
-        pssh_cmd += ["parallel-ssh", "-i", "-t", "0", "-p", "100", "-H", self._get_hosts(add_hosts)] + cmd
+        pssh_cmd += ["parallel-ssh", "-i", "-t", "0", "-p", "100"] + ControlMaster.pssh_options()
+        pssh_cmd += ["-H", self._get_hosts(add_hosts, hosts)] + cmd
         job = Job(pssh_cmd, timeout=self.TIMEOUT)
         try:
             job.safe_run()
@@ -197,17 +341,18 @@ class PSSHAction(BaseAction):
             return ["-l", self.username]
         return []
 
-    def pssh_run(self, cmd, add_hosts=None):
+    def pssh_run(self, cmd, add_hosts=None, hosts=None):
         pssh_cmd = self._get_base_pssh_args()
         pssh_cmd.append(cmd)
-        self.pssh_cmd(pssh_cmd, add_hosts)
+        self.pssh_cmd(pssh_cmd, add_hosts, hosts)
 
     def pssh_upload(self, src, dst_dir):
         pssh_cmd = list()
         if self.dry_run:
             pssh_cmd.append("echo")
 
-        pssh_cmd += ["parallel-scp", "-t", "0", "-p", "100", "-H", self._get_hosts(), src, dst_dir]
+        pssh_cmd += ["parallel-scp", "-t", "0", "-p", "100"] + ControlMaster.pssh_options()
+        pssh_cmd += ["-H", self._get_hosts(), src, dst_dir]
         job = Job(pssh_cmd, timeout=self.TIMEOUT)
         try:
             job.safe_run()
@@ -218,6 +363,97 @@ class PSSHAction(BaseAction):
         except Exception:
             raise ErrorExit()
 
+    def _ssh_target(self, host):
+        if self.username is not None and "@" not in host:
+            return self.username + "@" + host
+        return host
+
+    def stale_hosts(self, hash_path, content_hash):
+        """Hosts where hash_path (e.g. <deploy path>/PACKAGE_HASH_FILE) does not contain content_hash"""
+        current = set()
+
+        def check(host):
+            job = Job(["ssh"] + ControlMaster.ssh_options() + [self._ssh_target(host), "cat " + shlex.quote(hash_path)],
+                      timeout=self.TIMEOUT)
+            try:
+                if job.get_output().read().decode(errors="replace").strip() == content_hash:
+                    current.add(host)
+            except JobException:
+                pass
+
+        if not self.dry_run:
+            run_parallel([(host, functools.partial(check, host)) for host in self.pssh_hosts], 100, "Check hash")
+        return [host for host in self.pssh_hosts if host not in current]
+
+    def relay_upload(self, src, dst_dir, hosts, fanout):
+        """
+        Copy src to dst_dir of hosts through a relay tree: in every round the local machine and every host which
+        already has the file send it to up to fanout other hosts, so the number of rounds grows logarithmically
+        with the number of hosts. Hosts forward over ssh with agent forwarding, so they must accept the same key.
+        A failed host is retried once, from another holder when there is one. Returns the hosts which have the file.
+        """
+        assert fanout >= 1
+        dst_path = os.path.join(dst_dir, os.path.basename(src))
+        holders = []
+        pending = list(hosts)
+        # target -> source of its failed copy, retried targets are not retried again
+        failed_from = {}
+        retried = set()
+        round_no = 0
+        while pending:
+            tasks = []
+            for source in [None] + holders:
+                batch = [target for target in pending if failed_from.get(target, "") != source][:fanout]
+                pending = [target for target in pending if target not in batch]
+                for target in batch:
+                    if source is None:
+                        cmd = ["scp"] + ControlMaster.ssh_options() + [src, self._ssh_target(target) + ":" + dst_dir]
+                    else:
+                        forward = "scp -o StrictHostKeyChecking=accept-new {} {}".format(
+                            shlex.quote(dst_path), shlex.quote(self._ssh_target(target) + ":" + dst_dir))
+                        # not multiplexed: a session in a master opened without agent forwarding drops -A,
+                        # and the forwarding host would have no key for its scp
+                        cmd = ["ssh", "-A", "-o", "ControlPath=none", self._ssh_target(source), forward]
+                    if self.dry_run:
+                        cmd = ["echo"] + cmd
+                    name = "{} -> {}".format(source or "local", target)
+                    tasks.append((source, target, name, Job(cmd, timeout=self.TIMEOUT)))
+            if not tasks:
+                # no other holder for the retried hosts: retry from the same source
+                failed_from.clear()
+                continue
+            round_no += 1
+
+            failed = []
+
+            def copy(source, target, job):
+                try:
+                    job.safe_run()
+                except Exception:
+                    failed.append((source, target))
+                    raise
+
+            try:
+                run_parallel(
+                    [(name, functools.partial(copy, source, target, job)) for source, target, name, job in tasks],
+                    len(tasks),
+                    "Upload round {}".format(round_no))
+            except Exception:
+                retry = [target for _, target in failed if target not in retried]
+                lost = [target for _, target in failed if target in retried]
+                if retry:
+                    self._logger.warning("Failed to upload %s to %s, will retry", src, " ".join(retry))
+                    failed_from.update((target, source) for source, target in failed if target in retry)
+                    retried.update(retry)
+                    pending += retry
+                if lost:
+                    self._logger.error("Failed to upload %s to %s", src, " ".join(lost))
+                    if self.fail_on_error:
+                        raise ErrorExit()
+            failed_targets = [target for _, target in failed]
+            holders += [target for _, target, _, _ in tasks if target not in failed_targets]
+        return holders
+
     def _select_hosts(self):
         if self.hosts is not None:
             # overwrite Hosts
@@ -229,8 +465,8 @@ class PSSHAction(BaseAction):
             self._logger.error("PSSH hosts list is empty. Need specify --config or/and --hosts")
             raise ErrorExit()
 
-    def _get_hosts(self, add_hosts=None):
-        hosts = self.pssh_hosts[:]
+    def _get_hosts(self, add_hosts=None, hosts=None):
+        hosts = list(self.pssh_hosts if hosts is None else hosts)
 
         if add_hosts:
             if not isinstance(add_hosts, list):
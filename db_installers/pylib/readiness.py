@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""
+Waits until every node of a started cluster serves: all nodes are probed concurrently (HTTP health endpoints,
+TCP connect to SQL/gRPC ports) with exponential backoff, and the time to ready of every node is reported.
+Times are counted from --since (epoch seconds taken before the nodes were started), so they include start and init.
+
+    start=$(date +%s.%N)
+    ... start the nodes ...
+    readiness.py --http "http://{host}:8765/" --tcp "{host}:2135" --hosts-file hosts.txt --since $start
+"""
+
+import argparse
+import functools
+import logging
+import os
+import socket
+import sys
+import time
+import urllib.error
+import urllib.request
+
+if __package__:
+    from .common import run_parallel
+else:
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/..')
+    from pylib.common import run_parallel
+
+
+logger = logging.getLogger(__name__)
+
+READY_TIMEOUT = 600
+PROBE_TIMEOUT = 2.0
+INITIAL_DELAY = 0.1
+MAX_DELAY = 5.0
+
+
+class NotReadyError(Exception):
+    """
+    times: {name: seconds to ready} of the ready nodes, not_ready: {name: probes which did not succeed}
+    """
+
+    def __init__(self, message, times=None, not_ready=None):
+        super().__init__(message)
+        self.times = times or {}
+        self.not_ready = not_ready or {}
+
+
+class HTTPProbe(object):
+    """Ready when the URL answers with 2xx (after redirects)"""
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+
+    def __call__(self, timeout):
+        try:
+            with urllib.request.urlopen(self.url, timeout=timeout) as response:
+                return 200 <= response.status < 300
+        except (urllib.error.URLError, OSError, ValueError):
+            return False
+
+    def __str__(self):
+        return self.url
+
+
+class TCPProbe(object):
+    """Ready when the port accepts connections"""
+
+    def __init__(self, host, port):
+        super().__init__()
+        self.host = host
+        self.port = int(port)
+
+    def __call__(self, timeout):
+        try:
+            with socket.create_connection((self.host, self.port), timeout=timeout):
+                return True
+        except OSError:
+            return False
+
+    def __str__(self):
+        return "tcp://{}:{}".format(self.host, self.port)
+
+
+def wait_node(name, probes, deadline, initial_delay=INITIAL_DELAY, max_delay=MAX_DELAY, probe_timeout=PROBE_TIMEOUT):
+    """Probe until all probes succeeded once, sleeping initial_delay, 2 x initial_delay, ... up to max_delay between rounds"""
+    pending = list(probes)
+    delay = initial_delay
+    while True:
+        pending = [probe for probe in pending if not probe(max(0.1, min(probe_timeout, deadline - time.monotonic())))]
+        if not pending:
+            return
+        now = time.monotonic()
+        if now >= deadline:
+            raise NotReadyError("{} is not ready: {}".format(name, ", ".join(str(probe) for probe in pending)),
+                                not_ready={name: pending})
+        time.sleep(min(delay, deadline - now))
+        delay = min(delay * 2, max_delay)
+
+
+def wait_ready(nodes, timeout=READY_TIMEOUT, initial_delay=INITIAL_DELAY, max_delay=MAX_DELAY, since=None):
+    """
+    nodes: (name, probes). Probes all nodes concurrently, returns {name: seconds to ready}.
+    since: time.time() before the nodes were started, times are counted from it (default: from the first probe).
+    Raises NotReadyError when some node is not ready within timeout seconds.
+    """
+    # probing starts after start and init: their time is added to the time to ready
+    offset = max(0.0, time.time() - since) if since is not None else 0.0
+    start = time.monotonic()
+    deadline = start + timeout
+    times = {}
+    not_ready = {}
+
+    def wait(name, probes):
+        try:
+            wait_node(name, probes, deadline, initial_delay, max_delay)
+        except NotReadyError as e:
+            not_ready.update(e.not_ready)
+            raise
+        times[name] = time.monotonic() - start + offset
+
+    try:
+        run_parallel([(name, functools.partial(wait, name, probes)) for name, probes in nodes], len(nodes), "Ready")
+    except NotReadyError:
+        message = "{} of {} nodes are not ready after {:.0f} s: {}".format(
+            len(not_ready), len({name for name, _ in nodes}), timeout,
+            "; ".join("{} ({})".format(name, ", ".join(str(probe) for probe in probes))
+                      for name, probes in sorted(not_ready.items())))
+        logger.error("%s", message)
+        raise NotReadyError(message, times, not_ready)
+    return times
+
+
+def print_ready_times(times, not_ready=None):
+    """Ready nodes by time to ready, then not ready nodes with the probes which did not succeed"""
+    not_ready = not_ready or {}
+    width = max([len("Node")] + [len(name) for name in list(times) + list(not_ready)])
+    print("{:<{w}}  {:<13}  {}".format("Node", "TimeToReady_s", "NotReady" if not_ready else "", w=width).rstrip())
+    for name, seconds in sorted(times.items(), key=lambda item: item[1]):
+        print("{:<{w}}  {:.2f}".format(name, seconds, w=width))
+    for name, probes in sorted(not_ready.items()):
+        print("{:<{w}}  {:<13}  {}".format(name, "-", ", ".join(str(probe) for probe in probes), w=width))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wait until all cluster nodes serve, report time to ready per node")
+    parser.add_argument("hosts", nargs="*", help="Nodes to probe")
+    parser.add_argument("--hosts-file", type=str, help="File with nodes to probe, one per line")
+    parser.add_argument("--http", action="append", default=[],
+                        help="URL which must answer with 2xx, {host} is replaced by the node (repeatable)")
+    parser.add_argument("--tcp", action="append", default=[],
+                        help="host:port which must accept connections, {host} is replaced by the node (repeatable)")
+    parser.add_argument("--timeout", type=float, default=READY_TIMEOUT,
+                        help="Max seconds to wait (default: {})".format(READY_TIMEOUT))
+    parser.add_argument("--max-delay", type=float, default=MAX_DELAY,
+                        help="Max seconds between probes of a node (default: {})".format(MAX_DELAY))
+    parser.add_argument("--since", type=float,
+                        help="Epoch seconds taken before the nodes were started, time to ready is counted from it "
+                             "(default: from the first probe)")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO)
+
+    hosts = list(args.hosts)
+    if args.hosts_file:
+        with open(args.hosts_file) as f:
+            hosts += [line.strip() for line in f if line.strip()]
+    if not hosts or not (args.http or args.tcp):
+        parser.error("nodes and at least one --http or --tcp probe are required")
+
+    nodes = []
+    for host in hosts:
+        probes = [HTTPProbe(url.format(host=host)) for url in args.http]
+        probes += [TCPProbe(*addr.format(host=host).rsplit(":", 1)) for addr in args.tcp]
+        nodes.append((host, probes))
+
+    try:
+        times = wait_ready(nodes, args.timeout, max_delay=args.max_delay, since=args.since)
+    except NotReadyError as e:
+        print_ready_times(e.times, e.not_ready)
+        return 1
+    print_ready_times(times)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
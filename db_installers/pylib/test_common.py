@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import stat
+import tempfile
+import unittest
+
+from common import ControlMaster, PSSHAction
+
+# Logs its arguments; like OpenSSH, a session in a multiplexed master opened without agent forwarding
+# gets no agent even with -A, so the scp on the forwarding host fails.
+FAKE_SSH = """#!/bin/bash
+echo "ssh $*" >> "{log}"
+forward_agent=
+control_path=
+while [[ "$1" == -* ]]; do
+    case "$1" in
+        -A) forward_agent=1 ;;
+        -o) shift; [[ "$1" == ControlPath=* ]] && control_path="${{1#ControlPath=}}" ;;
+    esac
+    shift
+done
+if [[ -n "$forward_agent" && -n "$control_path" && "$control_path" != none ]]; then
+    echo "Permission denied (publickey)" >&2
+    exit 1
+fi
+exit 0
+"""
+
+FAKE_SCP = """#!/bin/bash
+echo "scp $*" >> "{log}"
+exit 0
+"""
+
+
+class TestRelayUpload(unittest.TestCase):
+    def test_relay_hops_forward_agent_with_mux(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = os.path.join(tmp, "log")
+            for name, script in (("ssh", FAKE_SSH), ("scp", FAKE_SCP)):
+                path = os.path.join(tmp, name)
+                with open(path, "w") as f:
+                    f.write(script.format(log=log))
+                os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+
+            args = argparse.Namespace(dry_run=False, hosts="h1 h2 h3 h4", fail_on_error=True, username=None,
+                                      sudo_user="root")
+            action = PSSHAction(args)
+            old_path, old_enabled = os.environ["PATH"], ControlMaster.enabled
+            os.environ["PATH"] = tmp + os.pathsep + old_path
+            ControlMaster.enabled = True
+            try:
+                holders = action.relay_upload(os.path.join(tmp, "log"), "/tmp", action.pssh_hosts, 1)
+            finally:
+                os.environ["PATH"] = old_path
+                ControlMaster.enabled = old_enabled
+
+            with open(log) as f:
+                calls = f.read().splitlines()
+
+        self.assertEqual(sorted(holders), ["h1", "h2", "h3", "h4"])
+        # the local copies use the mux, the forwarding hops bypass it
+        scps = [call for call in calls if call.startswith("scp ")]
+        hops = [call for call in calls if call.startswith("ssh ")]
+        self.assertTrue(scps and all("ControlMaster=auto" in call for call in scps))
+        self.assertTrue(hops and all("-A -o ControlPath=none" in call for call in hops))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -17,6 +17,7 @@ then
 fi
 
 stop_ydb=0
+PATH_TO_SCRIPT=$(dirname "$0")
 
 while [[ $# -gt 0 ]]; do case $1 in
     --ydbd)
@@ -175,6 +176,8 @@ NODE_BROKERS=$(cat "$HOSTS_FILE" | sed "s/.*/--node-broker &:$GRPC_PORT/" | tr '
 
 log "Start static nodes"
 
+start_ts=$(date +%s.%N)
+
 $debug parallel-ssh -h "$HOSTS_FILE" -t 0 -p 20 "sudo LD_LIBRARY_PATH=$YDB_SETUP_PATH/lib bash -c ' \
     taskset -c $STATIC_TASKSET_CPU nohup \
     $YDB_SETUP_PATH/bin/ydbd server --log-level 3 --tcp --yaml-config $YDB_SETUP_PATH/cfg/config.yaml \
@@ -185,7 +188,15 @@ if [[ $? -ne 0 ]]; then
     exit 1
 fi
 
-$debug sleep 1m
+log "Wait for static nodes"
+
+$debug "$PATH_TO_SCRIPT"/../pylib/readiness.py --hosts-file "$HOSTS_FILE" \
+    --tcp "{host}:$GRPC_PORT_BEGIN" --http "http://{host}:$MON_PORT_BEGIN/" --since $start_ts
+
+if [[ $? -ne 0 ]]; then
+    echo "ERROR: static nodes are not ready"
+    exit 1
+fi
 
 for host in `cat $HOSTS_FILE`; do
     $debug ssh $host "pgrep ydbd > /dev/null"
@@ -217,6 +228,7 @@ if [[ -z "$restart_ydb" ]]; then
     fi
 fi
 
+start_ts=$(date +%s.%N)
 for ind in $(seq 0 $(($DYNNODE_COUNT-1))); do
     log "Start dynnodes: $((ind+1))"
     $debug parallel-ssh -h "$HOSTS_FILE" -t 0 -p 20 "sudo bash -c ' \
@@ -231,7 +243,20 @@ for ind in $(seq 0 $(($DYNNODE_COUNT-1))); do
         exit 1
     fi
 done
-$debug sleep 30s
+
+log "Wait for dynnodes"
+
+dynnode_probes=()
+for ind in $(seq 1 $DYNNODE_COUNT); do
+    dynnode_probes+=(--tcp "{host}:$((GRPC_PORT_BEGIN + ind))" --http "http://{host}:$((MON_PORT_BEGIN + ind))/")
+done
+
+$debug "$PATH_TO_SCRIPT"/../pylib/readiness.py --hosts-file "$HOSTS_FILE" "${dynnode_probes[@]}" --since $start_ts
+
+if [[ $? -ne 0 ]]; then
+    echo "ERROR: dynnodes are not ready"
+    exit 1
+fi
 
 if [[ -z "$debug" ]]; then
   expected_count=$((DYNNODE_COUNT+1))
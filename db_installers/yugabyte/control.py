@@ -4,6 +4,7 @@
 import argparse
 
 
+import functools
 import logging
 import os
 import pipes
@@ -13,10 +14,14 @@ MasterMemoryRatio = 0.15
 TServerMemoryRatio = 0.85
 
 if __package__:
-    from ..pylib.common import ErrorExit, SSHAction, PSSHAction, BaseAction, Hosts
+    from ..pylib.common import ErrorExit, SSHAction, PSSHAction, BaseAction, Hosts, run_parallel, ControlMaster
+    from ..pylib.common import PACKAGE_HASH_FILE, file_sha256
+    from ..pylib.readiness import HTTPProbe, NotReadyError, TCPProbe, print_ready_times, wait_ready
 else:
     sys.path.append(os.path.dirname(__file__) + '/..')
-    from pylib.common import ErrorExit, SSHAction, PSSHAction, BaseAction, Hosts
+    from pylib.common import ErrorExit, SSHAction, PSSHAction, BaseAction, Hosts, run_parallel, ControlMaster
+    from pylib.common import PACKAGE_HASH_FILE, file_sha256
+    from pylib.readiness import HTTPProbe, NotReadyError, TCPProbe, print_ready_times, wait_ready
 
 
 logger = logging.getLogger(__name__)
@@ -33,6 +38,7 @@ class Deploy(PSSHAction):
         super().__init__(args)
         self.package = args.deploy
         self.config = args.config
+        self.relay_fanout = args.relay_fanout
 
     @staticmethod
     def _get_mkdir_cmd():
@@ -44,15 +50,39 @@ class Deploy(PSSHAction):
         self._logger.info("Deploy %s", self.package)
         filename = os.path.basename(self.package)
         upload_path = os.path.join(DEPLOY_TMP_PATH, filename)
-        self._logger.info("Upload %s", self.package)
-        self.pssh_upload(self.package, DEPLOY_TMP_PATH)
 
+        if not self.relay_fanout:
+            self._logger.info("Upload %s", self.package)
+            self.pssh_upload(self.package, DEPLOY_TMP_PATH)
+
+            pssh_cmd = self._get_mkdir_cmd()
+            pssh_cmd += "; sudo -u {user} tar -xzf {src} -C {dst} --strip-components=1 | tail; rm -f {src}".format(
+                src=pipes.quote(upload_path), dst=pipes.quote(DEPLOY_PATH), user=self.sudo_user)
+            pssh_cmd += "; cd {dst}; sudo ./bin/post_install.sh".format(dst=pipes.quote(DEPLOY_PATH))
+            self._logger.info("Extract to %s", DEPLOY_PATH)
+            self.pssh_run(pssh_cmd)
+            return
+
+        package_hash = file_sha256(self.package)
+        hash_path = os.path.join(DEPLOY_PATH, PACKAGE_HASH_FILE)
+        hosts = self.stale_hosts(hash_path, package_hash)
+        self._logger.info("%d of %d hosts already have %s", len(self.pssh_hosts) - len(hosts), len(self.pssh_hosts), filename)
+        if not hosts:
+            return
+
+        self._logger.info("Upload %s to %d hosts, relay fanout %d", self.package, len(hosts), self.relay_fanout)
+        hosts = self.relay_upload(self.package, DEPLOY_TMP_PATH, hosts, self.relay_fanout)
+
+        # the hash is written after a complete extraction and post install only
         pssh_cmd = self._get_mkdir_cmd()
-        pssh_cmd += "; sudo -u {user} tar -xzf {src} -C {dst} --strip-components=1 | tail; rm -f {src}".format(
-            src=pipes.quote(upload_path), dst=pipes.quote(DEPLOY_PATH), user=self.sudo_user)
-        pssh_cmd += "; cd {dst}; sudo ./bin/post_install.sh".format(dst=pipes.quote(DEPLOY_PATH))
+        pssh_cmd += "; sudo rm -f {hash_path}; sudo -u {user} tar -xzf {src} -C {dst} --strip-components=1"
+        pssh_cmd += " && (cd {dst} && sudo ./bin/post_install.sh) && echo {hash} | sudo tee {hash_path} > /dev/null"
+        pssh_cmd += "; rm -f {src}"
+        pssh_cmd = pssh_cmd.format(
+            src=pipes.quote(upload_path), dst=pipes.quote(DEPLOY_PATH), user=self.sudo_user,
+            hash=package_hash, hash_path=pipes.quote(hash_path))
         self._logger.info("Extract to %s", DEPLOY_PATH)
-        self.pssh_run(pssh_cmd)
+        self.pssh_run(pssh_cmd, hosts=hosts)
 
 
 # actually not pssh action, but derives hosts and timeout
@@ -61,6 +91,7 @@ class Start(PSSHAction):
     def __init__(self, args):
         super().__init__(args)
         self.tservers_per_host = args.tservers_per_host
+        self.start_parallelism = args.start_parallelism
 
         if self.tservers_per_host > 1:
             disks_count = len(Disks)
@@ -175,10 +206,15 @@ class Start(PSSHAction):
         mount_dirs_str = ",".join(mount_dirs)
         store_args = "--fs_data_dirs=" + mount_dirs_str
 
+        # masters are started (concurrently) before tservers, which register in them
         master_hosts = self.get_master_hosts_listen()
+        masters = []
         for host in self.get_master_hosts():
             listen_host = LOCAL_IP.get(host, host) + ":" + str(LISTEN_PORT_MASTER)
-            self.start_master(host, store_args, listen_host, MASTER_WEBSERVER_PORT, master_hosts)
+            masters.append((
+                "master " + listen_host,
+                functools.partial(self.start_master, host, store_args, listen_host, MASTER_WEBSERVER_PORT, master_hosts)))
+        run_parallel(masters, self.start_parallelism, "Start")
 
         cores_per_instance = Cores
         memory_ratio_per_instance = TServerMemoryRatio  # default in yugabyte is 85% for tserver
@@ -187,6 +223,7 @@ class Start(PSSHAction):
             cores_per_instance = int(Cores // self.tservers_per_host)
             disks_per_instance = int(len(Disks) // self.tservers_per_host)
 
+        tservers = []
         for host in Hosts:
             if self.tservers_per_host > 1:
                 start_core = 0
@@ -211,7 +248,8 @@ class Start(PSSHAction):
                     else:
                         task_set = str(start_core) + "-" + str(end_core)
 
-                    self.start_server(
+                    tservers.append(("tserver " + listen_host, functools.partial(
+                        self.start_server,
                         host,
                         store_args,
                         listen_host,
@@ -223,7 +261,7 @@ class Start(PSSHAction):
                         cql_webserver_port=current_cql_webserver_port,
                         psql_webserver_port=current_psql_webserver_port,
                         task_set=task_set,
-                        memory_ratio=memory_ratio_per_instance)
+                        memory_ratio=memory_ratio_per_instance)))
 
                     current_server_port += 1
                     current_psql_port += 1
@@ -236,9 +274,11 @@ class Start(PSSHAction):
                     cores_reminder -= (cores_reminder > 0)
             else:
                 listen_host = LOCAL_IP.get(host, host) + ":" + str(LISTEN_PORT_SERVER)
+                task_set = None
                 if TaskSets and len(TaskSets):
                     task_set = TaskSets[0]
-                self.start_server(
+                tservers.append(("tserver " + listen_host, functools.partial(
+                    self.start_server,
                     host,
                     store_args,
                     listen_host,
@@ -250,7 +290,46 @@ class Start(PSSHAction):
                     webserver_port=SERVER_WEBSERVER_PORT,
                     cql_webserver_port=CQL_WEBSERVER_PORT,
                     psql_webserver_port=PSQL_WEBSERVER_PORT,
-                    memory_ratio=memory_ratio_per_instance)
+                    memory_ratio=memory_ratio_per_instance)))
+        run_parallel(tservers, self.start_parallelism, "Start")
+
+
+class WaitReady(BaseAction):
+
+    def __init__(self, args):
+        super().__init__(args)
+        self.tservers_per_host = args.tservers_per_host
+        self.timeout = args.ready_timeout
+        self.since = args.ready_since
+
+    def run(self):
+        super().run()
+        nodes = []
+        for host in Hosts[:3]:
+            ip = LOCAL_IP.get(host, host)
+            probes = [
+                HTTPProbe("http://{}:{}/".format(ip, MASTER_WEBSERVER_PORT)),
+                TCPProbe(ip, LISTEN_PORT_MASTER),
+            ]
+            nodes.append(("master " + ip + ":" + str(LISTEN_PORT_MASTER), probes))
+        # tserver instances of a host use consecutive ports (see Start)
+        for host in Hosts:
+            ip = LOCAL_IP.get(host, host)
+            for i in range(max(1, self.tservers_per_host)):
+                probes = [
+                    HTTPProbe("http://{}:{}/".format(ip, SERVER_WEBSERVER_PORT + i)),
+                    TCPProbe(ip, PSQL_PORT + i),
+                    TCPProbe(ip, CQL_PORT + i),
+                ]
+                nodes.append(("tserver " + ip + ":" + str(LISTEN_PORT_SERVER + i), probes))
+
+        self._logger.info("Wait for %d nodes to be ready", len(nodes))
+        try:
+            times = wait_ready(nodes, self.timeout, since=self.since)
+        except NotReadyError as e:
+            print_ready_times(e.times, e.not_ready)
+            raise ErrorExit()
+        print_ready_times(times)
 
 
 class Stop(PSSHAction):
@@ -341,6 +420,7 @@ class ReturnDeployTmpPath(BaseAction):
 # control.py -c cluster_config.py format
 # control.py -c cluster_config.py deploy
 # control.py -c cluster_config.py start
+# control.py -c cluster_config.py wait-ready
 # --dry-run
 class Main(object):
 
@@ -366,6 +446,7 @@ class Main(object):
 
         # commands
         self.add_cmd("start", Start, "start Yugabyte cluster")
+        self.add_cmd("wait-ready", WaitReady, "wait until all masters and tservers serve, report time to ready")
         self.add_cmd("stop", Stop, "stop Yugabyte cluster")
         self.add_cmd("format", Format, "format hosts")
         self.add_cmd("clean", Clean, "umount fs, etc")
@@ -382,12 +463,28 @@ class Main(object):
         self.parser.add_argument("--sudo-user", type=str, help="pssh sudo username", default="root")
         self.parser.add_argument("--fail-on-error", action="store_true", help="Abort if any subcommand failed")
         self.parser.add_argument("--dry-run", action="store_true", help="Don't execute commands")
+        self.parser.add_argument("--no-ssh-mux", action="store_true",
+                                 help="Open a new ssh connection per command instead of one multiplexed per host")
         self.parser.add_argument("--tservers-per-host", action="store", type=int, default=1, help="Number of tserver instances per host")
+        self.parser.add_argument("--ready-timeout", action="store", type=float, default=600,
+                                 help="Max seconds --wait-ready waits for the nodes (default: 600)")
+        self.parser.add_argument("--ready-since", action="store", type=float,
+                                 help="Epoch seconds taken before --start, --wait-ready counts time to ready from it "
+                                      "(default: from the first probe)")
+        self.parser.add_argument("--relay-fanout", action="store", type=int, default=0,
+                                 help="Deploy: skip hosts which already have the package (by sha256) and send it to the "
+                                      "others through a relay tree, each holder forwarding it to this many hosts "
+                                      "per round (default: 0, upload from here to all hosts)")
+        self.parser.add_argument("--start-parallelism", action="store", type=int, default=64,
+                                 help="Max instances started at once (default: 64)")
         self.args = self.parser.parse_args()
+        if self.args.relay_fanout < 0:
+            self.parser.error("--relay-fanout must be >= 0")
 
     def run(self):
         logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO)
         self.parse_args()
+        ControlMaster.enabled = not self.args.no_ssh_mux
 
         try:
             with open(self.args.config) as f:
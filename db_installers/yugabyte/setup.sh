@@ -70,13 +70,18 @@ if [[ $? -ne 0 ]]; then
     exit 1
 fi
 
+start_ts=$(date +%s.%N)
 "$PATH_TO_SCRIPT"/control.py -c $YUGABYTE_CONFIG --start --tservers-per-host $tservers_per_host
 if [[ $? -ne 0 ]]; then
     echo "Failed to start yugabyte"
     exit 1
 fi
 
-sleep 10s
+"$PATH_TO_SCRIPT"/control.py -c $YUGABYTE_CONFIG --wait-ready --ready-since $start_ts --tservers-per-host $tservers_per_host
+if [[ $? -ne 0 ]]; then
+    echo "Yugabyte nodes are not ready"
+    exit 1
+fi
 
 IFS=', ' read -r -a HOSTS_LIST <<< "$YUGABYTE_HOSTS"
 
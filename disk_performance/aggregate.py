@@ -1,35 +1,45 @@
 #!/usr/bin/env python3
 
 import argparse
+import concurrent.futures
+import csv
 import json
+import math
 import os
 import statistics
 import sys
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../common")
+from benchstats import OUTLIER_Z, bins_percentiles, merge_latency_bins, modified_z_scores, relative_median_ci
+
+
+JSON_DECODER = json.JSONDecoder()
+
 
 def parse_result(result_file, test_type):
     with open(result_file, 'r', encoding='utf-8') as f:
         raw = f.read()
 
-    # fio may prepend warnings (e.g. setaffinity) before JSON output.
+    # fio may prepend warnings (e.g. setaffinity) before JSON output; decode in place from the first '{'.
     first_obj = raw.find('{')
-    last_obj = raw.rfind('}')
-    if first_obj == -1 or last_obj == -1 or first_obj > last_obj:
+    if first_obj == -1:
         raise ValueError(f"{result_file}: JSON object boundaries not found")
 
     try:
-        json_result = json.loads(raw[first_obj:last_obj + 1])
+        json_result, _ = JSON_DECODER.raw_decode(raw, first_obj)
     except json.JSONDecodeError as exc:
         raise ValueError(f"{result_file}: malformed JSON payload ({exc})") from exc
 
     result = {
         "bw": 0,
         "iops": 0,
+        "iops_raw": 0.0,
     }
 
     # Collect percentile latencies
     percentile_keys = ['50.000000', '90.000000', '95.000000', '99.000000', '99.900000']
     percentile_sums = {k: 0 for k in percentile_keys}
+    clat_bins = []
 
     for job in json_result['jobs']:
         result['bw'] += job[test_type]['bw']
@@ -40,13 +50,22 @@ def parse_result(result_file, test_type):
         percentile = clat_ns.get('percentile', {})
         for key in percentile_keys:
             percentile_sums[key] += percentile.get(key, 0)
+        # json+ output: latency histogram, allows merging jobs
+        if 'bins' in clat_ns:
+            clat_bins.append(clat_ns['bins'])
 
     num_jobs = len(json_result['jobs'])
+    result['iops_raw'] = float(result['iops'])
     result['bw'] = int(result['bw'] / 1024)
     result['iops'] = int(result['iops'] / 1000)
 
-    # Percentiles are meaningful here only for single-job results.
-    if num_jobs == 1:
+    # Percentiles of different jobs can't be combined; their histograms (json+) can.
+    if num_jobs > 1 and len(clat_bins) == num_jobs:
+        merged = bins_percentiles(merge_latency_bins(clat_bins), [float(k) for k in percentile_keys])
+        for out_key, key in zip(['p50', 'p90', 'p95', 'p99', 'p99.9'], percentile_keys):
+            value = merged[float(key)]
+            result[out_key] = int(value / 1000) if value is not None else None
+    elif num_jobs == 1:
         result['p50'] = int(percentile_sums['50.000000'] / 1000)
         result['p90'] = int(percentile_sums['90.000000'] / 1000)
         result['p95'] = int(percentile_sums['95.000000'] / 1000)
@@ -78,17 +97,63 @@ def collect_run_dirs(results_dir):
     return [results_dir]
 
 
-def collect_result_samples(run_dirs, filename, test_type):
+def _parse_index_entry(entry):
+    run_dir, filename, test_type = entry
+    return run_dir, filename, parse_result(os.path.join(run_dir, filename), test_type)
+
+
+def build_result_index(run_dirs, specs, jobs=None):
+    """
+    Parse every existing result file of the specs in every run dir once: {(run_dir, filename): parsed}.
+    Decoding is CPU bound, so files are parsed by a process pool (jobs processes, all CPUs by default).
+    """
+    entries = []
+    for run_dir in run_dirs:
+        for _, _, filename, test_type in specs:
+            if os.path.exists(os.path.join(run_dir, filename)):
+                entries.append((run_dir, filename, test_type))
+
+    if jobs == 1 or len(entries) < 2:
+        parsed = map(_parse_index_entry, entries)
+        return {(run_dir, filename): result for run_dir, filename, result in parsed}
+
+    workers = jobs or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        parsed = pool.map(_parse_index_entry, entries, chunksize=max(1, len(entries) // (4 * workers)))
+        return {(run_dir, filename): result for run_dir, filename, result in parsed}
+
+
+def collect_result_samples(index, run_dirs, filename):
     samples = []
     for run_dir in run_dirs:
-        result_path = os.path.join(run_dir, filename)
-        if not os.path.exists(result_path):
-            continue
-        parsed = parse_result(result_path, test_type)
-        samples.append(parsed)
+        parsed = index.get((run_dir, filename))
+        if parsed is not None:
+            samples.append(parsed)
     return samples
 
 
+def pick_median_run(index, run_dirs, filename):
+    """Run dir of the run with IOPS closest to the median over runs (None without results)."""
+    runs = []
+    for run_dir in run_dirs:
+        parsed = index.get((run_dir, filename))
+        if parsed is not None:
+            runs.append((parsed["iops_raw"], run_dir))
+    if not runs:
+        return None
+    median = statistics.median(iops for iops, _ in runs)
+    return min(runs, key=lambda r: abs(r[0] - median))[1]
+
+
+def write_timeline_csv(path, series):
+    fields = ["second", "iops", "p50_us", "p99_us", "max_us"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        for values in zip(*(series[k].tolist() for k in fields)):
+            writer.writerow(["" if math.isnan(v) else f"{v:g}" for v in values])
+
+
 def metric_median(samples, key):
     values = [s[key] for s in samples if s.get(key) is not None]
     if not values:
@@ -115,6 +180,185 @@ def make_bw_stats(samples):
     }
 
 
+def make_ci_stats(samples, confidence):
+    """Relative widths of the median CI of IOPS and p99 latency over runs (None when undefined)."""
+    iops_values = [s["iops_raw"] for s in samples]
+    p99_values = [s["p99"] for s in samples if s.get("p99") is not None]
+    return {
+        "runs": len(samples),
+        "iops": relative_median_ci(iops_values, confidence),
+        "p99": relative_median_ci(p99_values, confidence),
+    }
+
+
+def is_converged(ci_stats, ci_width, min_runs, max_runs):
+    if ci_stats["runs"] >= max_runs:
+        return True
+    if ci_stats["runs"] < min_runs:
+        return False
+    return all(ci_stats[key] is not None and ci_stats[key] <= ci_width for key in ("iops", "p99"))
+
+
+def host_labels(results_dirs):
+    """(host label, results dir) pairs: directory names, full paths when names collide."""
+    labels = [os.path.basename(os.path.normpath(d)) for d in results_dirs]
+    if len(set(labels)) < len(labels):
+        labels = [os.path.normpath(d) for d in results_dirs]
+    return list(zip(labels, results_dirs))
+
+
+def mark_fleet_outliers(test_rows, metric, worse_sign, tolerance, z_threshold):
+    """Ratio to the fleet median and modified z-score of a metric; worse_sign is -1 when lower is worse."""
+    hosts = [row for row in test_rows if row[metric] is not None]
+    if not hosts:
+        return
+    fleet_median = statistics.median(row[metric] for row in hosts)
+    scores = modified_z_scores([row[metric] for row in hosts])
+    for row, z in zip(hosts, scores):
+        ratio = row[metric] / fleet_median if fleet_median else None
+        row[f"{metric}_ratio"] = ratio
+        row[f"{metric}_z"] = z
+        # far from the others (robust z-score) and by a margin that matters
+        if ratio is not None and (ratio - 1) * worse_sign > tolerance and z * worse_sign > z_threshold:
+            row["outliers"].append(metric)
+
+
+def build_fleet_rows(index, host_run_dirs, specs, tolerance, z_threshold):
+    """
+    One row per host and test: median IOPS and p99 over runs, their ratio to the fleet median (median over hosts)
+    and outlier marks: IOPS below or p99 above the fleet median by more than tolerance with |modified z| > z_threshold.
+    """
+    rows = []
+    for operation, qd, filename, _ in specs:
+        test_rows = []
+        for host, run_dirs in host_run_dirs:
+            samples = collect_result_samples(index, run_dirs, filename)
+            if not samples:
+                continue
+            p99_values = [s["p99"] for s in samples if s.get("p99") is not None]
+            test_rows.append({
+                "host": host,
+                "operation": operation,
+                "qd": qd,
+                "runs": len(samples),
+                "iops": statistics.median(s["iops_raw"] for s in samples),
+                "p99": statistics.median(p99_values) if p99_values else None,
+                "iops_ratio": None,
+                "iops_z": None,
+                "p99_ratio": None,
+                "p99_z": None,
+                "outliers": [],
+            })
+        mark_fleet_outliers(test_rows, "iops", -1, tolerance, z_threshold)
+        mark_fleet_outliers(test_rows, "p99", 1, tolerance, z_threshold)
+        rows.extend(test_rows)
+    return rows
+
+
+def build_fleet_ranking(fleet_rows):
+    """Hosts ordered worst first by the geometric mean of IOPS ratios, then of p99 ratios."""
+
+    def geomean(values):
+        values = [v for v in values if v]
+        if not values:
+            return None
+        return math.exp(sum(math.log(v) for v in values) / len(values))
+
+    by_host = {}
+    for row in fleet_rows:
+        by_host.setdefault(row["host"], []).append(row)
+
+    ranking = []
+    for host, rows in by_host.items():
+        ranking.append({
+            "host": host,
+            "tests": len(rows),
+            "iops_score": geomean([r["iops_ratio"] for r in rows]),
+            "p99_score": geomean([r["p99_ratio"] for r in rows]),
+            "outliers": sum(1 for r in rows if r["outliers"]),
+        })
+    ranking.sort(key=lambda r: (
+        r["iops_score"] if r["iops_score"] is not None else math.inf,
+        -(r["p99_score"] or 0),
+        r["host"],
+    ))
+    return ranking
+
+
+def write_fleet_csv(path, fleet_rows):
+    fields = ["host", "operation", "qd", "runs", "iops", "iops_ratio", "iops_z", "p99", "p99_ratio", "p99_z", "outliers"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for row in fleet_rows:
+            writer.writerow({**{k: row[k] for k in fields}, "outliers": " ".join(row["outliers"])})
+
+
+def print_fleet_report(fleet_rows, specs, tolerance, z_threshold):
+    summary_row_fmt = "{:<20} {:>6} {:>6} {:>12} {:>12} {:>12} {:>12}"
+    ranking_row_fmt = "{:>5} {:<24} {:>6} {:>14} {:>14} {:>9}"
+    outlier_row_fmt = "{:<24} {:<20} {:>6} {:>10} {:>10} {:>10} {:>10} {:<10}"
+
+    def fmt(v, pattern="{:.2f}"):
+        return "n/a" if v is None else pattern.format(v)
+
+    def fmt_pct(ratio):
+        return "n/a" if ratio is None else f"{(ratio - 1) * 100:+.1f}%"
+
+    header = summary_row_fmt.format("Operation", "QD", "Hosts", "IOPS med (K)", "IOPS min (K)", "p99 med us", "p99 max us")
+    print("FLEET SUMMARY (per host: median over runs)")
+    print(header)
+    for operation, qd, _, _ in specs:
+        rows = [r for r in fleet_rows if r["operation"] == operation and r["qd"] == qd]
+        if not rows:
+            continue
+        iops = [r["iops"] / 1000 for r in rows]
+        p99 = [r["p99"] for r in rows if r["p99"] is not None]
+        print("-" * len(header))
+        print(summary_row_fmt.format(
+            operation,
+            qd,
+            len(rows),
+            fmt(statistics.median(iops)),
+            fmt(min(iops)),
+            fmt(statistics.median(p99) if p99 else None, "{:.0f}"),
+            fmt(max(p99) if p99 else None, "{:.0f}"),
+        ))
+
+    print()
+    header = ranking_row_fmt.format("Rank", "Host", "Tests", "IOPS vs fleet", "p99 vs fleet", "Outliers")
+    print("FLEET RANKING (worst first, geometric mean over tests of the ratio to the fleet median)")
+    print(header)
+    for rank, row in enumerate(build_fleet_ranking(fleet_rows), start=1):
+        print("-" * len(header))
+        print(ranking_row_fmt.format(
+            rank, row["host"], row["tests"], fmt_pct(row["iops_score"]), fmt_pct(row["p99_score"]), row["outliers"]
+        ))
+
+    print()
+    header = outlier_row_fmt.format("Host", "Operation", "QD", "IOPS (K)", "vs fleet", "p99 us", "vs fleet", "Reason")
+    print(
+        f"FLEET OUTLIERS (IOPS below / p99 above the fleet median by > {tolerance * 100:g}% "
+        f"and |modified z| > {z_threshold:g})"
+    )
+    print(header)
+    outliers = [r for r in fleet_rows if r["outliers"]]
+    for row in outliers:
+        print("-" * len(header))
+        print(outlier_row_fmt.format(
+            row["host"],
+            row["operation"],
+            row["qd"],
+            fmt(row["iops"] / 1000),
+            fmt_pct(row["iops_ratio"]),
+            fmt(row["p99"], "{:.0f}"),
+            fmt_pct(row["p99_ratio"]),
+            "+".join(row["outliers"]),
+        ))
+    if not outliers:
+        print("none")
+
+
 def make_plot_slug(name):
     slug = "".join(ch.lower() if ch.isalnum() else "_" for ch in name)
     while "__" in slug:
@@ -124,7 +368,7 @@ def make_plot_slug(name):
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("results_dir", help="results directory")
+    parser.add_argument("results_dir", nargs="+", help="results directory (one per host with --fleet)")
     parser.add_argument(
         "--plot",
         action="store_true",
@@ -135,13 +379,101 @@ def main():
         default="latency_runs",
         help="Image filename prefix for --plot (default: latency_runs)",
     )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.9,
+        help="Confidence of the median CI of IOPS and p99 per test (default: 0.9)",
+    )
+    parser.add_argument(
+        "--ci-status",
+        action="store_true",
+        help=(
+            "Print only the tests that need more runs (result file names without .json), one per line: "
+            "fewer than --min-runs runs, or IOPS/p99 median CI wider than --ci-width and fewer than --max-runs runs"
+        ),
+    )
+    parser.add_argument(
+        "--ci-width",
+        type=float,
+        default=0.05,
+        help="Target median CI width relative to the median for --ci-status (default: 0.05)",
+    )
+    parser.add_argument(
+        "--min-runs",
+        type=int,
+        default=5,
+        help="Minimum runs per test for --ci-status (default: 5)",
+    )
+    parser.add_argument(
+        "--max-runs",
+        type=int,
+        default=10,
+        help="Maximum runs per test for --ci-status (default: 10)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Processes parsing the result files (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--timeline",
+        action="store_true",
+        help=(
+            "Per-second IOPS and latency of the median run of every test from fio logs (fio_device.sh --latency-log): "
+            "spread and stalls tables, the series are saved as <run dir>/<test>_timeline.csv (requires numpy)"
+        ),
+    )
+    parser.add_argument(
+        "--stall-iops-fraction",
+        type=float,
+        default=0.5,
+        help="--timeline: a second with IOPS below this fraction of the median second is a stall (default: 0.5)",
+    )
+    parser.add_argument(
+        "--stall-latency-factor",
+        type=float,
+        default=10.0,
+        help="--timeline: a second with max latency above this factor of the median second's max is a stall (default: 10)",
+    )
+    parser.add_argument(
+        "--fleet",
+        action="store_true",
+        help=(
+            "Compare the results directories of many hosts: per-test fleet summary, hosts ranked by IOPS and p99 "
+            "against the fleet median and outlier drives (only the fleet report is printed)"
+        ),
+    )
+    parser.add_argument(
+        "--fleet-tolerance",
+        type=float,
+        default=0.1,
+        help="--fleet: minimal deviation from the fleet median of an outlier, fraction (default: 0.1)",
+    )
+    parser.add_argument(
+        "--fleet-z",
+        type=float,
+        default=OUTLIER_Z,
+        help=f"--fleet: minimal |modified z-score| over hosts of an outlier (default: {OUTLIER_Z})",
+    )
+    parser.add_argument(
+        "--fleet-csv",
+        default="",
+        help="--fleet: write the per host and test dataset to this CSV file",
+    )
     args = parser.parse_args()
 
-    if not os.path.isdir(args.results_dir):
-        print(f"results dir does not exist: {args.results_dir}", file=sys.stderr)
-        return 1
+    if len(args.results_dir) > 1 and not args.fleet:
+        parser.error("several results directories require --fleet")
 
-    run_dirs = collect_run_dirs(args.results_dir)
+    for results_dir in args.results_dir:
+        if not os.path.isdir(results_dir):
+            print(f"results dir does not exist: {results_dir}", file=sys.stderr)
+            return 1
+
+    results_dir = args.results_dir[0]
+    run_dirs = collect_run_dirs(results_dir)
 
     throughput_ops = [
         ("Random read 4K", 256, "read_iops_test.json", "read"),
@@ -165,9 +497,41 @@ def main():
         "Random write 8K",
     ]
 
+    if args.fleet:
+        # results of all hosts are parsed in one pool
+        host_run_dirs = [(host, collect_run_dirs(d)) for host, d in host_labels(args.results_dir)]
+        all_run_dirs = [run_dir for _, dirs in host_run_dirs for run_dir in dirs]
+        index = build_result_index(all_run_dirs, throughput_ops + latency_ops, args.jobs)
+        fleet_rows = build_fleet_rows(
+            index, host_run_dirs, throughput_ops + latency_ops, args.fleet_tolerance, args.fleet_z
+        )
+        print_fleet_report(fleet_rows, throughput_ops + latency_ops, args.fleet_tolerance, args.fleet_z)
+        if args.fleet_csv:
+            write_fleet_csv(args.fleet_csv, fleet_rows)
+        return 0
+
+    # every report section reads the results from here
+    index = build_result_index(run_dirs, throughput_ops + latency_ops, args.jobs)
+
+    if args.ci_status:
+        for _, _, filename, _ in throughput_ops + latency_ops:
+            samples = collect_result_samples(index, run_dirs, filename)
+            ci_stats = make_ci_stats(samples, args.confidence)
+            if not is_converged(ci_stats, args.ci_width, args.min_runs, args.max_runs):
+                print(os.path.splitext(filename)[0])
+        return 0
+
     detailed_row_fmt = "{:<20} {:>8} {:>12} {:>12} {:>10} {:>10} {:>10} {:>10} {:>10}"
     latency_run_row_fmt = "{:>6} {:<20} {:>6} {:>12} {:>12} {:>10} {:>10} {:>10} {:>10} {:>10}"
     variance_row_fmt = "{:<20} {:>6} {:>10} {:>10} {:>12} {:>10}"
+    ci_row_fmt = "{:<20} {:>6} {:>6} {:>12} {:>12}"
+    timeline_row_fmt = "{:<20} {:>6} {:>6} {:>8} {:>12} {:>12} {:>12} {:>12} {:>12} {:>8}"
+    stall_row_fmt = "{:<20} {:>6} {:>6} {:>10} {:>8} {:>12} {:>12} {:<12}"
+
+    def fmt_ci(v):
+        if v is None:
+            return "n/a"
+        return f"{v * 100:.1f}"
 
     def fmt_num(v):
         if v is None:
@@ -178,8 +542,8 @@ def main():
 
     def build_detailed_table(specs):
         rows = []
-        for operation, qd, filename, test_type in specs:
-            samples = collect_result_samples(run_dirs, filename, test_type)
+        for operation, qd, filename, _ in specs:
+            samples = collect_result_samples(index, run_dirs, filename)
             rows.append({
                 "operation": operation,
                 "qd": qd,
@@ -195,8 +559,8 @@ def main():
 
     def build_variance_table(specs):
         rows = []
-        for operation, qd, filename, test_type in specs:
-            samples = collect_result_samples(run_dirs, filename, test_type)
+        for operation, qd, filename, _ in specs:
+            samples = collect_result_samples(index, run_dirs, filename)
             rows.append((operation, qd, make_bw_stats(samples)))
         return rows
 
@@ -205,13 +569,12 @@ def main():
         op_rank = {op: idx for idx, op in enumerate(latency_op_order)}
         ordered_specs = sorted(specs, key=lambda s: op_rank.get(s[0], len(op_rank)))
 
-        for operation, qd, filename, test_type in ordered_specs:
+        for operation, qd, filename, _ in ordered_specs:
             for idx, run_dir in enumerate(run_dirs, start=1):
                 run_name = os.path.basename(run_dir)
                 run_id = int(run_name) if run_name.isdigit() else idx
-                result_path = os.path.join(run_dir, filename)
-                if os.path.exists(result_path):
-                    parsed = parse_result(result_path, test_type)
+                parsed = index.get((run_dir, filename))
+                if parsed is not None:
                     row = {
                         "run": run_id,
                         "operation": operation,
@@ -275,6 +638,88 @@ def main():
                 fmt_num(stats["stddev"]),
             ))
 
+    def print_ci_table(title, specs):
+        header = ci_row_fmt.format("Operation", "QD", "Runs", "IOPS CI, %", "p99 CI, %")
+        separator = "-" * len(header)
+        print(title)
+        print(header)
+        for operation, qd, filename, _ in specs:
+            ci_stats = make_ci_stats(collect_result_samples(index, run_dirs, filename), args.confidence)
+            print(separator)
+            print(ci_row_fmt.format(
+                operation,
+                qd,
+                ci_stats["runs"],
+                fmt_ci(ci_stats["iops"]),
+                fmt_ci(ci_stats["p99"]),
+            ))
+
+    def build_timeline_rows(specs):
+        # numpy is only needed for the logs
+        from fiolog import find_stalls, load_timeline, summarize
+
+        rows = []
+        for operation, qd, filename, _ in specs:
+            run_dir = pick_median_run(index, run_dirs, filename)
+            if run_dir is None:
+                continue
+            test_name = os.path.splitext(filename)[0]
+            timeline = load_timeline(os.path.join(run_dir, test_name))
+            if timeline is None:
+                continue
+            series = timeline.series()
+            write_timeline_csv(os.path.join(run_dir, f"{test_name}_timeline.csv"), series)
+            rows.append({
+                "operation": operation,
+                "qd": qd,
+                "run": os.path.basename(run_dir),
+                "summary": summarize(series),
+                "stalls": find_stalls(series, args.stall_iops_fraction, args.stall_latency_factor),
+            })
+        return rows
+
+    def print_timeline_table(title, rows):
+        header = timeline_row_fmt.format(
+            "Operation", "QD", "Run", "Seconds", "IOPS min (K)", "IOPS med (K)", "p99 med us", "p99 max us", "max us", "Stalls"
+        )
+        separator = "-" * len(header)
+        print(title)
+        print(header)
+        for row in rows:
+            summary = row["summary"]
+            print(separator)
+            print(timeline_row_fmt.format(
+                row["operation"],
+                row["qd"],
+                row["run"],
+                summary["Seconds"],
+                fmt_num(summary["IOPSMin"] / 1000),
+                fmt_num(summary["IOPSMedian"] / 1000),
+                fmt_num(summary["P99Median_us"]),
+                fmt_num(summary["P99Max_us"]),
+                fmt_num(summary["Max_us"]),
+                len(row["stalls"]),
+            ))
+
+    def print_stalls_table(title, rows):
+        header = stall_row_fmt.format("Operation", "QD", "Run", "Start, s", "Seconds", "IOPS (K)", "max us", "Reason")
+        separator = "-" * len(header)
+        print(title)
+        print(header)
+        for row in rows:
+            for stall in row["stalls"]:
+                print(separator)
+                print(stall_row_fmt.format(
+                    row["operation"],
+                    row["qd"],
+                    row["run"],
+                    stall["StartSecond"],
+                    stall["Seconds"],
+                    fmt_num(stall["MinIOPS"] / 1000),
+                    fmt_num(stall["MaxLatency_us"]),
+                    stall["Reason"],
+                ))
+
     def print_latency_runs_table(title, rows):
         header = latency_run_row_fmt.format("Run", "Operation", "QD", "BW, MiB/s", "IOPS (K)", "p50 us", "p90 us", "p95 us", "p99 us", "p99.9 us")
         separator = "-" * len(header)
@@ -354,7 +799,7 @@ def main():
             fig.tight_layout()
 
             output_path = os.path.join(
-                args.results_dir, f"{args.prefix}_{make_plot_slug(operation)}.png"
+                results_dir, f"{args.prefix}_{make_plot_slug(operation)}.png"
             )
             fig.savefig(output_path, dpi=120)
             plt.close(fig)
@@ -372,6 +817,41 @@ def main():
     print_variance_table("THROUGHPUT RUNS VARIANCE", build_variance_table(throughput_ops))
     print()
     print_variance_table("LATENCY RUNS VARIANCE", build_variance_table(latency_ops))
+    print()
+    print_ci_table(
+        f"RUNS MEDIAN CONFIDENCE INTERVAL ({args.confidence * 100:g}%, width relative to median)",
+        throughput_ops + latency_ops,
+    )
+
+    # fio_device.sh --steady-state: rounds of preconditioning, see steady_state.py
+    steady_state_path = os.path.join(results_dir, "steady_state", "steady_state.json")
+    if os.path.exists(steady_state_path):
+        with open(steady_state_path, 'r', encoding='utf-8') as f:
+            steady_state = json.load(f)
+        print()
+        print("PRECONDITIONING STEADY STATE (SNIA PTS, 4K random write rounds)")
+        if steady_state["Steady"]:
+            print(
+                f"reached at round {steady_state['SteadyRound']}: {steady_state['WindowAverageIOPS'] / 1000:.1f} KIOPS, "
+                f"excursion {steady_state['Excursion'] * 100:.1f}%, "
+                f"slope excursion {steady_state['SlopeExcursion'] * 100:.1f}%"
+            )
+        else:
+            print(f"not reached after {steady_state['Rounds']} rounds")
+
+    if args.timeline:
+        timeline_rows = build_timeline_rows(throughput_ops + latency_ops)
+        if not timeline_rows:
+            print("timeline: no fio latency/IOPS logs found (run fio_device.sh with --latency-log)", file=sys.stderr)
+        else:
+            print()
+            print_timeline_table("PER-SECOND TIMELINE (median run, full seconds)", timeline_rows)
+            print()
+            print_stalls_table(
+                f"STALLS (IOPS < {args.stall_iops_fraction:g} x median second "
+                f"or max latency > {args.stall_latency_factor:g} x median second max)",
+                timeline_rows,
+            )
 
     if args.plot:
         try:
@@ -9,6 +9,9 @@ import statistics
 import sys
 from typing import Dict, List, Optional, Tuple
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../../common")
+from benchstats import bins_percentiles, format_knee, knee_point, merge_latency_bins, relative_median_ci
+
 
 CLAT_PERCENTILE_KEYS = {
     "ClatP50_us": "50.000000",
@@ -32,6 +35,13 @@ RESULT_FILE_RE = re.compile(
 )
 
 
+# Median CI used to report run-to-run stability and to stop adaptive runs (--ci-status).
+DEFAULT_CONFIDENCE = 0.9
+DEFAULT_CI_WIDTH = 0.05
+DEFAULT_MIN_RUNS = 5
+DEFAULT_MAX_RUNS = 10
+
+
 class FioRunFailedError(ValueError):
     """Raised when fio reports non-zero job errors in JSON output."""
 
@@ -84,45 +94,55 @@ def parse_one_result(
 
     total_bw_bytes = 0.0
     total_iops = 0.0
-
-    all_pct_keys = {**CLAT_PERCENTILE_KEYS, **LAT_PERCENTILE_KEYS}
-    pct_sum = {k: 0.0 for k in all_pct_keys}
-    pct_count = {k: 0 for k in all_pct_keys}
-
     for job in jobs:
         data = job.get(workload, {})
         total_bw_bytes += float(data.get("bw_bytes", 0.0))
         total_iops += float(data.get("iops", 0.0))
 
-        clat_percentiles = data.get("clat_ns", {}).get("percentile", {})
-        for out_key, fio_key in CLAT_PERCENTILE_KEYS.items():
-            val_ns = clat_percentiles.get(fio_key)
-            if val_ns is not None:
-                pct_sum[out_key] += float(val_ns) / 1000.0
-                pct_count[out_key] += 1
-
-        lat_percentiles = data.get("lat_ns", {}).get("percentile", {})
-        for out_key, fio_key in LAT_PERCENTILE_KEYS.items():
-            val_ns = lat_percentiles.get(fio_key)
-            if val_ns is not None:
-                pct_sum[out_key] += float(val_ns) / 1000.0
-                pct_count[out_key] += 1
-
     row = {
         "Engine": engine,
         "QueueDepth": queue_depth,
         "Workload": workload,
         "Run": run_index,
+        "Path": path,
         "Speed": human_bytes_per_second(total_bw_bytes),
         "Speed_Bps": int(total_bw_bytes),
         "IOPS": int(total_iops),
     }
-    for out_key in all_pct_keys:
-        row[out_key] = int(pct_sum[out_key] / pct_count[out_key]) if pct_count[out_key] else 0
+    for latency_key, percentile_keys in (("clat_ns", CLAT_PERCENTILE_KEYS), ("lat_ns", LAT_PERCENTILE_KEYS)):
+        row.update(job_percentiles_us([job.get(workload, {}).get(latency_key, {}) for job in jobs], percentile_keys))
 
     return row
 
 
+def job_percentiles_us(
+    latencies: List[Dict[str, object]], percentile_keys: Dict[str, str]
+) -> Dict[str, int]:
+    """
+    Percentiles (us) of clat_ns or lat_ns of all jobs, 0 when unknown.
+
+    A single job reports its percentiles. Percentiles of several jobs can't be combined (their average
+    is not a percentile of anything), so they are computed from the merged json+ histograms ("bins").
+    """
+    if len(latencies) == 1:
+        reported = latencies[0].get("percentile", {})
+        return {
+            out_key: int(float(reported[fio_key]) / 1000.0) if fio_key in reported else 0
+            for out_key, fio_key in percentile_keys.items()
+        }
+
+    histograms = [lat.get("bins") for lat in latencies]
+    if not all(histograms):
+        return {out_key: 0 for out_key in percentile_keys}
+    merged = bins_percentiles(
+        merge_latency_bins(histograms), [float(fio_key) for fio_key in percentile_keys.values()]
+    )
+    return {
+        out_key: int(merged[float(fio_key)] / 1000.0) if merged[float(fio_key)] is not None else 0
+        for out_key, fio_key in percentile_keys.items()
+    }
+
+
 def collect_rows(results_dir: str) -> Tuple[List[Dict[str, object]], List[str]]:
     rows = []
     skipped_errors: List[str] = []
@@ -162,7 +182,44 @@ def group_rows_by_point(
     return grouped
 
 
-def pick_median_run_rows(rows: List[Dict[str, object]]) -> List[Dict[str, object]]:
+def p99_field(rows: List[Dict[str, object]]) -> str:
+    # total latency when fio reported it (lat_percentiles=1), completion latency otherwise
+    return "LatP99_us" if any(row.get("LatP99_us", 0) for row in rows) else "ClatP99_us"
+
+
+def point_ci(
+    point_rows: List[Dict[str, object]], confidence: float
+) -> Tuple[Optional[float], Optional[float]]:
+    """Relative widths of the median CI of IOPS and p99 latency over the runs of a point."""
+    field = p99_field(point_rows)
+    return (
+        relative_median_ci([float(r["IOPS"]) for r in point_rows], confidence),
+        relative_median_ci([float(r[field]) for r in point_rows], confidence),
+    )
+
+
+def format_ci(width: Optional[float]) -> str:
+    return "-" if width is None else f"{width * 100.0:.1f}"
+
+
+def point_converged(
+    point_rows: List[Dict[str, object]],
+    ci_width: float,
+    confidence: float,
+    min_runs: int,
+    max_runs: int,
+) -> bool:
+    if len(point_rows) >= max_runs:
+        return True
+    if len(point_rows) < min_runs:
+        return False
+    widths = point_ci(point_rows, confidence)
+    return all(w is not None and w <= ci_width for w in widths)
+
+
+def pick_median_run_rows(
+    rows: List[Dict[str, object]], confidence: float = DEFAULT_CONFIDENCE
+) -> List[Dict[str, object]]:
     grouped = group_rows_by_point(rows)
     median_rows: List[Dict[str, object]] = []
 
@@ -182,6 +239,9 @@ def pick_median_run_rows(rows: List[Dict[str, object]]) -> List[Dict[str, object
         selected_copy = dict(selected_row)
         selected_copy["MedianRun"] = int(selected_copy["Run"])
         selected_copy["RunsInGroup"] = len(point_rows)
+        iops_ci, p99_ci = point_ci(point_rows, confidence)
+        selected_copy["IOPSCI_pct"] = format_ci(iops_ci)
+        selected_copy["P99CI_pct"] = format_ci(p99_ci)
         median_rows.append(selected_copy)
 
     median_rows.sort(
@@ -259,6 +319,159 @@ def build_max_iops_rows(rows: List[Dict[str, object]]) -> List[Dict[str, object]
     return max_rows
 
 
+KNEE_FIELDNAMES = [
+    "Engine",
+    "Workload",
+    "KneeQD",
+    "KneeQDFit",
+    "Saturated",
+    "PeakIOPS",
+    "PeakQD",
+    "FitMaxIOPS",
+    "FitHalfQD",
+    "UnloadedLatency_us",
+    "IOPSAtKnee",
+    "LatencyAtKnee_us",
+    "LittleRatioAtKnee",
+    "LittleInconsistentQD",
+]
+
+
+def build_knee_rows(rows: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """Saturation knee per engine and workload from median-run IOPS and p50 latency."""
+    has_lat = any(row.get("LatP50_us", 0) for row in rows)
+    latency_field = "LatP50_us" if has_lat else "ClatP50_us"
+
+    points: Dict[Tuple[str, str], List[Tuple[float, float, float]]] = {}
+    for row in rows:
+        key = (str(row["Engine"]), str(row["Workload"]))
+        points.setdefault(key, []).append(
+            (float(row["QueueDepth"]), float(row["IOPS"]), float(row.get(latency_field, 0)))
+        )
+
+    knee_rows: List[Dict[str, object]] = []
+    for (engine, workload), series in sorted(points.items()):
+        knee = knee_point(series)
+        if not knee:
+            continue
+        knee_rows.append({"Engine": engine, "Workload": workload, **knee})
+    return knee_rows
+
+
+def build_timeline_rows(
+    rows: List[Dict[str, object]], stall_iops_fraction: float, stall_latency_factor: float
+) -> List[Dict[str, object]]:
+    """Per-second IOPS/latency of median runs from fio logs (--latency-log); series go to <result>_timeline.csv."""
+    # numpy is only needed for the logs
+    from fiolog import find_stalls, load_timeline, summarize
+
+    timeline_rows: List[Dict[str, object]] = []
+    for row in rows:
+        log_prefix = os.path.splitext(str(row["Path"]))[0]
+        timeline = load_timeline(log_prefix)
+        if timeline is None:
+            continue
+        series = timeline.series()
+        write_timeline_csv(series, f"{log_prefix}_timeline.csv")
+        summary = summarize(series)
+        stalls = find_stalls(series, stall_iops_fraction, stall_latency_factor)
+        timeline_rows.append(
+            {
+                "Engine": row["Engine"],
+                "QueueDepth": row["QueueDepth"],
+                "Workload": row["Workload"],
+                "Run": row["Run"],
+                "Seconds": summary["Seconds"],
+                "KIOPSMin": f"{summary['IOPSMin'] / 1000:.1f}",
+                "KIOPSMedian": f"{summary['IOPSMedian'] / 1000:.1f}",
+                "P99Median_us": f"{summary['P99Median_us']:.0f}",
+                "P99Max_us": f"{summary['P99Max_us']:.0f}",
+                "Max_us": f"{summary['Max_us']:.0f}",
+                "Stalls": len(stalls),
+                "StallDetails": stalls,
+            }
+        )
+    return timeline_rows
+
+
+def write_timeline_csv(series: Dict[str, object], path: str) -> None:
+    fieldnames = ["second", "iops", "p50_us", "p99_us", "max_us"]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        for values in zip(*(series[k].tolist() for k in fieldnames)):
+            writer.writerow(["" if v != v else f"{v:g}" for v in values])
+
+
+def print_timeline_tables(timeline_rows: List[Dict[str, object]]) -> None:
+    print_table(
+        rows=timeline_rows,
+        fieldnames=[
+            "Engine",
+            "QueueDepth",
+            "Workload",
+            "Run",
+            "Seconds",
+            "KIOPSMin",
+            "KIOPSMedian",
+            "P99Median_us",
+            "P99Max_us",
+            "Max_us",
+            "Stalls",
+        ],
+    )
+    stall_rows = [
+        {
+            "Engine": row["Engine"],
+            "QueueDepth": row["QueueDepth"],
+            "Workload": row["Workload"],
+            "StartSecond": stall["StartSecond"],
+            "Seconds": stall["Seconds"],
+            "KIOPSMin": f"{stall['MinIOPS'] / 1000:.1f}",
+            "Max_us": f"{stall['MaxLatency_us']:.0f}",
+            "Reason": stall["Reason"],
+        }
+        for row in timeline_rows
+        for stall in row["StallDetails"]
+    ]
+    if stall_rows:
+        print()
+        print_table(
+            rows=stall_rows,
+            fieldnames=["Engine", "QueueDepth", "Workload", "StartSecond", "Seconds", "KIOPSMin", "Max_us", "Reason"],
+        )
+
+
+def print_knee_table(knee_rows: List[Dict[str, object]]) -> None:
+    table_rows = []
+    for knee in knee_rows:
+        knee_qd, peak_kiops, latency, little = format_knee(knee)
+        table_rows.append(
+            {
+                "Engine": knee["Engine"],
+                "Workload": knee["Workload"],
+                "KneeQD": knee_qd,
+                "PeakKIOPS": peak_kiops,
+                "P50AtKnee_us": latency,
+                "LittleRatio": little,
+            }
+        )
+    print_table(
+        rows=table_rows,
+        fieldnames=["Engine", "Workload", "KneeQD", "PeakKIOPS", "P50AtKnee_us", "LittleRatio"],
+    )
+
+
+def write_knee_csv(knee_rows: List[Dict[str, object]], path: str) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=KNEE_FIELDNAMES)
+        writer.writeheader()
+        for knee in knee_rows:
+            row = {k: knee.get(k) for k in KNEE_FIELDNAMES}
+            row["LittleInconsistentQD"] = " ".join(str(q) for q in knee["LittleInconsistentQD"])
+            writer.writerow(row)
+
+
 def build_metric_series(
     rows: List[Dict[str, object]],
     field_name: str,
@@ -603,6 +816,30 @@ def plot_latency_percentile_bars(
     return generated_paths
 
 
+def plot_latency_heatmaps(
+    rows: List[Dict[str, object]], output_dir: str, prefix: str, interval_ms: int
+) -> List[str]:
+    """Time x latency heatmaps of median runs from fio logs (--latency-log), one per engine, queue depth and workload."""
+    try:
+        import matplotlib  # noqa: F401
+    except ImportError as exc:
+        raise RuntimeError(
+            "plotting requires matplotlib (pip install matplotlib)"
+        ) from exc
+    # numpy is only needed for the logs
+    from heatmap import render_log_heatmap
+
+    generated_paths: List[str] = []
+    for row in sorted(rows, key=lambda r: (str(r["Engine"]), int(r["QueueDepth"]), str(r["Workload"]))):
+        engine, queue_depth, workload = row["Engine"], row["QueueDepth"], row["Workload"]
+        output_path = os.path.join(output_dir, f"{prefix}_heatmap_{engine}_qd{queue_depth}_{workload}.png")
+        title = f"Latency over time: {engine}, {workload}, QD {queue_depth} (run {row['Run']})"
+        log_prefix = os.path.splitext(str(row["Path"]))[0]
+        if render_log_heatmap(log_prefix, output_path, title, interval_ms):
+            generated_paths.append(output_path)
+    return generated_paths
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Aggregate aio_uring fio latency JSON results.")
     parser.add_argument("results_dir", help="Directory with fio JSON output files.")
@@ -622,6 +859,78 @@ def main() -> int:
         default="speed_inflight",
         help="Image filename prefix for --plot (default: speed_inflight).",
     )
+    parser.add_argument(
+        "--knee-csv",
+        default="",
+        help="Write saturation knee analysis (per engine and workload) to this CSV file.",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=DEFAULT_CONFIDENCE,
+        help=f"Confidence of the median CI of IOPS and p99 per point (default: {DEFAULT_CONFIDENCE}).",
+    )
+    parser.add_argument(
+        "--ci-status",
+        action="store_true",
+        help=(
+            "Print only the points that need more runs, one 'engine queue_depth workload' per line: "
+            "fewer than --min-runs runs, or IOPS/p99 median CI wider than --ci-width and fewer than --max-runs runs."
+        ),
+    )
+    parser.add_argument(
+        "--ci-width",
+        type=float,
+        default=DEFAULT_CI_WIDTH,
+        help=f"Target median CI width relative to the median for --ci-status (default: {DEFAULT_CI_WIDTH}).",
+    )
+    parser.add_argument(
+        "--min-runs",
+        type=int,
+        default=DEFAULT_MIN_RUNS,
+        help=f"Minimum runs per point for --ci-status (default: {DEFAULT_MIN_RUNS}).",
+    )
+    parser.add_argument(
+        "--max-runs",
+        type=int,
+        default=DEFAULT_MAX_RUNS,
+        help=f"Maximum runs per point for --ci-status (default: {DEFAULT_MAX_RUNS}).",
+    )
+    parser.add_argument(
+        "--timeline",
+        action="store_true",
+        help=(
+            "Per-second IOPS and latency of median runs from fio logs (fio_latency_aio_uring.sh --latency-log) "
+            "with stalls; the series are saved next to the results as <result>_timeline.csv (requires numpy)."
+        ),
+    )
+    parser.add_argument(
+        "--stall-iops-fraction",
+        type=float,
+        default=0.5,
+        help="--timeline: a second with IOPS below this fraction of the median second is a stall (default: 0.5).",
+    )
+    parser.add_argument(
+        "--stall-latency-factor",
+        type=float,
+        default=10.0,
+        help="--timeline: a second with max latency above this factor of the median second's max is a stall (default: 10).",
+    )
+    parser.add_argument(
+        "--heatmap",
+        action="store_true",
+        help=(
+            "Latency-over-time heatmaps (time x latency bucket, color - I/O count) of median runs from fio logs "
+            "(fio_latency_aio_uring.sh --latency-log), named <prefix>_heatmap_<engine>_qd<N>_<workload>.png; "
+            "unlike percentile lines they show bimodal latency, e.g. SQPOLL thread wakeups (requires numpy)."
+        ),
+    )
+    parser.add_argument(
+        "--heatmap-interval-ms",
+        type=int,
+        default=100,
+        help="--heatmap: time bucket width, ms (default: 100).",
+    )
     args = parser.parse_args()
 
     if not os.path.isdir(args.results_dir):
@@ -653,7 +962,13 @@ def main() -> int:
         print("no successful fio JSON result files found", file=sys.stderr)
         return 1
 
-    rows = pick_median_run_rows(all_rows)
+    if args.ci_status:
+        for (engine, queue_depth, workload), point_rows in sorted(group_rows_by_point(all_rows).items()):
+            if not point_converged(point_rows, args.ci_width, args.confidence, args.min_runs, args.max_runs):
+                print(f"{engine} {queue_depth} {workload}")
+        return 0
+
+    rows = pick_median_run_rows(all_rows, args.confidence)
 
     has_lat = any(row.get("LatP50_us", 0) for row in rows)
     fieldnames = [
@@ -662,6 +977,8 @@ def main() -> int:
         "Workload",
         "MedianRun",
         "RunsInGroup",
+        "IOPSCI_pct",
+        "P99CI_pct",
         "Speed",
         "IOPS",
         "ClatP50_us",
@@ -679,6 +996,8 @@ def main() -> int:
             "LatP99_9_us",
         ]
 
+    knee_rows = build_knee_rows(rows)
+
     if args.format == "csv":
         print_csv(rows, fieldnames)
     else:
@@ -687,6 +1006,26 @@ def main() -> int:
         print("Max IOPS")
         print("--------")
         print_table(rows=build_max_iops_rows(rows), fieldnames=["Engine", "QueueDepth", "KIOPS", "Speed"])
+        print()
+        print("Saturation knee (fitted max IOPS x unloaded latency, Little's law; '>=' - not saturated)")
+        print("------------------------------------------------------------------------------------------")
+        print_knee_table(knee_rows)
+
+    if args.knee_csv:
+        write_knee_csv(knee_rows, args.knee_csv)
+
+    if args.timeline:
+        timeline_rows = build_timeline_rows(rows, args.stall_iops_fraction, args.stall_latency_factor)
+        if not timeline_rows:
+            print("warning: no fio latency/IOPS logs found (run with --latency-log)", file=sys.stderr)
+        elif args.format == "table":
+            print()
+            print(
+                f"Per-second timeline of median runs (stall: IOPS < {args.stall_iops_fraction:g} x median second "
+                f"or max latency > {args.stall_latency_factor:g} x median second max)"
+            )
+            print("-" * 110)
+            print_timeline_tables(timeline_rows)
 
     # Ensure table/csv output is fully emitted before plot status lines.
     sys.stdout.flush()
@@ -731,6 +1070,17 @@ def main() -> int:
             for path in generated_paths:
                 print(f"plot: {path}")
 
+    if args.heatmap:
+        try:
+            heatmap_plots = plot_latency_heatmaps(rows, args.results_dir, args.prefix, args.heatmap_interval_ms)
+        except RuntimeError as exc:
+            print(str(exc), file=sys.stderr)
+            return 1
+        if not heatmap_plots:
+            print("warning: no fio latency logs found (run with --latency-log)", file=sys.stderr)
+        for path in heatmap_plots:
+            print(f"plot: {path}")
+
     return 0
 
 
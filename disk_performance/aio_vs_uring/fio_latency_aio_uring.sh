@@ -17,11 +17,19 @@ clocksource=cpu
 format=json
 results_dir="$(date +%Y%m%d_%H%M)_results"
 fill_disk=0
+steady_state=0
 prefix=""
 
 iodepth_from=1
 iodepth_to=128
 
+adaptive=0
+min_runs=5
+ci_width=0.05
+ci_confidence=0.9
+
+latency_log=0
+
 run_aio=0
 run_uring=0
 run_uring_iopoll=0
@@ -44,13 +52,25 @@ Options:
   --long-cooldown <time>           cooldown each elapsed hour (default: $long_cooldown)
   --run-type <smoke|normal|long>   run profile (default: $run_type)
   --fill-disk                      run preconditioning fill (default: false)
+  --steady-state                   precondition with 4K random write rounds until SNIA PTS steady state
+                                   (implies --fill-disk; rounds go to <result>_steady_state/)
   --results-dir <path>             directory for fio outputs (default: YYYYMMDD_HHMM_results)
   --run-count <n>                 number of repeated runs per test point (default: $run_count)
   --iodepth-from <n>               iodepth start (default: $iodepth_from)
   --iodepth-to <n>                 iodepth end (default: $iodepth_to)
   --clocksource <name>             fio clock source (default: $clocksource)
-  --format <fmt>                   output format for fio files (default: $format)
+  --format <fmt>                   output format for fio files (default: $format; json+ adds latency
+                                   histograms, files keep the .json extension)
   --prefix <prefix>                plot filename prefix for aggregate.py (default: empty)
+  --latency-log                    write per-I/O fio latency and IOPS logs next to the results; aggregate.py
+                                   --timeline reports per-second IOPS/latency and stalls (logs may take GBs)
+
+Adaptive runs:
+  --adaptive                       repeat a test point only until the median CI of its IOPS and p99 latency
+                                   is narrower than --ci-width; --run-count becomes the maximum (json format only)
+  --min-runs <n>                   runs of every test point before checking the CI (default: $min_runs)
+  --ci-width <fraction>            target CI width relative to the median (default: $ci_width)
+  --ci-confidence <level>          confidence of the median CI (default: $ci_confidence, needs >= 5 runs)
 
 Modes (if none selected, all are run):
   --aio                            libaio mode
@@ -119,11 +139,11 @@ function run_fio {
     local run_index="$3"
     local fio_test_name="${rw}_latency_test"
     local clock_arg="--clocksource=$clocksource"
-    local result_file="$results_dir/${mode_name}_qd${iodepth}_${rw}_run${run_index}.$format"
+    local result_file="$results_dir/${mode_name}_qd${iodepth}_${rw}_run${run_index}.$output_ext"
     local iodepth_batch_submit=1
     local iodepth_batch_complete_max=1
 
-    precondition_target "$mode_name"
+    precondition_target "$mode_name" "${result_file%.*}_steady_state"
 
     local fio_cmd=(
         sudo fio
@@ -148,6 +168,13 @@ function run_fio {
         --output="$result_file"
     )
 
+    if [[ "$latency_log" -eq 1 ]]; then
+        # <result file without .json>_lat.1.log and _iops.1.log, one line per I/O
+        fio_cmd+=(
+            --write_lat_log="${result_file%.*}" --write_iops_log="${result_file%.*}" --log_avg_msec=0
+        )
+    fi
+
     echo "-------------------------------------------------"
     echo "Running fio test: $mode_name (run $run_index/$run_count)"
     echo "ioengine=$ioengine mode_fio_args='${mode_fio_args[*]}' clock_arg='$clock_arg' bs=$block_size iodepth=$iodepth runtime=$runtime rw=$rw run_index=$run_index batch_submit=$iodepth_batch_submit batch_complete_max=$iodepth_batch_complete_max output=$result_file"
@@ -164,7 +191,7 @@ function run_fio {
 
     # Some fio modes may prepend warning lines before JSON payload.
     # Keep only the JSON object so downstream parsers see clean data.
-    if [[ "$format" == "json" && -f "$result_file" ]]; then
+    if [[ "$output_ext" == "json" && -f "$result_file" ]]; then
         awk '
             BEGIN { started = 0 }
             {
@@ -184,14 +211,17 @@ function run_fio {
 
 precondition_target() {
     local mode_label="$1"
+    local steady_state_dir="$2"
     if [[ "$fill_disk" -eq 1 ]]; then
         local script_dir fill_script
+        local fill_args=(--filename "$filename" --size-percent "$fill_size_percent")
         script_dir="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null 2>&1 && pwd )"
         fill_script="$script_dir/../precondition.sh"
+        if [[ "$steady_state" -eq 1 ]]; then
+            fill_args+=(--steady-state --steady-state-dir "$steady_state_dir")
+        fi
         echo "[$mode_label] Filling disk (preconditioning) using $fill_script..."
-        bash "$fill_script" \
-            --filename "$filename" \
-            --size-percent "$fill_size_percent"
+        bash "$fill_script" "${fill_args[@]}"
         if [[ $? -ne 0 ]]; then
             echo "[$mode_label] precondition failed"
             exit 1
@@ -295,6 +325,11 @@ while [[ "$#" -gt 0 ]]; do
             fill_disk=1
             shift
             ;;
+        --steady-state)
+            fill_disk=1
+            steady_state=1
+            shift
+            ;;
         --results-dir)
             results_dir="$2"
             shift 2
@@ -323,6 +358,26 @@ while [[ "$#" -gt 0 ]]; do
             prefix="$2"
             shift 2
             ;;
+        --adaptive)
+            adaptive=1
+            shift
+            ;;
+        --latency-log)
+            latency_log=1
+            shift
+            ;;
+        --min-runs)
+            min_runs="$2"
+            shift 2
+            ;;
+        --ci-width)
+            ci_width="$2"
+            shift 2
+            ;;
+        --ci-confidence)
+            ci_confidence="$2"
+            shift 2
+            ;;
         --aio)
             run_aio=1
             shift
@@ -404,6 +459,28 @@ if ! [[ "$run_count" =~ ^[0-9]+$ ]] || [[ "$run_count" -le 0 ]]; then
     exit 1
 fi
 
+# json+ is json with latency bins: keep the extension aggregate.py looks for.
+output_ext="${format%+}"
+
+if [[ "$adaptive" -eq 1 ]]; then
+    if ! [[ "$min_runs" =~ ^[0-9]+$ ]] || [[ "$min_runs" -le 0 ]] || [[ "$min_runs" -gt "$run_count" ]]; then
+        echo "Invalid --min-runs: $min_runs (expected positive integer <= --run-count $run_count)"
+        exit 1
+    fi
+    if ! [[ "$ci_width" =~ ^[0-9]*\.?[0-9]+$ ]]; then
+        echo "Invalid --ci-width: $ci_width (expected fraction like 0.05)"
+        exit 1
+    fi
+    if ! [[ "$ci_confidence" =~ ^0?\.[0-9]+$ ]]; then
+        echo "Invalid --ci-confidence: $ci_confidence (expected fraction like 0.9)"
+        exit 1
+    fi
+    if [[ "$output_ext" != "json" ]]; then
+        echo "--adaptive requires --format json or json+"
+        exit 1
+    fi
+fi
+
 fill_size_percent=100
 case "$run_type" in
     smoke)
@@ -495,10 +572,39 @@ if [[ "$run_uring_sqpoll_iopoll" -eq 1 ]]; then
     selected_modes+=("uring-sqpoll-iopoll")
 fi
 
+execute_run_plan() {
+    local run_entry
+    for run_entry in "${run_plan[@]}"; do
+        IFS='|' read -r mode_key iodepth rw run_idx <<< "$run_entry"
+        set_mode_context "$mode_key"
+        run_fio "$iodepth" "$rw" "$run_idx"
+
+        if (( short_cooldown_seconds > 0 )); then
+            echo "Short cooldown: sleeping for $short_cooldown"
+            sleep "$short_cooldown"
+        fi
+
+        now_epoch="$(date +%s)"
+        while (( now_epoch >= next_long_cooldown_epoch )); do
+            if (( long_cooldown_seconds > 0 )); then
+                echo "Long cooldown: sleeping for $long_cooldown"
+                sleep "$long_cooldown"
+            fi
+            next_long_cooldown_epoch=$((next_long_cooldown_epoch + long_cooldown_interval_seconds))
+        done
+    done
+}
+
+# In adaptive mode every point gets --min-runs runs first, the rest is decided by aggregate.py --ci-status.
+planned_run_count="$run_count"
+if [[ "$adaptive" -eq 1 ]]; then
+    planned_run_count="$min_runs"
+fi
+
 run_plan=()
 for (( iodepth=iodepth_from; iodepth<=iodepth_to; iodepth*=2 )); do
     for mode_key in "${selected_modes[@]}"; do
-        for (( run_idx=1; run_idx<=run_count; run_idx++ )); do
+        for (( run_idx=1; run_idx<=planned_run_count; run_idx++ )); do
             run_plan+=("${mode_key}|${iodepth}|write|${run_idx}")
         done
     done
@@ -508,29 +614,43 @@ shuffle_run_plan 11
 
 next_long_cooldown_epoch=$(( $(date +%s) + long_cooldown_interval_seconds ))
 
-for run_entry in "${run_plan[@]}"; do
-    IFS='|' read -r mode_key iodepth rw run_idx <<< "$run_entry"
-    set_mode_context "$mode_key"
-    run_fio "$iodepth" "$rw" "$run_idx"
+execute_run_plan
 
-    if (( short_cooldown_seconds > 0 )); then
-        echo "Short cooldown: sleeping for $short_cooldown"
-        sleep "$short_cooldown"
-    fi
-
-    now_epoch="$(date +%s)"
-    while (( now_epoch >= next_long_cooldown_epoch )); do
-        if (( long_cooldown_seconds > 0 )); then
-            echo "Long cooldown: sleeping for $long_cooldown"
-            sleep "$long_cooldown"
+if [[ "$adaptive" -eq 1 ]]; then
+    script_dir="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null 2>&1 && pwd )"
+    for (( round=min_runs+1; round<=run_count; round++ )); do
+        if ! pending_points="$(python3 "$script_dir/aggregate.py" "$results_dir" --ci-status \
+            --ci-width "$ci_width" --confidence "$ci_confidence" --min-runs "$min_runs" --max-runs "$run_count")"; then
+            echo "aggregate.py --ci-status failed"
+            exit 1
+        fi
+        if [[ -z "$pending_points" ]]; then
+            echo "Adaptive runs: all test points converged after $((round - 1)) rounds"
+            break
         fi
-        next_long_cooldown_epoch=$((next_long_cooldown_epoch + long_cooldown_interval_seconds))
+
+        run_plan=()
+        while read -r mode_key iodepth rw; do
+            # next free run index (failed runs keep their files)
+            run_idx=1
+            while [[ -e "$results_dir/${mode_key}_qd${iodepth}_${rw}_run${run_idx}.$output_ext" ]]; do
+                run_idx=$((run_idx + 1))
+            done
+            run_plan+=("${mode_key}|${iodepth}|${rw}|${run_idx}")
+        done <<< "$pending_points"
+
+        echo "Adaptive runs: round $round/$run_count, ${#run_plan[@]} test point(s) need more runs"
+        shuffle_run_plan $((11 + round))
+        execute_run_plan
     done
-done
+fi
 
-if [[ "$format" == "json" ]]; then
+if [[ "$output_ext" == "json" ]]; then
     script_dir="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null 2>&1 && pwd )"
     aggregate_cmd=(python3 "$script_dir/aggregate.py" "$results_dir" --format table --plot)
+    if [[ "$latency_log" -eq 1 ]]; then
+        aggregate_cmd+=(--timeline)
+    fi
     if [[ -n "$prefix" ]]; then
         aggregate_cmd+=(--prefix "$prefix")
     fi
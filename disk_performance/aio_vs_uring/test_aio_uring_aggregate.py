@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import importlib.util
+import os
+import unittest
+
+# disk_performance/aggregate.py has the same module name: load this one under its own
+_spec = importlib.util.spec_from_file_location(
+    "aio_uring_aggregate", os.path.join(os.path.dirname(os.path.abspath(__file__)), "aggregate.py")
+)
+aggregate = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(aggregate)
+
+# clat_ns of two jobs in fio json+ output; merged: 20 us x 99, 40 us x 97, 500 us x 1, 2000 us x 3
+JOB_LATENCIES = [
+    {"percentile": {"50.000000": 20000, "99.000000": 20000}, "bins": {"20000": 99, "500000": 1}},
+    {"percentile": {"50.000000": 40000, "99.000000": 2000000}, "bins": {"40000": 97, "2000000": 3}},
+]
+
+
+class TestJobPercentiles(unittest.TestCase):
+    def test_jobs_merged_from_bins(self):
+        percentiles = aggregate.job_percentiles_us(JOB_LATENCIES, aggregate.CLAT_PERCENTILE_KEYS)
+        # the average of the per-job p99 would be 1010 us
+        self.assertEqual(
+            percentiles,
+            {"ClatP50_us": 40, "ClatP90_us": 40, "ClatP95_us": 40, "ClatP99_us": 2000, "ClatP99_9_us": 2000},
+        )
+
+    def test_single_job_reported_percentiles(self):
+        percentiles = aggregate.job_percentiles_us(JOB_LATENCIES[1:], aggregate.CLAT_PERCENTILE_KEYS)
+        self.assertEqual((percentiles["ClatP50_us"], percentiles["ClatP99_us"]), (40, 2000))
+        # not reported by fio
+        self.assertEqual(percentiles["ClatP90_us"], 0)
+
+    def test_job_without_bins(self):
+        latencies = [JOB_LATENCIES[0], {"percentile": JOB_LATENCIES[1]["percentile"]}]
+        percentiles = aggregate.job_percentiles_us(latencies, aggregate.LAT_PERCENTILE_KEYS)
+        self.assertEqual(set(percentiles.values()), {0})
+        self.assertEqual(sorted(percentiles), sorted(aggregate.LAT_PERCENTILE_KEYS))
+
+
+def point_rows(iops_values, p99_us=100):
+    return [{"IOPS": iops, "ClatP99_us": p99_us, "LatP99_us": 0} for iops in iops_values]
+
+
+class TestPointConverged(unittest.TestCase):
+    def converged(self, rows, ci_width=0.05):
+        return aggregate.point_converged(rows, ci_width, 0.9, 5, 8)
+
+    def test_min_runs(self):
+        # no runs yet, and too few runs even when all are equal
+        self.assertFalse(self.converged([]))
+        self.assertFalse(self.converged(point_rows([1000] * 4)))
+        self.assertTrue(self.converged(point_rows([1000] * 5)))
+
+    def test_ci_width(self):
+        noisy = point_rows([1000, 1100, 1200, 1300, 1400])
+        self.assertFalse(self.converged(noisy))
+        self.assertTrue(self.converged(noisy, ci_width=1.0))
+        # p99 is checked too: total latency when reported, completion latency otherwise
+        rows = point_rows([1000] * 5)
+        for i, row in enumerate(rows):
+            row["LatP99_us"] = 100 * (i + 1)
+        self.assertFalse(self.converged(rows))
+
+    def test_max_runs(self):
+        self.assertFalse(self.converged(point_rows([1000, 1500] * 3 + [1000])))
+        self.assertTrue(self.converged(point_rows([1000, 1500] * 4)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,8 +14,16 @@ latency_depth=1
 
 format=json
 run_type=normal
+throughput_numjobs=1
 run_count=10
 
+adaptive=false
+min_runs=5
+ci_width=0.05
+ci_confidence=0.9
+
+latency_log=false
+
 multi_stream_seq_test_offset=100G
 
 ioengine=io_uring
@@ -24,6 +32,7 @@ use_aio=false
 
 results_dir="$(date +%Y%m%d_%H%M)_results"
 clean_device=false
+steady_state=false
 prefix=""
 
 usage() {
@@ -32,6 +41,8 @@ usage() {
     echo "  [--size-percent <size-percent>] (default: $size_percent)"
     echo "  [--results-dir <results-dir>] (default: YYYYMMDD_HHMM_results)"
     echo "  [--clean-device] (default: false; skip precondition and do blkdiscard only)"
+    echo "  [--steady-state] (default: false; precondition with 4K random write rounds until SNIA PTS steady state,"
+    echo "                   rounds are kept in <results-dir>/steady_state)"
     echo "  [--ioengine] (default $ioengine)"
     echo "  [--ioengine-args] (default: $ioengine_args)"
     echo "  [--use-aio] (default: false)"
@@ -39,8 +50,16 @@ usage() {
     echo "  [--runtime <runtime>] (default: $runtime)"
     echo "  [--run-type <smoke|normal|long>] (default: $run_type)"
     echo "  [--run-count <run-count>] (default: $run_count)"
-    echo "  [--format <format>] (default: $format)"
+    echo "  [--format <format>] (default: $format; json+ adds latency histograms, files keep the .json extension)"
+    echo "  [--throughput-numjobs <n>] (default: $throughput_numjobs; fio jobs of bandwidth and IOPS tests, json+ is used when > 1)"
     echo "  [--prefix <prefix>] (default: empty)"
+    echo "  [--adaptive] (default: false; repeat a test only until the median CI of its IOPS and p99 is"
+    echo "               narrower than --ci-width, --run-count becomes the maximum; json format only)"
+    echo "  [--min-runs <min-runs>] (default: $min_runs; runs of every test before checking the CI)"
+    echo "  [--ci-width <fraction>] (default: $ci_width; CI width relative to the median)"
+    echo "  [--ci-confidence <level>] (default: $ci_confidence; needs >= 5 runs)"
+    echo "  [--latency-log] (default: false; write per-I/O fio latency and IOPS logs next to the results,"
+    echo "                  aggregate.py --timeline reports per-second IOPS/latency and stalls; logs may take GBs)"
 }
 
 if ! which fio >/dev/null; then
@@ -61,6 +80,9 @@ while [[ "$#" > 0 ]]; do case $1 in
     --clean-device)
         clean_device=true
         ;;
+    --steady-state)
+        steady_state=true
+        ;;
     --use-aio)
         use_aio=true
         ;;
@@ -85,9 +107,27 @@ while [[ "$#" > 0 ]]; do case $1 in
     --format)
         format="$2";
         shift;;
+    --throughput-numjobs)
+        throughput_numjobs="$2";
+        shift;;
     --prefix)
         prefix="$2";
         shift;;
+    --adaptive)
+        adaptive=true
+        ;;
+    --min-runs)
+        min_runs="$2";
+        shift;;
+    --ci-width)
+        ci_width="$2";
+        shift;;
+    --ci-confidence)
+        ci_confidence="$2";
+        shift;;
+    --latency-log)
+        latency_log=true
+        ;;
     --help|-h)
         usage
         exit;;
@@ -118,6 +158,37 @@ if ! [[ "$run_count" =~ ^[1-9][0-9]*$ ]]; then
     exit 1
 fi
 
+if ! [[ "$throughput_numjobs" =~ ^[1-9][0-9]*$ ]]; then
+    echo "throughput-numjobs must be a positive integer, got: $throughput_numjobs"
+    exit 1
+fi
+
+# Percentiles of several jobs are merged from json+ latency histograms by aggregate.py.
+if (( throughput_numjobs > 1 )) && [[ "$format" == "json" ]]; then
+    format="json+"
+fi
+# json+ is json with latency bins: keep the extension aggregate.py looks for.
+output_ext="${format%+}"
+
+if [[ "$adaptive" == "true" ]]; then
+    if ! [[ "$min_runs" =~ ^[1-9][0-9]*$ ]] || (( min_runs > run_count )); then
+        echo "min-runs must be a positive integer <= run-count ($run_count), got: $min_runs"
+        exit 1
+    fi
+    if ! [[ "$ci_width" =~ ^[0-9]*\.?[0-9]+$ ]]; then
+        echo "ci-width must be a fraction like 0.05, got: $ci_width"
+        exit 1
+    fi
+    if ! [[ "$ci_confidence" =~ ^0?\.[0-9]+$ ]]; then
+        echo "ci-confidence must be a fraction like 0.9, got: $ci_confidence"
+        exit 1
+    fi
+    if [[ "$output_ext" != "json" ]]; then
+        echo "--adaptive requires --format json or json+"
+        exit 1
+    fi
+fi
+
 case "$run_type" in
     smoke)
         ramp_time=2s
@@ -223,9 +294,11 @@ if [[ "$clean_device" == "true" ]]; then
 else
     echo "Filling disk (preconditioning)..."
     script_dir="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null 2>&1 && pwd )"
-    bash "$script_dir/precondition.sh" \
-        --filename "$filename" \
-        --size-percent "$size_percent"
+    precondition_args=(--filename "$filename" --size-percent "$size_percent")
+    if [[ "$steady_state" == "true" ]]; then
+        precondition_args+=(--steady-state --steady-state-dir "$results_dir/steady_state")
+    fi
+    bash "$script_dir/precondition.sh" "${precondition_args[@]}"
     if [[ $? -ne 0 ]]; then
         echo "precondition failed"
         exit 1
@@ -234,170 +307,242 @@ fi
 
 percentile_list="10:50:90:95:99:99.9"
 
+script_dir="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null 2>&1 && pwd )"
+pending_tests=""
+
+# In adaptive mode tests with a narrow enough median CI (see aggregate.py --ci-status) are skipped.
+should_run_test() {
+    [[ "$adaptive" != "true" ]] || (( run_id <= min_runs )) || [[ " $pending_tests " == *" $1 "* ]]
+}
+
+# Per-I/O logs (log_avg_msec=0) of a test: <run dir>/<test>_lat.<job>.log and <test>_iops.<job>.log
+set_log_args() {
+    log_args=()
+    if [[ "$latency_log" == "true" ]]; then
+        log_args=(--write_lat_log="$run_results_dir/$1" --write_iops_log="$run_results_dir/$1" --log_avg_msec=0)
+    fi
+}
+
 for run_id in $(seq 1 "$run_count"); do
+  if [[ "$adaptive" == "true" ]] && (( run_id > min_runs )); then
+    if ! pending_tests="$("$script_dir/aggregate.py" "$results_dir" --ci-status \
+      --ci-width "$ci_width" --confidence "$ci_confidence" --min-runs "$min_runs" --max-runs "$run_count")"; then
+      echo "aggregate.py --ci-status failed"
+      exit 1
+    fi
+    pending_tests="$(echo $pending_tests)"
+    if [[ -z "$pending_tests" ]]; then
+      echo "All tests converged after $((run_id - 1)) iterations"
+      break
+    fi
+    echo "Tests that need more runs: $pending_tests"
+  fi
+
   echo "Running iteration $run_id/$run_count"
   run_results_dir="$results_dir/$run_id"
   mkdir -p "$run_results_dir" || exit 1
 
-  #
-  # write bandwidth test
-  #
-  echo "Running test: write_bandwidth_test"
-  sudo fio --name=write_bandwidth_test \
-    --filename="$filename" --size="${size_percent}%" \
-    --time_based --ramp_time=$ramp_time --runtime=$runtime \
-    --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
-    --bs=1M \
-    --iodepth=$bandwidth_depth \
-    --iodepth_batch_submit=$bandwidth_depth \
-    --iodepth_batch_complete_max=$bandwidth_depth \
-    --rw=write \
-    --numjobs=1 \
-    --offset_increment=$multi_stream_seq_test_offset \
-    --percentile_list=$percentile_list \
-    --output-format=$format \
-    --output="$run_results_dir/write_bandwidth_test.$format" \
-    1>/dev/null
-
-  #
-  # write IOPS test 4K
-  #
-  echo "Running test: write_iops_test_4K"
-  sudo fio --name=write_iops_test \
-    --filename="$filename" --size="${size_percent}%" \
-    --time_based --ramp_time=$ramp_time --runtime=$runtime \
-    --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
-    --bs=4K --iodepth=$iops_depth --rw=randwrite --numjobs=1 \
-    --iodepth_batch_submit=$iops_depth  --iodepth_batch_complete_max=$iops_depth \
-    --percentile_list=$percentile_list \
-    --output-format=$format \
-    --output="$run_results_dir/write_iops_test.$format" \
-    1>/dev/null
-
-  #
-  # write IOPS test 8K
-  #
-  echo "Running test: write_iops_test_8K"
-  sudo fio --name=write_iops_test \
-    --filename="$filename" --size="${size_percent}%" \
-    --time_based --ramp_time=$ramp_time --runtime=$runtime \
-    --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
-    --bs=8K --iodepth=$iops_depth --rw=randwrite --numjobs=1 \
-    --iodepth_batch_submit=$iops_depth  --iodepth_batch_complete_max=$iops_depth \
-    --percentile_list=$percentile_list \
-    --output-format=$format \
-    --output="$run_results_dir/write_iops_test_8K.$format" \
-    1>/dev/null
-
-  #
-  # write latency test 4K
-  #
-  echo "Running test: write_latency_test_4K"
-  sudo fio --name=write_latency_test \
-    --filename="$filename" --size="${size_percent}%" \
-    --time_based --ramp_time=$ramp_time --runtime=$runtime \
-    --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
-    --bs=4K --iodepth=$latency_depth --rw=randwrite --numjobs=1 --iodepth_batch_submit=$latency_depth  \
-    --iodepth_batch_complete_max=$latency_depth \
-    --percentile_list=$percentile_list \
-    --output-format=$format \
-    --output="$run_results_dir/write_latency_test.$format" \
-    1>/dev/null
-
-  #
-  # write latency test 8K
-  #
-  echo "Running test: write_latency_test_8K"
-  sudo fio --name=write_latency_test \
-    --filename="$filename" --size="${size_percent}%" \
-    --time_based --ramp_time=$ramp_time --runtime=$runtime \
-    --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
-    --bs=8K --iodepth=$latency_depth --rw=randwrite --numjobs=1 --iodepth_batch_submit=$latency_depth  \
-    --iodepth_batch_complete_max=$latency_depth \
-    --percentile_list=$percentile_list \
-    --output-format=$format \
-    --output="$run_results_dir/write_latency_test_8K.$format" \
-    1>/dev/null
-
-  #
-  # read bandwidth test
-  #
-  echo "Running test: read_bandwidth_test"
-  sudo fio --name=read_bandwidth_test \
-    --filename="$filename" --size="${size_percent}%" \
-    --time_based --ramp_time=$ramp_time --runtime=$runtime \
-    --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
-    --bs=1M --iodepth=$bandwidth_depth --rw=read --numjobs=1 --offset_increment=$multi_stream_seq_test_offset \
-    --iodepth_batch_submit=$bandwidth_depth  --iodepth_batch_complete_max=$bandwidth_depth \
-    --percentile_list=$percentile_list \
-    --output-format=$format \
-    --output="$run_results_dir/read_bandwidth_test.$format" \
-    1>/dev/null
-
-  #
-  # read IOPS test 4K
-  #
-  echo "Running test: read_iops_test_4K"
-  sudo fio --name=read_iops_test \
-    --filename="$filename" --size="${size_percent}%" \
-    --time_based --ramp_time=$ramp_time --runtime=$runtime \
-    --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
-    --bs=4K --iodepth=$iops_depth --rw=randread --numjobs=1 \
-    --iodepth_batch_submit=$iops_depth  --iodepth_batch_complete_max=$iops_depth \
-    --percentile_list=$percentile_list \
-    --output-format=$format \
-    --output="$run_results_dir/read_iops_test.$format" \
-    1>/dev/null
-
-  #
-  # read IOPS test 8K
-  #
-  echo "Running test: read_iops_test_8K"
-  sudo fio --name=read_iops_test \
-    --filename="$filename" --size="${size_percent}%" \
-    --time_based --ramp_time=$ramp_time --runtime=$runtime \
-    --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
-    --bs=8K --iodepth=$iops_depth --rw=randread --numjobs=1 \
-    --iodepth_batch_submit=$iops_depth  --iodepth_batch_complete_max=$iops_depth \
-    --percentile_list=$percentile_list \
-    --output-format=$format \
-    --output="$run_results_dir/read_iops_test_8K.$format" \
-    1>/dev/null
-
-  #
-  # read latency test 4K
-  #
-  echo "Running test: read_latency_test_4K"
-  sudo fio --name=read_latency_test \
-    --filename="$filename" --size="${size_percent}%" \
-    --time_based --ramp_time=$ramp_time --runtime=$runtime \
-    --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
-    --bs=4K --iodepth=$latency_depth --rw=randread --numjobs=1 \
-    --iodepth_batch_submit=$latency_depth  --iodepth_batch_complete_max=$latency_depth \
-    --percentile_list=$percentile_list \
-    --output-format=$format \
-    --output="$run_results_dir/read_latency_test.$format" \
-    1>/dev/null
-
-  #
-  # read latency test 8K
-  #
-  echo "Running test: read_latency_test_8K"
-  sudo fio --name=read_latency_test \
-    --filename="$filename" --size="${size_percent}%" \
-    --time_based --ramp_time=$ramp_time --runtime=$runtime \
-    --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
-    --bs=8K --iodepth=$latency_depth --rw=randread --numjobs=1 \
-    --iodepth_batch_submit=$latency_depth  --iodepth_batch_complete_max=$latency_depth \
-    --percentile_list=$percentile_list \
-    --output-format=$format \
-    --output="$run_results_dir/read_latency_test_8K.$format" \
-    1>/dev/null
+  if should_run_test write_bandwidth_test; then
+    #
+    # write bandwidth test
+    #
+    echo "Running test: write_bandwidth_test"
+    set_log_args write_bandwidth_test
+    sudo fio --name=write_bandwidth_test \
+      --filename="$filename" --size="${size_percent}%" \
+      --time_based --ramp_time=$ramp_time --runtime=$runtime \
+      --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
+      --bs=1M \
+      --iodepth=$bandwidth_depth \
+      --iodepth_batch_submit=$bandwidth_depth \
+      --iodepth_batch_complete_max=$bandwidth_depth \
+      --rw=write \
+      --numjobs=$throughput_numjobs \
+      --offset_increment=$multi_stream_seq_test_offset \
+      --percentile_list=$percentile_list \
+      "${log_args[@]}" \
+      --output-format=$format \
+      --output="$run_results_dir/write_bandwidth_test.$output_ext" \
+      1>/dev/null
+  fi
+
+  if should_run_test write_iops_test; then
+    #
+    # write IOPS test 4K
+    #
+    echo "Running test: write_iops_test_4K"
+    set_log_args write_iops_test
+    sudo fio --name=write_iops_test \
+      --filename="$filename" --size="${size_percent}%" \
+      --time_based --ramp_time=$ramp_time --runtime=$runtime \
+      --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
+      --bs=4K --iodepth=$iops_depth --rw=randwrite --numjobs=$throughput_numjobs \
+      --iodepth_batch_submit=$iops_depth  --iodepth_batch_complete_max=$iops_depth \
+      --percentile_list=$percentile_list \
+      "${log_args[@]}" \
+      --output-format=$format \
+      --output="$run_results_dir/write_iops_test.$output_ext" \
+      1>/dev/null
+  fi
+
+  if should_run_test write_iops_test_8K; then
+    #
+    # write IOPS test 8K
+    #
+    echo "Running test: write_iops_test_8K"
+    set_log_args write_iops_test_8K
+    sudo fio --name=write_iops_test \
+      --filename="$filename" --size="${size_percent}%" \
+      --time_based --ramp_time=$ramp_time --runtime=$runtime \
+      --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
+      --bs=8K --iodepth=$iops_depth --rw=randwrite --numjobs=$throughput_numjobs \
+      --iodepth_batch_submit=$iops_depth  --iodepth_batch_complete_max=$iops_depth \
+      --percentile_list=$percentile_list \
+      "${log_args[@]}" \
+      --output-format=$format \
+      --output="$run_results_dir/write_iops_test_8K.$output_ext" \
+      1>/dev/null
+  fi
+
+  if should_run_test write_latency_test; then
+    #
+    # write latency test 4K
+    #
+    echo "Running test: write_latency_test_4K"
+    set_log_args write_latency_test
+    sudo fio --name=write_latency_test \
+      --filename="$filename" --size="${size_percent}%" \
+      --time_based --ramp_time=$ramp_time --runtime=$runtime \
+      --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
+      --bs=4K --iodepth=$latency_depth --rw=randwrite --numjobs=1 --iodepth_batch_submit=$latency_depth  \
+      --iodepth_batch_complete_max=$latency_depth \
+      --percentile_list=$percentile_list \
+      "${log_args[@]}" \
+      --output-format=$format \
+      --output="$run_results_dir/write_latency_test.$output_ext" \
+      1>/dev/null
+  fi
+
+  if should_run_test write_latency_test_8K; then
+    #
+    # write latency test 8K
+    #
+    echo "Running test: write_latency_test_8K"
+    set_log_args write_latency_test_8K
+    sudo fio --name=write_latency_test \
+      --filename="$filename" --size="${size_percent}%" \
+      --time_based --ramp_time=$ramp_time --runtime=$runtime \
+      --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
+      --bs=8K --iodepth=$latency_depth --rw=randwrite --numjobs=1 --iodepth_batch_submit=$latency_depth  \
+      --iodepth_batch_complete_max=$latency_depth \
+      --percentile_list=$percentile_list \
+      "${log_args[@]}" \
+      --output-format=$format \
+      --output="$run_results_dir/write_latency_test_8K.$output_ext" \
+      1>/dev/null
+  fi
+
+  if should_run_test read_bandwidth_test; then
+    #
+    # read bandwidth test
+    #
+    echo "Running test: read_bandwidth_test"
+    set_log_args read_bandwidth_test
+    sudo fio --name=read_bandwidth_test \
+      --filename="$filename" --size="${size_percent}%" \
+      --time_based --ramp_time=$ramp_time --runtime=$runtime \
+      --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
+      --bs=1M --iodepth=$bandwidth_depth --rw=read --numjobs=$throughput_numjobs --offset_increment=$multi_stream_seq_test_offset \
+      --iodepth_batch_submit=$bandwidth_depth  --iodepth_batch_complete_max=$bandwidth_depth \
+      --percentile_list=$percentile_list \
+      "${log_args[@]}" \
+      --output-format=$format \
+      --output="$run_results_dir/read_bandwidth_test.$output_ext" \
+      1>/dev/null
+  fi
+
+  if should_run_test read_iops_test; then
+    #
+    # read IOPS test 4K
+    #
+    echo "Running test: read_iops_test_4K"
+    set_log_args read_iops_test
+    sudo fio --name=read_iops_test \
+      --filename="$filename" --size="${size_percent}%" \
+      --time_based --ramp_time=$ramp_time --runtime=$runtime \
+      --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
+      --bs=4K --iodepth=$iops_depth --rw=randread --numjobs=$throughput_numjobs \
+      --iodepth_batch_submit=$iops_depth  --iodepth_batch_complete_max=$iops_depth \
+      --percentile_list=$percentile_list \
+      "${log_args[@]}" \
+      --output-format=$format \
+      --output="$run_results_dir/read_iops_test.$output_ext" \
+      1>/dev/null
+  fi
+
+  if should_run_test read_iops_test_8K; then
+    #
+    # read IOPS test 8K
+    #
+    echo "Running test: read_iops_test_8K"
+    set_log_args read_iops_test_8K
+    sudo fio --name=read_iops_test \
+      --filename="$filename" --size="${size_percent}%" \
+      --time_based --ramp_time=$ramp_time --runtime=$runtime \
+      --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
+      --bs=8K --iodepth=$iops_depth --rw=randread --numjobs=$throughput_numjobs \
+      --iodepth_batch_submit=$iops_depth  --iodepth_batch_complete_max=$iops_depth \
+      --percentile_list=$percentile_list \
+      "${log_args[@]}" \
+      --output-format=$format \
+      --output="$run_results_dir/read_iops_test_8K.$output_ext" \
+      1>/dev/null
+  fi
+
+  if should_run_test read_latency_test; then
+    #
+    # read latency test 4K
+    #
+    echo "Running test: read_latency_test_4K"
+    set_log_args read_latency_test
+    sudo fio --name=read_latency_test \
+      --filename="$filename" --size="${size_percent}%" \
+      --time_based --ramp_time=$ramp_time --runtime=$runtime \
+      --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
+      --bs=4K --iodepth=$latency_depth --rw=randread --numjobs=1 \
+      --iodepth_batch_submit=$latency_depth  --iodepth_batch_complete_max=$latency_depth \
+      --percentile_list=$percentile_list \
+      "${log_args[@]}" \
+      --output-format=$format \
+      --output="$run_results_dir/read_latency_test.$output_ext" \
+      1>/dev/null
+  fi
+
+  if should_run_test read_latency_test_8K; then
+    #
+    # read latency test 8K
+    #
+    echo "Running test: read_latency_test_8K"
+    set_log_args read_latency_test_8K
+    sudo fio --name=read_latency_test \
+      --filename="$filename" --size="${size_percent}%" \
+      --time_based --ramp_time=$ramp_time --runtime=$runtime \
+      --ioengine=$ioengine $ioengine_args --direct=1 --verify=0 --randrepeat=0 \
+      --bs=8K --iodepth=$latency_depth --rw=randread --numjobs=1 \
+      --iodepth_batch_submit=$latency_depth  --iodepth_batch_complete_max=$latency_depth \
+      --percentile_list=$percentile_list \
+      "${log_args[@]}" \
+      --output-format=$format \
+      --output="$run_results_dir/read_latency_test_8K.$output_ext" \
+      1>/dev/null
+  fi
 done
 
-if [[ "$format" == "json" ]]; then
-    script_dir="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null 2>&1 && pwd )"
+if [[ "$output_ext" == "json" ]]; then
     aggregate_cmd=("$script_dir/aggregate.py" "$results_dir" "--plot")
+    if [[ "$latency_log" == "true" ]]; then
+        aggregate_cmd+=("--timeline")
+    fi
     if [[ -n "$prefix" ]]; then
         aggregate_cmd+=("--prefix" "$prefix")
     fi
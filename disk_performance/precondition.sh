@@ -4,6 +4,10 @@ set -u
 
 usage() {
     echo "Usage: $0 --filename <filename> [--size-percent <1-100>] [--sequential-run-count <n>] [--rand-run-count <n>] [--probes] [--fill-after-rand]"
+    echo "          [--steady-state] [--steady-state-dir <dir>] [--steady-state-round-time <time>] [--steady-state-max-rounds <n>]"
+    echo ""
+    echo "  --steady-state    instead of --rand-run-count random runs, run 4K random write rounds until IOPS reach"
+    echo "                    the SNIA PTS steady state (5-round window: range <= 20%, slope excursion <= 10% of average)"
 }
 
 size_percent=100
@@ -15,12 +19,17 @@ probe_iodepth=32
 probe_ramp_time=10s
 probe_runtime=30s
 probe_percentile_list="10:50:90:95:99:99.9"
+steady_state=0
+steady_state_dir=""
+steady_state_round_time=60s
+steady_state_max_rounds=25
+steady_state_iodepth=32
 temp_files=()
 
 cleanup_temp_files() {
     local f
     for f in "${temp_files[@]}"; do
-        [[ -n "$f" ]] && rm -f "$f"
+        [[ -n "$f" ]] && rm -rf "$f"
     done
 }
 
@@ -153,6 +162,30 @@ run_fill_test() {
     print_fill_summary "$label" "$result_file"
 }
 
+# Writes round<N>.json into $steady_state_dir
+run_steady_state_round() {
+    local round="$1"
+    local result_file="$steady_state_dir/round${round}.json"
+
+    sudo fio --name=steady_state_round \
+        --filename="$filename" \
+        "${target_size_args[@]}" \
+        --time_based --runtime="$steady_state_round_time" \
+        --ioengine=libaio --direct=1 --verify=0 --randrepeat=0 \
+        --bs=4K --iodepth="$steady_state_iodepth" --rw=randwrite --numjobs=1 \
+        --iodepth_batch_submit="$steady_state_iodepth" \
+        --iodepth_batch_complete_max="$steady_state_iodepth" \
+        --output-format=json \
+        --output="$result_file" \
+        1>/dev/null
+    if [[ $? -ne 0 ]]; then
+        echo "steady state round $round failed"
+        exit 1
+    fi
+
+    print_fill_summary "steady state round $round" "$result_file"
+}
+
 while [[ "$#" -gt 0 ]]; do
     case "$1" in
         --filename)
@@ -179,6 +212,22 @@ while [[ "$#" -gt 0 ]]; do
             fill_after_rand=1
             shift
             ;;
+        --steady-state)
+            steady_state=1
+            shift
+            ;;
+        --steady-state-dir)
+            steady_state_dir="$2"
+            shift 2
+            ;;
+        --steady-state-round-time)
+            steady_state_round_time="$2"
+            shift 2
+            ;;
+        --steady-state-max-rounds)
+            steady_state_max_rounds="$2"
+            shift 2
+            ;;
         --help|-h)
             usage
             exit 0
@@ -217,6 +266,28 @@ if ! [[ "$rand_run_count" =~ ^[1-9][0-9]*$ ]]; then
     exit 1
 fi
 
+if ! [[ "$steady_state_max_rounds" =~ ^[1-9][0-9]*$ ]]; then
+    echo "steady-state-max-rounds must be a positive integer, got: $steady_state_max_rounds"
+    exit 1
+fi
+
+if ! [[ "$steady_state_round_time" =~ ^[0-9]+[smhd]$ ]]; then
+    echo "invalid --steady-state-round-time: $steady_state_round_time (expected like 30s, 1m)"
+    exit 1
+fi
+
+if [[ "$steady_state" -eq 1 ]]; then
+    if [[ -z "$steady_state_dir" ]]; then
+        steady_state_dir="$(mktemp -d ./.precondition_steady_state_XXXXXX)" || exit 1
+        temp_files+=("$steady_state_dir")
+    elif [[ -n "$(ls -A "$steady_state_dir" 2>/dev/null)" ]]; then
+        echo "steady state dir '$steady_state_dir' is not empty; refusing to mix rounds"
+        exit 1
+    else
+        mkdir -p "$steady_state_dir" || exit 1
+    fi
+fi
+
 # Precondition/probe over a selected portion of target size.
 target_size_args=(--size="${size_percent}%")
 
@@ -245,14 +316,36 @@ for run_idx in $(seq 1 "$sequential_run_count"); do
     run_fill_test "seq_fill" "write" "1M" "32" "seq_fill run $run_idx (${size_percent}% of target)"
 done
 
-for run_idx in $(seq 1 "$rand_run_count"); do
-    echo "Random preconditioning run $run_idx/$rand_run_count (${size_percent}% of target)"
-    run_fill_test "rand_precondition" "randwrite" "8K" "32" "rand_precondition run $run_idx (${size_percent}% of target)"
-    if [[ "$fill_after_rand" -eq 1 ]]; then
-        run_fill_test "seq_fill_after_rand" "write" "1M" "32" "seq_fill after rand run $run_idx (${size_percent}% of target)"
+if [[ "$steady_state" -eq 1 ]]; then
+    script_dir="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null 2>&1 && pwd )"
+    steady_state_rc=2
+    for round in $(seq 1 "$steady_state_max_rounds"); do
+        echo "Steady state round $round/$steady_state_max_rounds (4K randwrite, ${steady_state_round_time})"
+        run_steady_state_round "$round"
+        python3 "$script_dir/steady_state.py" "$steady_state_dir" --summary "$steady_state_dir/steady_state.json"
+        steady_state_rc=$?
+        if [[ "$steady_state_rc" -ne 2 ]]; then
+            break
+        fi
+    done
+    if [[ "$steady_state_rc" -eq 1 ]]; then
+        echo "steady state check failed"
+        exit 1
+    elif [[ "$steady_state_rc" -eq 2 ]]; then
+        echo "Steady state not reached after $steady_state_max_rounds rounds, continuing anyway"
     fi
     if [[ "$enable_probes" -eq 1 ]]; then
-        run_probe_test "Probe after random preconditioning run $run_idx"
+        run_probe_test "Probe after steady state rounds"
     fi
-done
-
+else
+    for run_idx in $(seq 1 "$rand_run_count"); do
+        echo "Random preconditioning run $run_idx/$rand_run_count (${size_percent}% of target)"
+        run_fill_test "rand_precondition" "randwrite" "8K" "32" "rand_precondition run $run_idx (${size_percent}% of target)"
+        if [[ "$fill_after_rand" -eq 1 ]]; then
+            run_fill_test "seq_fill_after_rand" "write" "1M" "32" "seq_fill after rand run $run_idx (${size_percent}% of target)"
+        fi
+        if [[ "$enable_probes" -eq 1 ]]; then
+            run_probe_test "Probe after random preconditioning run $run_idx"
+        fi
+    done
+fi
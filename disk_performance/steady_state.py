@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import re
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../common")
+from benchstats import (
+    STEADY_STATE_MAX_EXCURSION,
+    STEADY_STATE_MAX_SLOPE_EXCURSION,
+    STEADY_STATE_WINDOW,
+    steady_state,
+)
+
+ROUND_FILE_RE = re.compile(r"^round(\d+)\.json$")
+
+# exit codes for precondition.sh
+EXIT_STEADY = 0
+EXIT_ERROR = 1
+EXIT_NOT_STEADY = 2
+
+
+def parse_round_iops(round_file):
+    with open(round_file, 'r', encoding='utf-8') as f:
+        raw = f.read()
+
+    # fio may prepend warnings (e.g. setaffinity) before JSON output.
+    first_obj = raw.find('{')
+    if first_obj == -1:
+        raise ValueError(f"{round_file}: JSON object not found")
+    try:
+        json_result = json.loads(raw[first_obj:])
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"{round_file}: malformed JSON payload ({exc})") from exc
+
+    jobs = json_result.get('jobs', [])
+    if not jobs:
+        raise ValueError(f"{round_file}: no jobs in fio output")
+    return sum(float(job['write']['iops']) for job in jobs)
+
+
+def collect_rounds(rounds_dir):
+    rounds = []
+    for name in os.listdir(rounds_dir):
+        m = ROUND_FILE_RE.match(name)
+        if m:
+            rounds.append((int(m.group(1)), parse_round_iops(os.path.join(rounds_dir, name))))
+    rounds.sort()
+    return [iops for _, iops in rounds]
+
+
+def find_steady_state(iops, window, max_excursion, max_slope_excursion):
+    """First round (1-based) at which the window ending there is steady, with its check; (None, last check) otherwise."""
+    state = None
+    for rounds in range(window, len(iops) + 1):
+        state = steady_state(iops[:rounds], window, max_excursion, max_slope_excursion)
+        if state["Steady"]:
+            return rounds, state
+    return None, state
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "SNIA PTS steady state check of preconditioning rounds (roundN.json fio results of the tracking "
+            "workload, e.g. 4K random write): exit code 0 when steady, 2 when more rounds are needed"
+        )
+    )
+    parser.add_argument("rounds_dir", help="directory with round1.json, round2.json, ...")
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=STEADY_STATE_WINDOW,
+        help=f"Measurement window, rounds (default: {STEADY_STATE_WINDOW})",
+    )
+    parser.add_argument(
+        "--max-excursion",
+        type=float,
+        default=STEADY_STATE_MAX_EXCURSION,
+        help=f"Max IOPS range in the window relative to its average (default: {STEADY_STATE_MAX_EXCURSION})",
+    )
+    parser.add_argument(
+        "--max-slope-excursion",
+        type=float,
+        default=STEADY_STATE_MAX_SLOPE_EXCURSION,
+        help=(
+            "Max change of the IOPS linear fit across the window relative to its average "
+            f"(default: {STEADY_STATE_MAX_SLOPE_EXCURSION})"
+        ),
+    )
+    parser.add_argument(
+        "--summary",
+        default="",
+        help="Write the rounds and the result to this JSON file",
+    )
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.rounds_dir):
+        print(f"rounds dir does not exist: {args.rounds_dir}", file=sys.stderr)
+        return EXIT_ERROR
+
+    try:
+        iops = collect_rounds(args.rounds_dir)
+    except (OSError, KeyError, ValueError) as exc:
+        print(f"failed to parse rounds: {exc}", file=sys.stderr)
+        return EXIT_ERROR
+
+    steady_round, state = find_steady_state(iops, args.window, args.max_excursion, args.max_slope_excursion)
+
+    iops_txt = " ".join(f"{v / 1000:.1f}" for v in iops)
+    print(f"steady state: rounds={len(iops)} KIOPS=[{iops_txt}]")
+    if state is None:
+        print(f"steady state: not enough rounds for the {args.window}-round window")
+    else:
+        status = f"reached at round {steady_round}" if steady_round else "not reached"
+        print(
+            f"steady state: {status}, window average {state['Average'] / 1000:.1f} KIOPS, "
+            f"excursion {state['Excursion'] * 100:.1f}% (max {args.max_excursion * 100:g}%), "
+            f"slope excursion {state['SlopeExcursion'] * 100:.1f}% (max {args.max_slope_excursion * 100:g}%)"
+        )
+
+    if args.summary:
+        summary = {
+            "Window": args.window,
+            "MaxExcursion": args.max_excursion,
+            "MaxSlopeExcursion": args.max_slope_excursion,
+            "Rounds": len(iops),
+            "IOPS": iops,
+            "Steady": steady_round is not None,
+            "SteadyRound": steady_round,
+            "WindowAverageIOPS": state["Average"] if state else None,
+            "Excursion": state["Excursion"] if state else None,
+            "SlopeExcursion": state["SlopeExcursion"] if state else None,
+        }
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+            f.write("\n")
+
+    return EXIT_STEADY if steady_round else EXIT_NOT_STEADY
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
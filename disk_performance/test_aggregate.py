@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+import contextlib
+import csv
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from aggregate import build_fleet_ranking, is_converged, main, mark_fleet_outliers, parse_result, write_fleet_csv
+
+# fio json+ output of two jobs; merged: 20 us x 99, 40 us x 97, 500 us x 1, 2000 us x 3
+JOB_BINS = ({"20000": 99, "500000": 1}, {"40000": 97, "2000000": 3})
+JOB_PERCENTILES = (
+    {"50.000000": 20000, "90.000000": 20000, "95.000000": 20000, "99.000000": 20000, "99.900000": 500000},
+    {"50.000000": 40000, "90.000000": 40000, "95.000000": 40000, "99.000000": 2000000, "99.900000": 2000000},
+)
+
+
+def fio_json(test_type, bins=JOB_BINS, percentiles=JOB_PERCENTILES, iops=1000.0):
+    jobs = []
+    for job_bins, job_percentiles in zip(bins, percentiles):
+        clat_ns = {"percentile": job_percentiles}
+        if job_bins is not None:
+            clat_ns["bins"] = job_bins
+        jobs.append({test_type: {"bw": 4096, "iops": iops, "clat_ns": clat_ns}})
+    return {"jobs": jobs}
+
+
+def write_result(path, payload):
+    with open(path, "w", encoding="utf-8") as f:
+        # fio may print warnings before the JSON
+        f.write("fio: setaffinity warning\n")
+        json.dump(payload, f)
+
+
+class TestParseResult(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "read_latency_test.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_jobs_merged_from_bins(self):
+        write_result(self.path, fio_json("read"))
+        result = parse_result(self.path, "read")
+        self.assertEqual((result["iops_raw"], result["iops"], result["bw"]), (2000.0, 2, 8))
+        self.assertEqual((result["p50"], result["p90"], result["p95"]), (40, 40, 40))
+        # the average of the per-job p99 would be 1010 us
+        self.assertEqual(result["p99"], 2000)
+        self.assertEqual(result["p99.9"], 2000)
+
+    def test_single_job_reported_percentiles(self):
+        write_result(self.path, fio_json("write", bins=JOB_BINS[1:], percentiles=JOB_PERCENTILES[1:]))
+        result = parse_result(self.path, "write")
+        self.assertEqual((result["p50"], result["p99"]), (40, 2000))
+
+    def test_job_without_bins(self):
+        # plain json output of one job: percentiles of several jobs can't be combined
+        write_result(self.path, fio_json("read", bins=(JOB_BINS[0], None)))
+        result = parse_result(self.path, "read")
+        self.assertEqual(result["iops_raw"], 2000.0)
+        self.assertEqual([result[key] for key in ("p50", "p90", "p95", "p99", "p99.9")], [None] * 5)
+
+
+class TestCIStatus(unittest.TestCase):
+    def test_is_converged(self):
+        narrow = {"runs": 5, "iops": 0.01, "p99": 0.02}
+        self.assertTrue(is_converged(narrow, 0.05, 5, 10))
+        # too few runs, whatever the CI
+        self.assertFalse(is_converged({**narrow, "runs": 4}, 0.05, 5, 10))
+        self.assertFalse(is_converged({**narrow, "runs": 0, "iops": None, "p99": None}, 0.05, 5, 10))
+        # CI wider than the target or undefined
+        self.assertFalse(is_converged({**narrow, "p99": 0.06}, 0.05, 5, 10))
+        self.assertFalse(is_converged({**narrow, "iops": None}, 0.05, 5, 10))
+        # enough runs, whatever the CI
+        self.assertTrue(is_converged({**narrow, "runs": 10, "iops": 0.5, "p99": None}, 0.05, 5, 10))
+
+    def ci_status(self, results_dir, *args):
+        out = io.StringIO()
+        argv = ["aggregate.py", results_dir, "--ci-status", "--jobs", "1", "--min-runs", "5", "--max-runs", "8"]
+        with mock.patch.object(sys, "argv", argv + list(args)), contextlib.redirect_stdout(out):
+            self.assertEqual(main(), 0)
+        return out.getvalue().split()
+
+    def test_ci_status(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            # no runs yet: every test needs runs
+            all_tests = self.ci_status(tmp)
+            self.assertEqual(len(all_tests), 10)
+            self.assertIn("read_latency_test", all_tests)
+
+            for run in range(1, 9):
+                run_dir = os.path.join(tmp, str(run))
+                os.mkdir(run_dir)
+                if run <= 5:
+                    # stable
+                    write_result(os.path.join(run_dir, "read_latency_test.json"),
+                                 fio_json("read", bins=JOB_BINS[:1], percentiles=JOB_PERCENTILES[:1]))
+                    # IOPS off by up to 40% between runs
+                    write_result(os.path.join(run_dir, "write_latency_test.json"),
+                                 fio_json("write", bins=JOB_BINS[:1], percentiles=JOB_PERCENTILES[:1],
+                                          iops=1000.0 * (1 + 0.1 * run)))
+                if run <= 4:
+                    write_result(os.path.join(run_dir, "read_iops_test.json"),
+                                 fio_json("read", bins=JOB_BINS[:1], percentiles=JOB_PERCENTILES[:1]))
+                # noisy, but at --max-runs
+                write_result(os.path.join(run_dir, "write_iops_test.json"),
+                             fio_json("write", bins=JOB_BINS[:1], percentiles=JOB_PERCENTILES[:1],
+                                      iops=1000.0 * (1 + 0.1 * run)))
+
+            pending = self.ci_status(tmp)
+            self.assertNotIn("read_latency_test", pending)
+            self.assertIn("write_latency_test", pending)
+            self.assertIn("read_iops_test", pending)
+            self.assertNotIn("write_iops_test", pending)
+            self.assertEqual(len(pending), 8)
+            # a wide enough target accepts the noisy test
+            self.assertNotIn("write_latency_test", self.ci_status(tmp, "--ci-width", "1.0"))
+
+
+def fleet_row(host, iops, p99):
+    return {"host": host, "operation": "Random read 4K", "qd": 256, "runs": 3, "iops": iops, "p99": p99,
+            "iops_ratio": None, "iops_z": None, "p99_ratio": None, "p99_z": None, "outliers": []}
+
+
+class TestFleet(unittest.TestCase):
+    def outliers(self, rows):
+        return {row["host"]: row["outliers"] for row in rows if row["outliers"]}
+
+    def test_worse_sign(self):
+        values = [100, 101, 99, 102, 98, 60, 140]
+        rows = [fleet_row(f"h{i}", v, v) for i, v in enumerate(values)]
+        # lower IOPS is worse, higher p99 is worse: the other extreme is not an outlier
+        mark_fleet_outliers(rows, "iops", -1, 0.1, 3.5)
+        mark_fleet_outliers(rows, "p99", 1, 0.1, 3.5)
+        self.assertEqual(self.outliers(rows), {"h5": ["iops"], "h6": ["p99"]})
+        self.assertAlmostEqual(rows[5]["iops_ratio"], 0.6)
+        self.assertAlmostEqual(rows[5]["iops_z"], 0.6745 * -40 / 2)
+
+    def test_tolerance(self):
+        # far from the others by z-score, but within 10% of the fleet median
+        rows = [fleet_row(f"h{i}", v, None) for i, v in enumerate([100, 100.1, 99.9, 100, 100, 95])]
+        mark_fleet_outliers(rows, "iops", -1, 0.1, 3.5)
+        self.assertLess(rows[5]["iops_z"], -3.5)
+        self.assertEqual(self.outliers(rows), {})
+        # rows without the metric are skipped
+        mark_fleet_outliers(rows, "p99", 1, 0.1, 3.5)
+        self.assertIsNone(rows[0]["p99_ratio"])
+
+    def test_zero_mad(self):
+        rows = [fleet_row(f"h{i}", v, 500) for i, v in enumerate([100, 100, 100, 100, 50, 95])]
+        mark_fleet_outliers(rows, "iops", -1, 0.1, 3.5)
+        mark_fleet_outliers(rows, "p99", 1, 0.1, 3.5)
+        self.assertEqual(rows[4]["iops_z"], -math.inf)
+        self.assertEqual(rows[5]["iops_z"], -math.inf)
+        self.assertEqual(rows[0]["iops_z"], 0.0)
+        self.assertEqual(self.outliers(rows), {"h4": ["iops"]})
+
+    def test_ranking_and_csv(self):
+        rows = [fleet_row(f"h{i}", v, 1000 / v) for i, v in enumerate([100, 101, 99, 102, 98, 60])]
+        mark_fleet_outliers(rows, "iops", -1, 0.1, 3.5)
+        mark_fleet_outliers(rows, "p99", 1, 0.1, 3.5)
+        ranking = build_fleet_ranking(rows)
+        self.assertEqual([r["host"] for r in ranking], ["h5", "h4", "h2", "h0", "h1", "h3"])
+        self.assertEqual(ranking[0]["outliers"], 1)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "fleet.csv")
+            write_fleet_csv(path, rows)
+            with open(path, newline="", encoding="utf-8") as f:
+                csv_rows = list(csv.DictReader(f))
+        self.assertEqual(len(csv_rows), 6)
+        self.assertEqual(csv_rows[5]["outliers"], "iops p99")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,331 +1,68 @@
 #!/usr/bin/env python3
 
 import argparse
-import json
+import concurrent.futures
 import math
 import os
-import re
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Set, Tuple
 
+from results import StressResults, load_results, merge_results
 
-def _parse_float(s: Any) -> float:
-    if s is None:
-        return float("nan")
-    if isinstance(s, (int, float)):
-        return float(s)
-    s = str(s).strip()
-    if s == "":
-        return float("nan")
-    return float(s)
+# Figures in the order of output, names are suffixes of output files (see --only).
+FIGURES = (
+    "speed",
+    "speed_qd1_8",
+    "iops",
+    "iops_qd1_8",
+    "latency",
+    "latency_bars_qd_1_4_16",
+)
 
 
-_BW_RE = re.compile(r"^\s*([0-9]+(?:\.[0-9]+)?)\s*([A-Za-z]+/s)\s*$")
-_LAT_RE = re.compile(r"^\s*([0-9]+(?:\.[0-9]+)?)\s*(us|µs|ms|ns|s)\s*$", flags=re.IGNORECASE)
-
-
-def _bandwidth_to_mbs(s: Any) -> float:
-    """
-    Convert strings like '205.3 MB/s' to MB/s float.
-    Supports: B/s, KB/s, MB/s, GB/s, KiB/s, MiB/s, GiB/s.
-    """
-    if s is None:
-        return float("nan")
-    if isinstance(s, (int, float)):
-        # Assume already MB/s.
-        return float(s)
-    raw = str(s).strip()
-    if raw == "":
-        return float("nan")
-
-    m = _BW_RE.match(raw)
-    if not m:
-        raise ValueError(f"Unrecognized bandwidth value: {raw!r}")
-    val = float(m.group(1))
-    unit = m.group(2)
-
-    # Convert to bytes/sec first, then MB/s (10^6).
-    if unit == "B/s":
-        bps = val
-    elif unit == "KB/s":
-        bps = val * 1_000
-    elif unit == "MB/s":
-        bps = val * 1_000_000
-    elif unit == "GB/s":
-        bps = val * 1_000_000_000
-    elif unit == "KiB/s":
-        bps = val * 1024
-    elif unit == "MiB/s":
-        bps = val * 1024**2
-    elif unit == "GiB/s":
-        bps = val * 1024**3
-    else:
-        raise ValueError(f"Unsupported bandwidth unit: {unit!r} (value={raw!r})")
-
-    return bps / 1_000_000.0
-
-
-def _latency_to_us(s: Any) -> float:
-    """
-    Convert latency values (us/ms/ns/s) to float microseconds.
-    """
-    if s is None:
-        return float("nan")
-    if isinstance(s, (int, float)):
-        return float(s)
-    raw = str(s).strip()
-    if raw == "":
-        return float("nan")
-    m = _LAT_RE.match(raw)
-    if not m:
-        raise ValueError(f"Unrecognized latency value: {raw!r}")
-    val = float(m.group(1))
-    unit = m.group(2).lower()
-    if unit in {"us", "µs"}:
-        return val
-    if unit == "ms":
-        return val * 1000.0
-    if unit == "ns":
-        return val / 1000.0
-    if unit == "s":
-        return val * 1_000_000.0
-    raise ValueError(f"Unsupported latency unit: {unit!r} (value={raw!r})")
-
-
-def _percentile_aliases(percentile: str) -> List[str]:
-    """
-    Expand percentile aliases, e.g. "p50.00" -> ["p50.00", "50.0 perc", ...].
-    """
-    out: List[str] = [percentile]
-    m = re.match(r"^\s*p?\s*([0-9]+(?:\.[0-9]+)?)\s*$", percentile.strip(), flags=re.IGNORECASE)
-    if not m:
-        return out
-    p = float(m.group(1))
-    out.extend(
-        [
-            f"p{p:.2f}",
-            f"p{p:g}",
-            f"{p:.2f} perc",
-            f"{p:.1f} perc",
-            f"{p:g} perc",
-            f"{p:.2f}%",
-            f"{p:.1f}%",
-            f"{p:g}%",
-        ]
-    )
-    return list(dict.fromkeys(out))
-
-
-def _extract_latency_percentile_us(run: Dict[str, Any], percentile: str) -> float:
-    """
-    Read percentile latency from known run layouts, return us or NaN.
-    """
-    for key in _percentile_aliases(percentile):
-        if key in run:
-            try:
-                return _latency_to_us(run.get(key))
-            except ValueError:
-                return float("nan")
-
-    # Prefer full latency buckets from common containers.
-    for container_key in ["Latency", "Latencies", "Percentiles"]:
-        container = run.get(container_key)
-        if not isinstance(container, dict):
-            continue
-        for key in _percentile_aliases(percentile):
-            if key in container:
-                try:
-                    return _latency_to_us(container.get(key))
-                except ValueError:
-                    return float("nan")
-
-    return float("nan")
-
-
-def _iops_to_kiops(s: Any) -> float:
-    """
-    Convert IOPS value to kIOPS (thousands of IOPS).
-    Input is typically a string number like "104301".
-    """
-    return _parse_float(s) / 1000.0
-
-
-def _is_multi_device(group: Dict[str, Any]) -> bool:
-    for it in group.get("InFlights", []):
-        if not isinstance(it, dict):
-            continue
-        for run in it.get("Runs", []):
-            if isinstance(run, dict) and "Device" in run:
-                return True
-    return False
-
-
-def _get_device_ids(group: Dict[str, Any]) -> List[str]:
-    devices: set = set()
-    for it in group.get("InFlights", []):
-        if not isinstance(it, dict):
-            continue
-        for run in it.get("Runs", []):
-            if isinstance(run, dict):
-                dev = run.get("Device")
-                if dev is not None and str(dev) != "SUM":
-                    devices.add(str(dev))
-    return sorted(devices)
-
-
-def _compute_stats(values: List[float]) -> Dict[str, float]:
-    values = [v for v in values if not math.isnan(v)]
-    if not values:
-        return {}
-    values.sort()
-    n = len(values)
-    mn = values[0]
-    mx = values[-1]
-    md = (values[n // 2 - 1] + values[n // 2]) / 2.0 if n % 2 == 0 else values[n // 2]
-    mean = sum(values) / n
-    sd = math.sqrt(sum((v - mean) ** 2 for v in values) / n)
-    return {"min": mn, "max": mx, "median": md, "stdev": sd}
-
-
-def _split_multi_device_group(
-    group: Dict[str, Any],
-) -> List[Dict[str, Any]]:
-    """Split a multi-device group into one synthetic group per device."""
-    device_ids = _get_device_ids(group)
-    per_device: List[Dict[str, Any]] = []
-    for dev_id in device_ids:
-        g = dict(group)
-        label = str(group.get("Label", "")).strip()
-        g["Label"] = f"{label} dev{dev_id}".strip()
-        new_inflights = []
-        for it in group.get("InFlights", []):
-            if not isinstance(it, dict):
-                continue
-            dev_runs = [
-                r for r in it.get("Runs", [])
-                if isinstance(r, dict) and str(r.get("Device", "")) == dev_id
-            ]
-            if not dev_runs:
-                continue
-            new_it = dict(it)
-            new_it["Runs"] = dev_runs
-            speeds = [_bandwidth_to_mbs(r.get("Speed")) for r in dev_runs]
-            st = _compute_stats(speeds)
-            if st:
-                new_it["Speed"] = {
-                    k: f"{v:.1f} MB/s" if isinstance(v, float) else v
-                    for k, v in st.items()
-                }
-            iops_vals = [_parse_float(r.get("IOPS")) for r in dev_runs]
-            st = _compute_stats(iops_vals)
-            if st:
-                new_it["IOPS"] = {
-                    k: f"{v:.1f}" if isinstance(v, float) else v
-                    for k, v in st.items()
-                }
-            new_inflights.append(new_it)
-        g["InFlights"] = new_inflights
-        per_device.append(g)
-    return per_device
-
-
-def _filter_to_sum_runs(group: Dict[str, Any]) -> Dict[str, Any]:
-    """Keep only SUM runs; InFlight-level Speed/IOPS stats are already SUM-based."""
-    g = dict(group)
-    new_inflights = []
-    for it in group.get("InFlights", []):
-        if not isinstance(it, dict):
-            continue
-        sum_runs = [
-            r for r in it.get("Runs", [])
-            if isinstance(r, dict) and str(r.get("Device", "")) == "SUM"
-        ]
-        if not sum_runs:
-            continue
-        new_it = dict(it)
-        new_it["Runs"] = sum_runs
-        new_inflights.append(new_it)
-    g["InFlights"] = new_inflights
-    return g
-
-
-def _group_name(group: Dict[str, Any]) -> str:
-    label = str(group.get("Label", "")).strip()
-    log_mode = str(group.get("LogMode", "")).strip()
-    name = " ".join([p for p in [label, log_mode] if p])
-    return name if name else "result"
-
-
-def _extract_series(
-    group: Dict[str, Any],
-    metric_key: str,
-    value_parser,
-) -> Tuple[List[int], List[float], List[float], List[float]]:
-    inflights: List[int] = []
-    mins: List[float] = []
-    meds: List[float] = []
-    maxs: List[float] = []
-
-    items = group.get("InFlights", [])
-    if not isinstance(items, list):
-        raise ValueError("Expected group['InFlights'] to be a list")
-
-    for it in items:
-        if not isinstance(it, dict):
-            continue
-        x = it.get("InFlight")
-        stats = it.get(metric_key, {})
-        if x is None or not isinstance(stats, dict):
-            continue
-
-        inflights.append(int(x))
-        mins.append(value_parser(stats.get("min")))
-        meds.append(value_parser(stats.get("median")))
-        maxs.append(value_parser(stats.get("max")))
+def _import_pyplot():
+    # Optional dependency: matplotlib (headless-safe backend).
+    # Imported lazily: only by processes which render figures.
+    try:
+        import matplotlib  # type: ignore
+    except ModuleNotFoundError as e:
+        raise SystemExit(
+            "Missing dependency: matplotlib\n"
+            "Install it with: pip3 install matplotlib\n"
+            f"Original error: {e}"
+        )
 
-    order = sorted(range(len(inflights)), key=lambda i: inflights[i])
-    inflights = [inflights[i] for i in order]
-    mins = [mins[i] for i in order]
-    meds = [meds[i] for i in order]
-    maxs = [maxs[i] for i in order]
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
 
-    return inflights, mins, meds, maxs
+    return plt
 
 
 def _plot_min_med_max(
-    groups: List[Dict[str, Any]],
+    results: StressResults,
     title: str,
     ylabel: str,
     metric_key: str,
-    value_parser,
+    scale: float,
     out_path: str,
     x_label: str = "QueueDepth (Inflight)",
     x_min: int | None = None,
     x_max: int | None = None,
 ) -> None:
-    # Optional dependency: matplotlib (headless-safe backend).
-    try:
-        import matplotlib  # type: ignore
-    except ModuleNotFoundError as e:
-        raise SystemExit(
-            "Missing dependency: matplotlib\n"
-            "Install it with: pip3 install matplotlib\n"
-            f"Original error: {e}"
-        )
-
-    matplotlib.use("Agg")
-    import matplotlib.pyplot as plt
+    plt = _import_pyplot()
 
     fig, ax = plt.subplots(figsize=(10, 6))
 
-    n = max(1, len(groups))
+    n = max(1, results.group_count)
     offsets = [0.0] if n == 1 else [0.12 * (i - (n - 1) / 2.0) for i in range(n)]
     all_inflights = set()
 
-    for idx, group in enumerate(groups):
-        name = _group_name(group)
-        xs, mins, meds, maxs = _extract_series(group, metric_key, value_parser)
+    for idx in range(results.group_count):
+        name = results.group_name(idx)
+        inflights, stats = results.inflight_stats(idx, metric_key)
+        xs = inflights.tolist()
         if not xs:
             continue
+        mins, meds, maxs = (stats[:, :3] / scale).T.tolist()
         if x_min is not None or x_max is not None:
             clipped = [
                 (x, lo, med, hi)
@@ -397,7 +134,7 @@ def _plot_min_med_max(
         ax.set_xlim(left=0)
     ax.set_ylim(bottom=0)
 
-    if len(groups) > 1:
+    if results.group_count > 1:
         ax.legend(loc="best")
 
     fig.tight_layout()
@@ -406,89 +143,27 @@ def _plot_min_med_max(
     plt.close(fig)
 
 
-def _select_median_iops_run(inflight_item: Dict[str, Any]) -> Dict[str, Any] | None:
-    """
-    Pick the run whose IOPS is closest to the reported median IOPS.
-    This is robust to rounding differences (median may be fractional while runs are ints).
-    """
-    iops_stats = inflight_item.get("IOPS", {})
-    if not isinstance(iops_stats, dict):
-        return None
-    target = _parse_float(iops_stats.get("median"))
-    if math.isnan(target):
-        return None
-
-    runs = inflight_item.get("Runs", [])
-    if not isinstance(runs, list) or not runs:
-        return None
-
-    best_run = None
-    best_diff = None
-    for r in runs:
-        if not isinstance(r, dict):
-            continue
-        diff = abs(_parse_float(r.get("IOPS")) - target)
-        if best_diff is None or diff < best_diff:
-            best_diff = diff
-            best_run = r
-    return best_run
-
-
 def _plot_latency_percentiles(
-    groups: List[Dict[str, Any]],
+    results: StressResults,
     out_path: str,
     percentiles: List[str],
     title: str = "Latency percentiles vs QueueDepth (Inflight) (median-IOPS run)",
 ) -> None:
-    try:
-        import matplotlib  # type: ignore
-    except ModuleNotFoundError as e:
-        raise SystemExit(
-            "Missing dependency: matplotlib\n"
-            "Install it with: pip3 install matplotlib\n"
-            f"Original error: {e}"
-        )
-
-    matplotlib.use("Agg")
-    import matplotlib.pyplot as plt
+    plt = _import_pyplot()
 
     fig, ax = plt.subplots(figsize=(10, 6))
     all_inflights = set()
 
-    for group in groups:
-        name = _group_name(group)
-        items = group.get("InFlights", [])
-        if not isinstance(items, list):
-            continue
-
-        xs: List[int] = []
-        ys_by_p: Dict[str, List[float]] = {p: [] for p in percentiles}
-
-        for it in items:
-            if not isinstance(it, dict):
-                continue
-            x = it.get("InFlight")
-            if x is None:
-                continue
-
-            run = _select_median_iops_run(it)
-            if run is None:
-                continue
-
-            xs.append(int(x))
-            for p in percentiles:
-                ys_by_p[p].append(_extract_latency_percentile_us(run, p))
-
-        # sort by inflight
-        order = sorted(range(len(xs)), key=lambda i: xs[i])
-        xs = [xs[i] for i in order]
-        for p in percentiles:
-            ys_by_p[p] = [ys_by_p[p][i] for i in order]
+    for g in range(results.group_count):
+        name = results.group_name(g)
+        inflights, runs = results.median_iops_runs(g)
+        xs = inflights.tolist()
 
         for p in percentiles:
             if not xs:
                 continue
-            ax.plot(xs, ys_by_p[p], marker="o", linewidth=1.5, markersize=4, label=f"{name} {p}")
+            ys = results.latency_us(runs, p).tolist()
+            ax.plot(xs, ys, marker="o", linewidth=1.5, markersize=4, label=f"{name} {p}")
         all_inflights.update(xs)
 
     ax.set_title(title)
@@ -520,40 +195,20 @@ def _plot_latency_percentiles(
     plt.close(fig)
 
 
-def _find_inflight_item(group: Dict[str, Any], inflight: int) -> Dict[str, Any] | None:
-    items = group.get("InFlights", [])
-    if not isinstance(items, list):
-        return None
-    for it in items:
-        if not isinstance(it, dict):
-            continue
-        x = it.get("InFlight")
-        if x is None:
-            continue
-        try:
-            if int(x) == inflight:
-                return it
-        except (TypeError, ValueError):
-            continue
+def _find_median_iops_run(results: StressResults, g: int, inflight: int) -> int | None:
+    inflights, runs = results.median_iops_runs(g)
+    for x, run in zip(inflights.tolist(), runs.tolist()):
+        if x == inflight:
+            return run
     return None
 
 
 def _plot_latency_bars_qd_1_4_16(
-    groups: List[Dict[str, Any]],
+    results: StressResults,
     out_path: str,
     title: str = "Latency percentiles (QueueDepth 1, 4, 16; median-IOPS run)",
 ) -> bool:
-    try:
-        import matplotlib  # type: ignore
-    except ModuleNotFoundError as e:
-        raise SystemExit(
-            "Missing dependency: matplotlib\n"
-            "Install it with: pip3 install matplotlib\n"
-            f"Original error: {e}"
-        )
-
-    matplotlib.use("Agg")
-    import matplotlib.pyplot as plt
+    plt = _import_pyplot()
 
     target_inflights = [1, 4, 16]
     percentiles = ["p50.00", "p90.00", "p95.00", "p99.00"]
@@ -562,12 +217,11 @@ def _plot_latency_bars_qd_1_4_16(
     qds_present: List[int] = []
     for qd in target_inflights:
         has_any = False
-        for group in groups:
-            it = _find_inflight_item(group, qd)
-            run = _select_median_iops_run(it) if it is not None else None
+        for g in range(results.group_count):
+            run = _find_median_iops_run(results, g, qd)
             if run is None:
                 continue
-            vals = [_extract_latency_percentile_us(run, p) for p in percentiles]
+            vals = [float(results.latency_us([run], p)[0]) for p in percentiles]
             if any(not math.isnan(v) for v in vals):
                 has_any = True
                 break
@@ -583,13 +237,12 @@ def _plot_latency_bars_qd_1_4_16(
 
     x_base = list(range(len(percentiles)))
     marker_span = 0.8
-    marker_step = marker_span / max(len(groups), 1)
+    marker_step = marker_span / max(results.group_count, 1)
     has_points = False
 
     for ax, qd in zip(axes, qds_present):
-        for group_idx, group in enumerate(groups):
-            it = _find_inflight_item(group, qd)
-            run = _select_median_iops_run(it) if it is not None else None
+        for group_idx in range(results.group_count):
+            run = _find_median_iops_run(results, group_idx, qd)
             if run is None:
                 continue
 
@@ -597,7 +250,7 @@ def _plot_latency_bars_qd_1_4_16(
                 x - 0.4 + (marker_step / 2.0) + group_idx * marker_step
                 for x in x_base
             ]
-            y_vals = [_extract_latency_percentile_us(run, p) for p in percentiles]
+            y_vals = [float(results.latency_us([run], p)[0]) for p in percentiles]
             x_plot = [x for x, y in zip(x_vals, y_vals) if not math.isnan(y)]
             y_plot = [y for y in y_vals if not math.isnan(y)]
             if not x_plot:
@@ -608,7 +261,7 @@ def _plot_latency_bars_qd_1_4_16(
                 x_plot,
                 y_plot,
                 "o",
-                label=_group_name(group),
+                label=results.group_name(group_idx),
             )
 
         ax.set_ylabel("Latency (us)")
@@ -658,8 +311,30 @@ def main() -> int:
         default=[],
         help="Optional label for each input file (repeat per file).",
     )
+    p.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the parsed results cache (<input_json>.cache.npz).",
+    )
+    p.add_argument(
+        "--only",
+        action="append",
+        default=[],
+        help=(
+            "Render only the given figures (repeat or comma-separate), one of: "
+            f"{', '.join(FIGURES)}. Default: all figures."
+        ),
+    )
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of processes rendering figures in parallel (default: number of CPUs).",
+    )
     args = p.parse_args()
 
+    only = _selected_figures(args.only)
+
     input_json = list(args.paths)
     prefix = str(args.prefix).strip()
 
@@ -679,46 +354,31 @@ def main() -> int:
             f"({len(args.label)} > {len(input_json)})"
         )
 
-    groups: List[Dict[str, Any]] = []
+    files: List[StressResults] = []
     test_types: List[str] = []
 
     for idx, path in enumerate(input_json):
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        if not isinstance(data, list):
-            raise SystemExit(
-                f"Input JSON must be an array (list) of result groups: {path}"
-            )
+        file_results = load_results(path, use_cache=not args.no_cache)
 
         file_label = args.label[idx] if idx < len(args.label) else ""
-        for g in data:
-            if not isinstance(g, dict):
-                continue
-            if file_label:
-                g = dict(g)
-                g["Label"] = file_label
-            groups.append(g)
+        if file_label:
+            file_results = file_results.with_label(file_label)
+        files.append(file_results)
 
-        test_type = str(data[0].get("TestType", "")).strip() if data else ""
+        test_type = str(file_results.test_types[0]) if file_results.group_count else ""
         if test_type:
             test_types.append(test_type)
 
-    if not groups:
+    results = merge_results(files)
+    if results.group_count == 0:
         raise SystemExit("No result groups found in input JSON.")
 
-    multi_count = sum(1 for g in groups if _is_multi_device(g))
-    single_count = len(groups) - multi_count
+    multi_count = sum(1 for g in range(results.group_count) if results.is_multi_device(g))
+    single_count = results.group_count - multi_count
 
     if len(input_json) == 1 and multi_count > 0:
         # Single input file with multi-device data: plot each device as a series
-        plot_groups: List[Dict[str, Any]] = []
-        for g in groups:
-            if _is_multi_device(g):
-                plot_groups.extend(_split_multi_device_group(g))
-            else:
-                plot_groups.append(g)
-        groups = plot_groups
+        results = results.split_devices()
     elif len(input_json) > 1:
         if multi_count > 0 and single_count > 0:
             raise SystemExit(
@@ -727,14 +387,7 @@ def main() -> int:
             )
         if multi_count > 0:
             # Multiple inputs, all multi-device: plot only SUM/aggregate
-            groups = [_filter_to_sum_runs(g) for g in groups]
-
-    out_speed = f"{prefix}_speed.png"
-    out_speed_qd_1_8 = f"{prefix}_speed_qd1_8.png"
-    out_iops = f"{prefix}_iops.png"
-    out_iops_qd_1_8 = f"{prefix}_iops_qd1_8.png"
-    out_latency = f"{prefix}_latency.png"
-    out_latency_bars_qd_1_4_16 = f"{prefix}_latency_bars_qd_1_4_16.png"
+            results = results.sum_only()
 
     title_suffix = ""
     if test_types:
@@ -744,76 +397,110 @@ def main() -> int:
         else:
             title_suffix = " (mixed)"
 
-    _plot_min_med_max(
-        groups=groups,
-        title=f"Throughput vs QueueDepth (Inflight){title_suffix}",
-        ylabel="Speed (MB/s)",
-        metric_key="Speed",
-        value_parser=_bandwidth_to_mbs,
-        out_path=out_speed,
-    )
-    _plot_min_med_max(
-        groups=groups,
-        title=f"Throughput vs QueueDepth (Inflight){title_suffix} [1..8]",
-        ylabel="Speed (MB/s)",
-        metric_key="Speed",
-        value_parser=_bandwidth_to_mbs,
-        out_path=out_speed_qd_1_8,
-        x_min=1,
-        x_max=8,
-    )
+    figures = _figure_tasks(results, prefix, title_suffix, only)
+    for out_path in _render_figures(figures, args.jobs):
+        print(out_path)
+    return 0
 
-    _plot_min_med_max(
-        groups=groups,
-        title=f"IOPS vs QueueDepth (Inflight){title_suffix}",
-        ylabel="IOPS (kIOPS)",
-        metric_key="IOPS",
-        value_parser=_iops_to_kiops,
-        out_path=out_iops,
-    )
-    _plot_min_med_max(
-        groups=groups,
-        title=f"IOPS vs QueueDepth (Inflight){title_suffix} [1..8]",
-        ylabel="IOPS (kIOPS)",
-        metric_key="IOPS",
-        value_parser=_iops_to_kiops,
-        out_path=out_iops_qd_1_8,
-        x_min=1,
-        x_max=8,
-    )
 
-    print(out_speed)
-    print(out_speed_qd_1_8)
-    print(out_iops)
-    print(out_iops_qd_1_8)
-    if len(groups) >= 3:
-        latency_percentiles = ["p50.00", "p90.00", "p99.00"]
-        for p in latency_percentiles:
+def _selected_figures(values: List[str]) -> Set[str]:
+    """
+    Figure names of repeated or comma-separated --only values, all figures when none is given.
+    """
+    only = {name.strip() for value in values for name in value.split(",") if name.strip()}
+    unknown = sorted(only - set(FIGURES))
+    if unknown:
+        raise SystemExit(f"Unknown figure(s) in --only: {', '.join(unknown)}. Known: {', '.join(FIGURES)}")
+    return only or set(FIGURES)
+
+
+def _figure_tasks(
+    results: StressResults,
+    prefix: str,
+    title_suffix: str,
+    only: Set[str],
+) -> List[Tuple[str, Callable[..., Any], Dict[str, Any]]]:
+    """
+    Figures to render as (output path, plotting function, keyword arguments).
+    """
+    tasks: List[Tuple[str, Callable[..., Any], Dict[str, Any]]] = []
+
+    def add(name: str, out_path: str, func: Callable[..., Any], **kwargs: Any) -> None:
+        if name in only:
+            tasks.append((out_path, func, dict(kwargs, results=results, out_path=out_path)))
+
+    for metric_key, name, title, ylabel, scale in [
+        ("Speed", "speed", "Throughput", "Speed (MB/s)", 1.0),
+        ("IOPS", "iops", "IOPS", "IOPS (kIOPS)", 1000.0),
+    ]:
+        add(
+            name,
+            f"{prefix}_{name}.png",
+            _plot_min_med_max,
+            title=f"{title} vs QueueDepth (Inflight){title_suffix}",
+            ylabel=ylabel,
+            metric_key=metric_key,
+            scale=scale,
+        )
+        add(
+            f"{name}_qd1_8",
+            f"{prefix}_{name}_qd1_8.png",
+            _plot_min_med_max,
+            title=f"{title} vs QueueDepth (Inflight){title_suffix} [1..8]",
+            ylabel=ylabel,
+            metric_key=metric_key,
+            scale=scale,
+            x_min=1,
+            x_max=8,
+        )
+
+    if results.group_count >= 3:
+        for p in ["p50.00", "p90.00", "p99.00"]:
             p_slug = p.lower().replace(".", "")
-            out_p = f"{prefix}_latency_{p_slug}.png"
-            _plot_latency_percentiles(
-                groups=groups,
-                out_path=out_p,
+            add(
+                "latency",
+                f"{prefix}_latency_{p_slug}.png",
+                _plot_latency_percentiles,
                 percentiles=[p],
                 title=f"Latency {p} vs QueueDepth (Inflight) (median-IOPS run){title_suffix}",
             )
-            print(out_p)
     else:
-        _plot_latency_percentiles(
-            groups=groups,
-            out_path=out_latency,
+        add(
+            "latency",
+            f"{prefix}_latency.png",
+            _plot_latency_percentiles,
             percentiles=["p50.00", "p90.00", "p95.00", "p99.00"],
             title=f"Latency percentiles vs QueueDepth (Inflight) (median-IOPS run){title_suffix}",
         )
-        print(out_latency)
 
-    if _plot_latency_bars_qd_1_4_16(
-        groups=groups,
-        out_path=out_latency_bars_qd_1_4_16,
+    add(
+        "latency_bars_qd_1_4_16",
+        f"{prefix}_latency_bars_qd_1_4_16.png",
+        _plot_latency_bars_qd_1_4_16,
         title=f"Latency percentiles (QueueDepth 1, 4, 16; median-IOPS run){title_suffix}",
-    ):
-        print(out_latency_bars_qd_1_4_16)
-    return 0
+    )
+    return tasks
+
+
+def _render_figure(func: Callable[..., Any], kwargs: Dict[str, Any]) -> bool:
+    # Plotting functions return False when there is nothing to plot, None otherwise.
+    return func(**kwargs) is not False
+
+
+def _render_figures(
+    tasks: List[Tuple[str, Callable[..., Any], Dict[str, Any]]],
+    jobs: int,
+) -> List[str]:
+    """
+    Render figures in a process pool (each figure is independent), return paths of written files in task order.
+    """
+    jobs = min(jobs, len(tasks))
+    if jobs <= 1:
+        return [out_path for out_path, func, kwargs in tasks if _render_figure(func, kwargs)]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_render_figure, func, kwargs) for _, func, kwargs in tasks]
+        return [out_path for (out_path, _, _), future in zip(tasks, futures) if future.result()]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+"""
+Normalized model of YDB stress tool results (new InFlights format) shared by table.py and plot.py.
+
+A result file is parsed once into flat NumPy arrays: one element per run (group, InFlight, run number,
+device, IOPS, MB/s and latency percentiles in us) and one element per InFlight item (min / median / max /
+stdev of Speed and IOPS). The model is cached next to the input file in `<input>.cache.npz` together with
+the SHA-256 of the input, so repeated invocations of both tools skip JSON and unit parsing.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import tempfile
+import warnings
+import zipfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ModuleNotFoundError as e:
+    raise SystemExit(
+        "Missing dependency: numpy\n"
+        "Install it with: pip3 install numpy\n"
+        f"Original error: {e}"
+    )
+
+
+CACHE_SUFFIX = ".cache.npz"
+# Bump when the set or layout of the arrays changes: caches of other versions are ignored.
+CACHE_FORMAT_VERSION = 1
+
+# Order of columns in per-InFlight stats arrays.
+STAT_NAMES = ("min", "median", "max", "stdev")
+
+
+def parse_float(s: Any) -> float:
+    if s is None:
+        return float("nan")
+    if isinstance(s, (int, float)):
+        return float(s)
+    raw = str(s).strip()
+    if raw == "":
+        return float("nan")
+    return float(raw)
+
+
+_BW_RE = re.compile(r"^\s*([0-9]+(?:\.[0-9]+)?)\s*([A-Za-z]+/s)\s*$")
+_LAT_RE = re.compile(r"^\s*([0-9]+(?:\.[0-9]+)?)\s*([A-Za-zµ]+)\s*$")
+_PERCENTILE_RE = re.compile(r"^\s*p?\s*([0-9]+(?:\.[0-9]+)?)\s*(?:%|perc)?\s*$", flags=re.IGNORECASE)
+
+_BW_UNITS = {
+    "B/s": 1,
+    "KB/s": 1_000,
+    "MB/s": 1_000_000,
+    "GB/s": 1_000_000_000,
+    "KiB/s": 1024,
+    "MiB/s": 1024**2,
+    "GiB/s": 1024**3,
+}
+
+_LAT_UNITS = {
+    "us": 1.0,
+    "µs": 1.0,
+    "ms": 1000.0,
+    "ns": 0.001,
+    "s": 1_000_000.0,
+}
+
+
+def bandwidth_to_mbs(s: Any) -> float:
+    """
+    Convert strings like '205.3 MB/s' to MB/s float.
+    Supports: B/s, KB/s, MB/s, GB/s, KiB/s, MiB/s, GiB/s.
+    """
+    if s is None:
+        return float("nan")
+    if isinstance(s, (int, float)):
+        # Assume already MB/s.
+        return float(s)
+    raw = str(s).strip()
+    if raw == "":
+        return float("nan")
+
+    m = _BW_RE.match(raw)
+    if not m:
+        raise ValueError(f"Unrecognized bandwidth value: {raw!r}")
+    unit = m.group(2)
+    if unit not in _BW_UNITS:
+        raise ValueError(f"Unsupported bandwidth unit: {unit!r} (value={raw!r})")
+
+    # Convert to bytes/sec first, then MB/s (10^6).
+    return float(m.group(1)) * _BW_UNITS[unit] / 1_000_000.0
+
+
+def latency_to_us(s: Any) -> float:
+    """
+    Convert latency values like '39 us' (us/ms/ns/s) to float microseconds.
+    """
+    if s is None:
+        return float("nan")
+    if isinstance(s, (int, float)):
+        return float(s)
+    raw = str(s).strip()
+    if raw == "":
+        return float("nan")
+    m = _LAT_RE.match(raw)
+    if not m:
+        raise ValueError(f"Unrecognized latency value: {raw!r}")
+    unit = m.group(2).lower()
+    if unit not in _LAT_UNITS:
+        raise ValueError(f"Unsupported latency unit: {unit!r} (value={raw!r})")
+    return float(m.group(1)) * _LAT_UNITS[unit]
+
+
+def percentile_value(key: Any) -> Optional[float]:
+    """
+    Percentile of a run key, e.g. "p99.00", "99.0 perc" or "99%" -> 99.0, None for other keys.
+    """
+    if not isinstance(key, str):
+        return None
+    m = _PERCENTILE_RE.match(key)
+    if not m:
+        return None
+    p = float(m.group(1))
+    if p > 100:
+        return None
+    return round(p, 6)
+
+
+def _run_latencies_us(run: Dict[str, Any]) -> Dict[float, float]:
+    """
+    All percentile latencies of a run in us: top-level keys first, then the known containers.
+    """
+    out: Dict[float, float] = {}
+    for container in [run, run.get("Latency"), run.get("Latencies"), run.get("Percentiles")]:
+        if not isinstance(container, dict):
+            continue
+        for key, value in container.items():
+            p = percentile_value(key)
+            if p is None or p in out:
+                continue
+            try:
+                out[p] = latency_to_us(value)
+            except ValueError:
+                out[p] = float("nan")
+    return out
+
+
+def _stats_row(stats: Any, value_parser) -> List[float]:
+    if not isinstance(stats, dict):
+        return [float("nan")] * len(STAT_NAMES)
+    stddev_raw = stats.get("stdev")
+    if stddev_raw is None:
+        stddev_raw = stats.get("stddev")
+    return [
+        value_parser(stats.get("min")),
+        value_parser(stats.get("median")),
+        value_parser(stats.get("max")),
+        value_parser(stddev_raw),
+    ]
+
+
+def _compute_stats(values: np.ndarray) -> Optional[np.ndarray]:
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return None
+    return np.array([values.min(), np.median(values), values.max(), values.std()])
+
+
+def _is_multi_device_group(group: Dict[str, Any]) -> bool:
+    for it in group.get("InFlights", []):
+        if not isinstance(it, dict):
+            continue
+        for run in it.get("Runs", []):
+            if isinstance(run, dict) and "Device" in run:
+                return True
+    return False
+
+
+class StressResults:
+    """
+    Result groups of one or more stress tool result files.
+
+    Per group: labels, log_modes, test_types, multi_device.
+    Per InFlight item: inflight_group, inflight, speed_mbs[item, stat], iops[item, stat]
+    (stats in STAT_NAMES order), sorted by InFlight within a group.
+    Per run: run_group, run_inflight, run_number, run_device ("" for single-device results),
+    run_iops, run_mbs, run_latency_us[run, percentile] for percentiles[percentile],
+    in the order of the input file within an InFlight item.
+    """
+
+    ARRAYS = (
+        "labels",
+        "log_modes",
+        "test_types",
+        "multi_device",
+        "inflight_group",
+        "inflight",
+        "speed_mbs",
+        "iops",
+        "percentiles",
+        "run_group",
+        "run_inflight",
+        "run_number",
+        "run_device",
+        "run_iops",
+        "run_mbs",
+        "run_latency_us",
+    )
+
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def from_groups(cls, groups: Sequence[Dict[str, Any]]) -> "StressResults":
+        labels: List[str] = []
+        log_modes: List[str] = []
+        test_types: List[str] = []
+        multi_device: List[bool] = []
+        inflight_group: List[int] = []
+        inflights: List[int] = []
+        speed_mbs: List[List[float]] = []
+        iops: List[List[float]] = []
+        run_group: List[int] = []
+        run_inflight: List[int] = []
+        run_number: List[int] = []
+        run_device: List[str] = []
+        run_iops: List[float] = []
+        run_mbs: List[float] = []
+        run_latencies: List[Dict[float, float]] = []
+
+        for g, group in enumerate(groups):
+            labels.append(str(group.get("Label", "")).strip())
+            log_modes.append(str(group.get("LogMode", "")).strip())
+            test_types.append(str(group.get("TestType", "")).strip())
+            has_device = _is_multi_device_group(group)
+            multi_device.append(has_device)
+
+            items = group.get("InFlights", [])
+            if not isinstance(items, list):
+                continue
+            for it in sorted(
+                [x for x in items if isinstance(x, dict) and x.get("InFlight") is not None],
+                key=lambda d: int(d.get("InFlight")),
+            ):
+                inflight = int(it.get("InFlight"))
+                inflight_group.append(g)
+                inflights.append(inflight)
+                speed_mbs.append(_stats_row(it.get("Speed", {}), bandwidth_to_mbs))
+                iops.append(_stats_row(it.get("IOPS", {}), parse_float))
+
+                runs = it.get("Runs", [])
+                if not isinstance(runs, list):
+                    continue
+                # For multi-device, each "run" is a group of (num_devices + SUM) rows
+                rows_per_run = 1
+                if has_device:
+                    for i, r in enumerate(runs):
+                        if isinstance(r, dict) and str(r.get("Device", "")) == "SUM":
+                            rows_per_run = i + 1
+                            break
+
+                for idx, r in enumerate(runs):
+                    if not isinstance(r, dict):
+                        continue
+                    run_group.append(g)
+                    run_inflight.append(inflight)
+                    run_number.append(idx // rows_per_run + 1)
+                    run_device.append(str(r.get("Device", "")))
+                    run_iops.append(parse_float(r.get("IOPS")))
+                    run_mbs.append(bandwidth_to_mbs(r.get("Speed")))
+                    run_latencies.append(_run_latencies_us(r))
+
+        percentiles = sorted({p for lat in run_latencies for p in lat})
+        column = {p: i for i, p in enumerate(percentiles)}
+        run_latency_us = np.full((len(run_latencies), len(percentiles)), np.nan)
+        for i, lat in enumerate(run_latencies):
+            for p, value in lat.items():
+                run_latency_us[i, column[p]] = value
+
+        return cls(
+            {
+                "labels": np.array(labels, dtype=str),
+                "log_modes": np.array(log_modes, dtype=str),
+                "test_types": np.array(test_types, dtype=str),
+                "multi_device": np.array(multi_device, dtype=bool),
+                "inflight_group": np.array(inflight_group, dtype=np.int64),
+                "inflight": np.array(inflights, dtype=np.int64),
+                "speed_mbs": np.array(speed_mbs, dtype=float).reshape(-1, len(STAT_NAMES)),
+                "iops": np.array(iops, dtype=float).reshape(-1, len(STAT_NAMES)),
+                "percentiles": np.array(percentiles, dtype=float),
+                "run_group": np.array(run_group, dtype=np.int64),
+                "run_inflight": np.array(run_inflight, dtype=np.int64),
+                "run_number": np.array(run_number, dtype=np.int64),
+                "run_device": np.array(run_device, dtype=str),
+                "run_iops": np.array(run_iops, dtype=float),
+                "run_mbs": np.array(run_mbs, dtype=float),
+                "run_latency_us": run_latency_us,
+            }
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    @property
+    def group_count(self) -> int:
+        return len(self.labels)
+
+    def group_name(self, g: int) -> str:
+        name = " ".join([p for p in [str(self.labels[g]), str(self.log_modes[g])] if p])
+        return name if name else "result"
+
+    def is_multi_device(self, g: int) -> bool:
+        return bool(self.multi_device[g])
+
+    def device_ids(self, g: int) -> List[str]:
+        devices = self.run_device[self.run_group == g]
+        return sorted(str(d) for d in np.unique(devices) if d and d != "SUM")
+
+    def inflight_stats(self, g: int, metric: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        InFlights of the group and their stats of metric "Speed" (MB/s) or "IOPS".
+        """
+        rows = np.flatnonzero(self.inflight_group == g)
+        stats = self.speed_mbs if metric == "Speed" else self.iops
+        return self.inflight[rows], stats[rows]
+
+    def group_runs(self, g: int) -> np.ndarray:
+        """
+        Indices of runs of the group, ordered by InFlight, then as in the input file.
+        """
+        rows = np.flatnonzero(self.run_group == g)
+        return rows[np.argsort(self.run_inflight[rows], kind="stable")]
+
+    def median_iops_runs(self, g: int, device: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        For every InFlight of the group pick the run whose IOPS is closest to the reported median IOPS
+        (the first one on ties). When device is set, only runs of that device are considered.
+        Returns InFlights and indices of the picked runs.
+        """
+        run_mask = self.run_group == g
+        if device is not None:
+            run_mask &= self.run_device == device
+
+        inflights: List[int] = []
+        picked: List[int] = []
+        for i in np.flatnonzero(self.inflight_group == g):
+            target = self.iops[i, 1]
+            if math.isnan(target):
+                continue
+            rows = np.flatnonzero(run_mask & (self.run_inflight == self.inflight[i]))
+            if rows.size == 0:
+                continue
+            diff = np.abs(self.run_iops[rows] - target)
+            # a run without IOPS is picked only when there is nothing else
+            diff[np.isnan(diff)] = np.inf
+            inflights.append(int(self.inflight[i]))
+            picked.append(int(rows[np.argmin(diff)]))
+        return np.array(inflights, dtype=np.int64), np.array(picked, dtype=np.int64)
+
+    def device_balance(self, g: int, percentile: str = "p99.00") -> List[Dict[str, Any]]:
+        """
+        Per InFlight of a multi-device group, for devices of device_ids(g):
+          iops_share, mbs_share - share of the SUM row of the same run, median over runs;
+          iops_cv - coefficient of variation of device IOPS within a run, median over runs;
+          latency_us - latency percentile of the device, median over runs.
+        """
+        devices = self.device_ids(g)
+        columns = {d: i for i, d in enumerate(devices)}
+        columns["SUM"] = len(devices)
+
+        out: List[Dict[str, Any]] = []
+        group_mask = self.run_group == g
+        for inflight in np.unique(self.run_inflight[group_mask]).tolist():
+            rows = np.flatnonzero(group_mask & (self.run_inflight == inflight))
+            rows = rows[[str(d) in columns for d in self.run_device[rows]]]
+            runs, run_idx = np.unique(self.run_number[rows], return_inverse=True)
+            dev_idx = [columns[str(d)] for d in self.run_device[rows]]
+
+            shape = (len(runs), len(devices) + 1)
+            iops = np.full(shape, np.nan)
+            mbs = np.full(shape, np.nan)
+            latency = np.full(shape, np.nan)
+            iops[run_idx, dev_idx] = self.run_iops[rows]
+            mbs[run_idx, dev_idx] = self.run_mbs[rows]
+            latency[run_idx, dev_idx] = self.latency_us(rows, percentile)
+
+            with warnings.catch_warnings():
+                # devices missing in some runs are NaN
+                warnings.simplefilter("ignore", RuntimeWarning)
+                # runs without SUM row are compared with the sum of devices
+                iops_sum = np.where(np.isnan(iops[:, -1]), np.nansum(iops[:, :-1], axis=1), iops[:, -1])
+                mbs_sum = np.where(np.isnan(mbs[:, -1]), np.nansum(mbs[:, :-1], axis=1), mbs[:, -1])
+                dev_iops = iops[:, :-1]
+                out.append(
+                    {
+                        "inflight": inflight,
+                        "devices": devices,
+                        "iops_share": np.nanmedian(dev_iops / iops_sum[:, None], axis=0),
+                        "mbs_share": np.nanmedian(mbs[:, :-1] / mbs_sum[:, None], axis=0),
+                        "iops_cv": float(np.nanmedian(np.nanstd(dev_iops, axis=1) / np.nanmean(dev_iops, axis=1))),
+                        "latency_us": np.nanmedian(latency[:, :-1], axis=0),
+                    }
+                )
+        return out
+
+    def latency_us(self, rows: np.ndarray, percentile: str) -> np.ndarray:
+        """
+        Latency percentile (e.g. "p99.00") of the runs in us, NaN where it was not reported.
+        """
+        p = percentile_value(percentile)
+        columns = np.flatnonzero(np.isclose(self.percentiles, p)) if p is not None else []
+        if len(columns) == 0:
+            return np.full(len(rows), np.nan)
+        return self.run_latency_us[rows, columns[0]]
+
+    def with_label(self, label: str) -> "StressResults":
+        arrays = self.arrays()
+        arrays["labels"] = np.full(self.group_count, label)
+        return StressResults(arrays)
+
+    def split_devices(self) -> "StressResults":
+        """
+        Split multi-device groups into one group per device, InFlight stats are computed from device runs.
+        """
+        parts = []
+        for g in range(self.group_count):
+            inflight_rows = np.flatnonzero(self.inflight_group == g)
+            if not self.is_multi_device(g):
+                parts.append((g, str(self.labels[g]), np.flatnonzero(self.run_group == g), inflight_rows, None, None))
+                continue
+            for dev_id in self.device_ids(g):
+                dev_mask = (self.run_group == g) & (self.run_device == dev_id)
+                dev_inflight_rows = []
+                speed = []
+                iops = []
+                for i in inflight_rows:
+                    rows = np.flatnonzero(dev_mask & (self.run_inflight == self.inflight[i]))
+                    if rows.size == 0:
+                        continue
+                    dev_inflight_rows.append(i)
+                    st = _compute_stats(self.run_mbs[rows])
+                    speed.append(st if st is not None else self.speed_mbs[i])
+                    st = _compute_stats(self.run_iops[rows])
+                    iops.append(st if st is not None else self.iops[i])
+                parts.append(
+                    (
+                        g,
+                        f"{self.labels[g]} dev{dev_id}".strip(),
+                        np.flatnonzero(dev_mask),
+                        np.array(dev_inflight_rows, dtype=np.int64),
+                        np.array(speed, dtype=float).reshape(-1, len(STAT_NAMES)),
+                        np.array(iops, dtype=float).reshape(-1, len(STAT_NAMES)),
+                    )
+                )
+        return self._compose(parts)
+
+    def sum_only(self) -> "StressResults":
+        """
+        Keep only SUM runs; InFlight-level Speed/IOPS stats are already SUM-based.
+        """
+        parts = []
+        for g in range(self.group_count):
+            sum_mask = (self.run_group == g) & (self.run_device == "SUM")
+            inflight_rows = [
+                i for i in np.flatnonzero(self.inflight_group == g)
+                if np.any(sum_mask & (self.run_inflight == self.inflight[i]))
+            ]
+            parts.append(
+                (g, str(self.labels[g]), np.flatnonzero(sum_mask), np.array(inflight_rows, dtype=np.int64), None, None)
+            )
+        return self._compose(parts)
+
+    def _compose(self, parts) -> "StressResults":
+        """
+        New results from parts (group, label, run rows, InFlight rows, Speed stats or None, IOPS stats or None).
+        """
+        groups = np.array([p[0] for p in parts], dtype=np.int64)
+        run_rows = np.concatenate([p[2] for p in parts] + [np.empty(0, dtype=np.int64)]).astype(np.int64)
+        inflight_rows = np.concatenate([p[3] for p in parts] + [np.empty(0, dtype=np.int64)]).astype(np.int64)
+
+        def stats(index, source):
+            chunks = [p[index] if p[index] is not None else source[p[3]] for p in parts]
+            return np.concatenate(chunks + [np.empty((0, len(STAT_NAMES)))])
+
+        return StressResults(
+            {
+                "labels": np.array([p[1] for p in parts], dtype=str),
+                "log_modes": self.log_modes[groups],
+                "test_types": self.test_types[groups],
+                "multi_device": self.multi_device[groups],
+                "inflight_group": np.repeat(np.arange(len(parts)), [len(p[3]) for p in parts]),
+                "inflight": self.inflight[inflight_rows],
+                "speed_mbs": stats(4, self.speed_mbs),
+                "iops": stats(5, self.iops),
+                "percentiles": self.percentiles,
+                "run_group": np.repeat(np.arange(len(parts)), [len(p[2]) for p in parts]),
+                "run_inflight": self.run_inflight[run_rows],
+                "run_number": self.run_number[run_rows],
+                "run_device": self.run_device[run_rows],
+                "run_iops": self.run_iops[run_rows],
+                "run_mbs": self.run_mbs[run_rows],
+                "run_latency_us": self.run_latency_us[run_rows],
+            }
+        )
+
+
+def merge_results(results: Sequence[StressResults]) -> StressResults:
+    """
+    Concatenate groups of multiple results, percentiles are united.
+    """
+    if not results:
+        return StressResults.from_groups([])
+
+    percentiles = np.array(sorted({float(p) for r in results for p in r.percentiles}), dtype=float)
+    chunks: Dict[str, List[np.ndarray]] = {name: [] for name in StressResults.ARRAYS}
+    group_offset = 0
+    for r in results:
+        for name in StressResults.ARRAYS:
+            value = getattr(r, name)
+            if name in ("inflight_group", "run_group"):
+                value = value + group_offset
+            elif name == "run_latency_us":
+                value = np.full((len(r.run_group), len(percentiles)), np.nan)
+                value[:, np.searchsorted(percentiles, r.percentiles)] = r.run_latency_us
+            chunks[name].append(value)
+        group_offset += r.group_count
+
+    merged = {name: np.concatenate(values) for name, values in chunks.items()}
+    merged["percentiles"] = percentiles
+    return StressResults(merged)
+
+
+def _read_cache(cache_path: str, digest: str) -> Optional[StressResults]:
+    try:
+        with np.load(cache_path, allow_pickle=False) as npz:
+            if int(npz["format_version"]) != CACHE_FORMAT_VERSION or str(npz["source_sha256"]) != digest:
+                return None
+            return StressResults({name: npz[name] for name in StressResults.ARRAYS})
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        return None
+
+
+def _write_cache(cache_path: str, digest: str, results: StressResults) -> None:
+    # Cache is an optimization only: e.g. results may be in a read-only directory.
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".", suffix=".tmp", dir=os.path.dirname(os.path.abspath(cache_path))
+        )
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                format_version=np.array(CACHE_FORMAT_VERSION),
+                source_sha256=np.array(digest),
+                **results.arrays(),
+            )
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def load_results(path: str, use_cache: bool = True) -> StressResults:
+    """
+    Load a resulting JSON file (array of groups), using `<path>.cache.npz` when it matches the file.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    cache_path = path + CACHE_SUFFIX
+
+    if use_cache:
+        cached = _read_cache(cache_path, digest)
+        if cached is not None:
+            return cached
+
+    data = json.loads(raw.decode("utf-8"))
+    if not isinstance(data, list):
+        raise SystemExit(f"Input JSON must be an array (list) of result groups: {path}")
+    results = StressResults.from_groups([g for g in data if isinstance(g, dict)])
+
+    if use_cache:
+        _write_cache(cache_path, digest, results)
+    return results
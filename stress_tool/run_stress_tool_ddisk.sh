@@ -37,13 +37,15 @@ NODE_ID=1
 PDISK_ID=1
 DDISK_SLOT_ID=1
 TAG=1
+NO_DISCARD=false
 
 usage() {
     cat << EOF
-Usage: $0 --tool <ydb_stress_tool_path> [--reads] [--duration <seconds>] [--warmup <seconds>] [--label <label>] [--run-count <N>] [--inflight-from <N>] [--inflight-to <N>] [--areas-count <N>] [--area-size <bytes>] [--expected-chunk-size <bytes>] --disk <disk_path> [--disk <disk_path2> ...] --output <output_file>
+Usage: $0 --tool <ydb_stress_tool_path> [--reads] [--duration <seconds>] [--warmup <seconds>] [--label <label>] [--run-count <N>] [--inflight-from <N>] [--inflight-to <N>] [--areas-count <N>] [--area-size <bytes>] [--expected-chunk-size <bytes>] [--no-discard] --disk <disk_path> [--disk <disk_path2> ...] --output <output_file>
 
 Options:
   --reads              Perform read load instead of write load.
+  --no-discard         Do not blkdiscard the devices before a write load (e.g. when continuing a sweep).
 
 Examples:
   $0 --tool ./ydb-stress-tool --disk /dev/nvme0n1p2 --output ./out.json
@@ -120,6 +122,10 @@ while [[ $# -gt 0 ]]; do
             DDISK_SLOT_ID="$2"
             shift 2
             ;;
+        --no-discard)
+            NO_DISCARD=true
+            shift
+            ;;
         *)
             echo "Unknown option: $1"
             usage
@@ -301,7 +307,7 @@ else
     LOG_MODE="DDISK_WRITE"
 fi
 
-if [ "$IS_READ_LOAD" != true ]; then
+if [ "$IS_READ_LOAD" != true ] && [ "$NO_DISCARD" != true ]; then
     echo "Discarding test devices before benchmark run..."
     for dp in "${DISK_PATHS[@]}"; do
         echo "  sudo blkdiscard $dp"
@@ -18,10 +18,11 @@ CHUNKS_COUNT=""
 CHUNK_SLOTS=32768
 WARMUP_SECONDS=15
 DISABLE_PDISK_ENCRYPTION=false
+NO_DISCARD=false
 
 usage() {
     cat << EOF
-Usage: $0 --tool <ydb_stress_tool_path> [--duration <seconds>] [--label <label>] [--log-mode <LOG_NONE|LOG_SEQUENTIAL>] [--run-count <N>] [--inflight-from <N>] [--inflight-to <N>] [--chunks-count <N>] [--warmup <seconds>] [--disable-pdisk-encryption] --disk <disk_path> [--disk <disk_path2> ...] --output <output_file>
+Usage: $0 --tool <ydb_stress_tool_path> [--duration <seconds>] [--label <label>] [--log-mode <LOG_NONE|LOG_SEQUENTIAL>] [--run-count <N>] [--inflight-from <N>] [--inflight-to <N>] [--chunks-count <N>] [--warmup <seconds>] [--disable-pdisk-encryption] [--no-discard] --disk <disk_path> [--disk <disk_path2> ...] --output <output_file>
 
 Examples:
   $0 --tool ./ydb-stress-tool --disk /dev/nvme0n1 --output ./out.json
@@ -89,6 +90,10 @@ while [[ $# -gt 0 ]]; do
             DISABLE_PDISK_ENCRYPTION=true
             shift
             ;;
+        --no-discard)
+            NO_DISCARD=true
+            shift
+            ;;
         *)
             echo "Unknown option: $1"
             usage
@@ -261,11 +266,13 @@ if [ "$DISABLE_PDISK_ENCRYPTION" = true ]; then
     STRESS_TOOL_ARGS+=(--disable-pdisk-encryption)
 fi
 
-echo "Discarding test devices before benchmark run..."
-for dp in "${DISK_PATHS[@]}"; do
-    echo "  sudo blkdiscard $dp"
-    sudo blkdiscard "$dp"
-done
+if [ "$NO_DISCARD" != true ]; then
+    echo "Discarding test devices before benchmark run..."
+    for dp in "${DISK_PATHS[@]}"; do
+        echo "  sudo blkdiscard $dp"
+        sudo blkdiscard "$dp"
+    done
+fi
 
 echo "Running test with LogMode=$LOG_MODE, InFlights=$INFLIGHT_FROM..$INFLIGHT_TO, RunCount=$RUN_COUNT, ChunksCount=$EFFECTIVE_CHUNKS, Disks=${#DISK_PATHS[@]}"
 if ! RESULT=$(sudo "$YDB_STRESS_TOOL" \
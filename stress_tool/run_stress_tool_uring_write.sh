@@ -19,10 +19,11 @@ RUN_COUNT=10
 INFLIGHT_FROM=1
 INFLIGHT_TO=128
 LOG_MODE="URING"
+NO_DISCARD=false
 
 usage() {
     cat << EOF
-Usage: $0 --tool <ydb_stress_tool_path> [--duration <seconds>] [--label <label>] [--run-count <N>] [--inflight-from <N>] [--inflight-to <N>] [--request-size <bytes>] [--queue-depth <N>] [--use-aligned-data <true|false>] [--use-write-fixed <true|false>] [--enable-shared-sqpoll] --disk <disk_path> [--disk <disk_path2> ...] --output <output_file>
+Usage: $0 --tool <ydb_stress_tool_path> [--duration <seconds>] [--label <label>] [--run-count <N>] [--inflight-from <N>] [--inflight-to <N>] [--request-size <bytes>] [--queue-depth <N>] [--use-aligned-data <true|false>] [--use-write-fixed <true|false>] [--enable-shared-sqpoll] [--no-discard] --disk <disk_path> [--disk <disk_path2> ...] --output <output_file>
 
 Examples:
   $0 --tool ./ydb-stress-tool --disk /dev/nvme0n1 --output ./out_uring.json
@@ -96,6 +97,10 @@ while [[ $# -gt 0 ]]; do
             USE_SHARED_SQPOLL="true"
             shift
             ;;
+        --no-discard)
+            NO_DISCARD=true
+            shift
+            ;;
         *)
             echo "Unknown option: $1"
             usage
@@ -242,11 +247,13 @@ for dp in "${DISK_PATHS[@]}"; do
     PATH_ARGS+=(--path "$dp")
 done
 
-echo "Discarding test devices before benchmark run..."
-for dp in "${DISK_PATHS[@]}"; do
-    echo "  sudo blkdiscard $dp"
-    sudo blkdiscard "$dp"
-done
+if [ "$NO_DISCARD" != true ]; then
+    echo "Discarding test devices before benchmark run..."
+    for dp in "${DISK_PATHS[@]}"; do
+        echo "  sudo blkdiscard $dp"
+        sudo blkdiscard "$dp"
+    done
+fi
 
 echo "Running uring test with InFlights=$INFLIGHT_FROM..$INFLIGHT_TO, RunCount=$RUN_COUNT, RequestSize=$REQUEST_SIZE, QueueDepth=$QUEUE_DEPTH, Disks=${#DISK_PATHS[@]}"
 if ! RESULT=$(sudo "$YDB_STRESS_TOOL" \
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Adaptive InFlight sweep on top of the run_stress_tool_*.sh scripts.
+
+Instead of running every InFlight from --inflight-from to --inflight-to RUN_COUNT times, the sweep
+measures InFlight values geometrically (1, 2, 4, ...), then adds points around the saturation knee.
+Every point is measured with single-run invocations of the script until the confidence interval of
+its median IOPS is narrow enough (or --max-runs is reached). The output is the usual InFlights group
+format, so table.py and plot.py work on it unchanged.
+"""
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from results import StressResults
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../common")
+from benchstats import knee_point, median_ci
+
+
+# kind -> (script, option setting the chunks/areas count, whether the script discards devices)
+SCRIPTS = {
+    "pdisk": ("run_stress_tool_pdisk_write.sh", "--chunks-count", True),
+    "ddisk": ("run_stress_tool_ddisk.sh", "--areas-count", True),
+    "uring": ("run_stress_tool_uring_write.sh", None, True),
+}
+
+# Script options set by the sweep itself.
+RESERVED_OPTIONS = ("--run-count", "--inflight-from", "--inflight-to", "--output", "--no-discard")
+
+
+def log(msg: str) -> None:
+    print(f"{time.strftime('%H:%M:%S')} [sweep] {msg}", flush=True)
+
+
+def geometric_inflights(lo: int, hi: int, factor: float = 2.0) -> List[int]:
+    """
+    lo, lo * factor, lo * factor^2, ... rounded to integers, always including hi.
+    """
+    out: List[int] = []
+    value = float(lo)
+    while round(value) < hi:
+        if not out or round(value) > out[-1]:
+            out.append(int(round(value)))
+        value *= factor
+    out.append(hi)
+    return out
+
+
+def refine_inflights(measured: Sequence[int], knee: int) -> List[int]:
+    """
+    New InFlight values halving (in log scale) the gaps between the knee and its measured neighbours.
+    """
+    points = sorted(set(measured))
+    out: List[int] = []
+    below = [q for q in points if q < knee]
+    above = [q for q in points if q > knee]
+    for neighbour in ([below[-1]] if below else []) + ([above[0]] if above else []):
+        q = int(round(math.sqrt(neighbour * knee)))
+        if q not in points and q not in out and min(neighbour, knee) < q < max(neighbour, knee):
+            out.append(q)
+    return sorted(out)
+
+
+def _format_stats(values: np.ndarray, unit: str = "") -> Dict[str, str]:
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return {}
+    stats = [values.min(), np.median(values), values.max(), values.std()]
+    return {name: f"{v:.1f}{unit}" for name, v in zip(("min", "median", "max", "stdev"), stats)}
+
+
+class Sweep:
+    """
+    Runs measure(inflight) -> stress tool group with a single run of that InFlight until every point
+    converges, refines around the knee and assembles the resulting group.
+    """
+
+    def __init__(
+        self,
+        measure: Callable[[int], Dict[str, Any]],
+        min_runs: int = 5,
+        max_runs: int = 10,
+        ci_width: float = 0.05,
+        confidence: float = 0.9,
+        refine_rounds: int = 2,
+        on_update: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> None:
+        self.measure = measure
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.ci_width = ci_width
+        self.confidence = confidence
+        self.refine_rounds = refine_rounds
+        self.on_update = on_update
+        self.header: Dict[str, Any] = {}
+        # InFlight -> list of Runs of each invocation
+        self.runs: Dict[int, List[List[Dict[str, Any]]]] = {}
+        self.knee: Dict[str, Any] = {}
+
+    def _samples(self, inflight: int) -> Dict[str, Any]:
+        """
+        IOPS, MB/s and p50 latency of the key rows (SUM rows for multi-device) per run of a point.
+        """
+        item = {"InFlight": inflight, "Runs": [r for runs in self.runs[inflight] for r in runs]}
+        results = StressResults.from_groups([{"InFlights": [item]}])
+        rows = results.group_runs(0)
+        devices = 1
+        if results.is_multi_device(0):
+            devices = max(1, len(results.device_ids(0)))
+            rows = rows[results.run_device[rows] == "SUM"]
+        return {
+            "iops": results.run_iops[rows],
+            "mbs": results.run_mbs[rows],
+            "p50": results.latency_us(rows, "p50.00"),
+            "devices": devices,
+        }
+
+    def _ci(self, inflight: int) -> Optional[List[float]]:
+        ci = median_ci(self._samples(inflight)["iops"].tolist(), self.confidence)
+        return list(ci) if ci is not None else None
+
+    def converged(self, inflight: int) -> bool:
+        iops = self._samples(inflight)["iops"]
+        if iops.size >= self.max_runs:
+            return True
+        if iops.size < self.min_runs:
+            return False
+        ci = median_ci(iops.tolist(), self.confidence)
+        if ci is None:
+            return False
+        median = float(np.nanmedian(iops))
+        return median > 0 and (ci[1] - ci[0]) / median <= self.ci_width
+
+    def _measure(self, inflight: int) -> None:
+        group = self.measure(inflight)
+        items = [it for it in group.get("InFlights", []) if int(it.get("InFlight", -1)) == inflight]
+        if not items:
+            raise SystemExit(f"Stress tool result has no InFlight {inflight}")
+        if not self.header:
+            self.header = {k: v for k, v in group.items() if k != "InFlights"}
+        self.runs.setdefault(inflight, []).append(items[0].get("Runs", []))
+
+    def _converge(self, inflights: Sequence[int]) -> None:
+        """
+        Measure points round-robin, so that slow drifts of the device spread over all of them.
+        """
+        pending = [q for q in inflights if q not in self.runs or not self.converged(q)]
+        while pending:
+            for q in pending:
+                self._measure(q)
+                if self.on_update is not None:
+                    self.on_update(self.group())
+            done = [q for q in pending if self.converged(q)]
+            for q in done:
+                iops = self._samples(q)["iops"]
+                log(f"InFlight {q}: {iops.size} runs, median IOPS {np.nanmedian(iops):.0f}, CI {self._ci(q)}")
+            pending = [q for q in pending if q not in done]
+
+    def _update_knee(self) -> None:
+        points = []
+        for q in sorted(self.runs):
+            s = self._samples(q)
+            points.append((q, float(np.nanmedian(s["iops"])) / s["devices"], float(np.nanmedian(s["p50"]))))
+        self.knee = knee_point(points)
+
+    def run(self, inflights: Sequence[int]) -> Dict[str, Any]:
+        self._converge(inflights)
+        self._update_knee()
+        for _ in range(self.refine_rounds):
+            if not self.knee.get("Saturated"):
+                break
+            extra = refine_inflights(list(self.runs), int(self.knee["KneeQD"]))
+            if not extra:
+                break
+            log(f"Knee near InFlight {self.knee['KneeQD']}, refining with {extra}")
+            self._converge(extra)
+            self._update_knee()
+        return self.group()
+
+    def group(self) -> Dict[str, Any]:
+        items = []
+        points = []
+        for q in sorted(self.runs):
+            s = self._samples(q)
+            items.append(
+                {
+                    "InFlight": q,
+                    "Speed": _format_stats(s["mbs"], " MB/s"),
+                    "IOPS": _format_stats(s["iops"]),
+                    "Runs": [r for runs in self.runs[q] for r in runs],
+                }
+            )
+            points.append({"InFlight": q, "Runs": int(s["iops"].size), "Converged": self.converged(q),
+                           "MedianIOPSCI": self._ci(q)})
+        sweep = {
+            "MinRuns": self.min_runs,
+            "MaxRuns": self.max_runs,
+            "CIWidth": self.ci_width,
+            "Confidence": self.confidence,
+            "Points": points,
+            "Knee": self.knee,
+        }
+        return {**self.header, "InFlights": items, "Sweep": sweep}
+
+
+class ScriptRunner:
+    """
+    measure() for Sweep: one invocation of a run_stress_tool_*.sh script with --run-count 1.
+    """
+
+    def __init__(self, kind: str, script_args: Sequence[str], max_inflight: int, tmp_dir: str) -> None:
+        script, self.count_option, self.discards = SCRIPTS[kind]
+        self.script = os.path.join(os.path.dirname(os.path.abspath(__file__)), script)
+        self.script_args = list(script_args)
+        self.max_inflight = max_inflight
+        self.tmp_dir = tmp_dir
+        self.calls = 0
+
+    def __call__(self, inflight: int) -> Dict[str, Any]:
+        output = os.path.join(self.tmp_dir, f"inflight_{inflight}_{self.calls}.json")
+        cmd = [self.script] + self.script_args
+        cmd += ["--run-count", "1", "--inflight-from", str(inflight), "--inflight-to", str(inflight)]
+        cmd += ["--output", output]
+        # keep the config of a full sweep: chunks/areas count equals the max InFlight
+        if self.count_option and self.count_option not in self.script_args:
+            cmd += [self.count_option, str(self.max_inflight)]
+        # discard the devices only before the first run, as a full sweep does
+        if self.discards and self.calls > 0:
+            cmd.append("--no-discard")
+        self.calls += 1
+
+        if subprocess.run(cmd).returncode != 0:
+            raise SystemExit(f"Command failed: {' '.join(cmd)}")
+        with open(output, "r", encoding="utf-8") as f:
+            groups = json.load(f)
+        if not isinstance(groups, list) or not groups:
+            raise SystemExit(f"Unexpected result format in {output}")
+        return groups[0]
+
+
+def _write_json(path: str, groups: List[Dict[str, Any]]) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(groups, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Adaptive InFlight sweep with a run_stress_tool_*.sh script (InFlights JSON format).",
+        usage="%(prog)s {ddisk,pdisk,uring} --output <output_file> [options] -- <script options>",
+        epilog="Example: sweep.py pdisk --output result.json -- --tool ./ydb_stress_tool --disk /dev/nvme0n1",
+    )
+    ap.add_argument("kind", choices=sorted(SCRIPTS), help="Which run_stress_tool_*.sh script to use.")
+    ap.add_argument("--output", required=True, help="Path to the output JSON file.")
+    ap.add_argument("--inflight-from", type=int, default=1, help="Smallest InFlight (default: 1).")
+    ap.add_argument("--inflight-to", type=int, default=128, help="Largest InFlight (default: 128).")
+    ap.add_argument("--factor", type=float, default=2.0, help="Step of the initial geometric sweep (default: 2).")
+    ap.add_argument("--min-runs", type=int, default=5, help="Minimum runs per InFlight (default: 5).")
+    ap.add_argument("--max-runs", type=int, default=10, help="Maximum runs per InFlight (default: 10).")
+    ap.add_argument(
+        "--ci-width",
+        type=float,
+        default=0.05,
+        help="Stop repeating a point when its median IOPS CI is narrower than this fraction of the median (default: 0.05).",
+    )
+    ap.add_argument(
+        "--confidence",
+        type=float,
+        default=0.9,
+        help="Confidence of the median CI (default: 0.9, needs at least 5 runs; 0.95 needs 6).",
+    )
+    ap.add_argument(
+        "--refine-rounds",
+        type=int,
+        default=2,
+        help="How many times to add points around the saturation knee (default: 2, 0 disables).",
+    )
+    # everything after "--" goes to the script as is
+    argv = sys.argv[1:]
+    script_args: List[str] = []
+    if "--" in argv:
+        script_args = argv[argv.index("--") + 1 :]
+        argv = argv[: argv.index("--")]
+    args = ap.parse_args(argv)
+
+    reserved = [opt for opt in RESERVED_OPTIONS if opt in script_args]
+    if reserved:
+        raise SystemExit(f"Options set by the sweep cannot be passed to the script: {', '.join(reserved)}")
+    if not 1 <= args.inflight_from <= args.inflight_to:
+        raise SystemExit("--inflight-from must be >= 1 and <= --inflight-to")
+    if not 1 <= args.min_runs <= args.max_runs:
+        raise SystemExit("--min-runs must be >= 1 and <= --max-runs")
+    if args.factor <= 1:
+        raise SystemExit("--factor must be > 1")
+    if os.path.exists(args.output):
+        raise SystemExit(f"Output file {args.output} already exists")
+
+    inflights = geometric_inflights(args.inflight_from, args.inflight_to, args.factor)
+    log(f"Initial InFlights: {inflights}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        runner = ScriptRunner(args.kind, script_args, args.inflight_to, tmp_dir)
+        sweep = Sweep(
+            runner,
+            min_runs=args.min_runs,
+            max_runs=args.max_runs,
+            ci_width=args.ci_width,
+            confidence=args.confidence,
+            refine_rounds=args.refine_rounds,
+            # keep a partial result if the sweep is interrupted
+            on_update=lambda group: _write_json(args.output, [group]),
+        )
+        group = sweep.run(inflights)
+    _write_json(args.output, [group])
+
+    full_runs = (args.inflight_to - args.inflight_from + 1) * args.max_runs
+    log(
+        f"Done: {runner.calls} runs over {len(group['InFlights'])} InFlights "
+        f"(full sweep with --run-count {args.max_runs}: {full_runs} runs), written to {args.output}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
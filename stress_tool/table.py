@@ -3,165 +3,16 @@
 import argparse
 import json
 import math
-import re
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os
+import sys
+from typing import Any, Dict, List, Optional, Sequence
 
+import numpy as np
 
-def _parse_float(s: Any) -> float:
-    if s is None:
-        return float("nan")
-    if isinstance(s, (int, float)):
-        return float(s)
-    raw = str(s).strip()
-    if raw == "":
-        return float("nan")
-    return float(raw)
+from results import StressResults, load_results, merge_results
 
-
-_BW_RE = re.compile(r"^\s*([0-9]+(?:\.[0-9]+)?)\s*([A-Za-z]+/s)\s*$")
-_LAT_RE = re.compile(r"^\s*([0-9]+(?:\.[0-9]+)?)\s*([A-Za-z\u00b5]+)\s*$")
-
-
-def _bandwidth_to_mbs(s: Any) -> float:
-    """
-    Convert strings like '205.3 MB/s' to MB/s float.
-    Supports: B/s, KB/s, MB/s, GB/s, KiB/s, MiB/s, GiB/s.
-    """
-    if s is None:
-        return float("nan")
-    if isinstance(s, (int, float)):
-        # Assume already MB/s.
-        return float(s)
-    raw = str(s).strip()
-    if raw == "":
-        return float("nan")
-
-    m = _BW_RE.match(raw)
-    if not m:
-        raise ValueError(f"Unrecognized bandwidth value: {raw!r}")
-    val = float(m.group(1))
-    unit = m.group(2)
-
-    # Convert to bytes/sec first, then MB/s (10^6).
-    if unit == "B/s":
-        bps = val
-    elif unit == "KB/s":
-        bps = val * 1_000
-    elif unit == "MB/s":
-        bps = val * 1_000_000
-    elif unit == "GB/s":
-        bps = val * 1_000_000_000
-    elif unit == "KiB/s":
-        bps = val * 1024
-    elif unit == "MiB/s":
-        bps = val * 1024**2
-    elif unit == "GiB/s":
-        bps = val * 1024**3
-    else:
-        raise ValueError(f"Unsupported bandwidth unit: {unit!r} (value={raw!r})")
-
-    return bps / 1_000_000.0
-
-
-def _latency_to_us(s: Any) -> float:
-    """
-    Convert strings like '39 us' to float microseconds.
-    """
-    if s is None:
-        return float("nan")
-    if isinstance(s, (int, float)):
-        return float(s)
-    raw = str(s).strip()
-    if raw == "":
-        return float("nan")
-    m = _LAT_RE.match(raw)
-    if not m:
-        raise ValueError(f"Unrecognized latency value: {raw!r}")
-    val = float(m.group(1))
-    unit = m.group(2).lower()
-    if unit in {"us", "µs"}:
-        return val
-    if unit == "ms":
-        return val * 1000.0
-    if unit == "ns":
-        return val / 1000.0
-    if unit == "s":
-        return val * 1_000_000.0
-    raise ValueError(f"Unsupported latency unit: {unit!r} (value={raw!r})")
-
-
-def _iops_to_kiops(s: Any) -> float:
-    """
-    Convert IOPS value to kIOPS (thousands of IOPS).
-    """
-    return _parse_float(s) / 1000.0
-
-
-def _percentile_aliases(percentile: str) -> List[str]:
-    """
-    Expand percentile aliases, e.g. "p50.00" -> ["p50.00", "50.0 perc", ...].
-    """
-    out: List[str] = [percentile]
-    m = re.match(r"^\s*p?\s*([0-9]+(?:\.[0-9]+)?)\s*$", percentile.strip(), flags=re.IGNORECASE)
-    if not m:
-        return out
-    p = float(m.group(1))
-    out.extend(
-        [
-            f"p{p:.2f}",
-            f"p{p:g}",
-            f"{p:.2f} perc",
-            f"{p:.1f} perc",
-            f"{p:g} perc",
-            f"{p:.2f}%",
-            f"{p:.1f}%",
-            f"{p:g}%",
-        ]
-    )
-    # de-duplicate while preserving order
-    return list(dict.fromkeys(out))
-
-
-def _extract_latency_percentile_us(run: Dict[str, Any], percentile: str) -> float:
-    """
-    Read percentile latency from known run layouts, return us or NaN.
-    """
-    for key in _percentile_aliases(percentile):
-        if key in run:
-            try:
-                return _latency_to_us(run.get(key))
-            except ValueError:
-                return float("nan")
-
-    for container_key in ["Latency", "Latencies", "Percentiles"]:
-        container = run.get(container_key)
-        if not isinstance(container, dict):
-            continue
-        for key in _percentile_aliases(percentile):
-            if key in container:
-                try:
-                    return _latency_to_us(container.get(key))
-                except ValueError:
-                    return float("nan")
-
-    return float("nan")
-
-
-def _is_multi_device(group: Dict[str, Any]) -> bool:
-    for it in group.get("InFlights", []):
-        if not isinstance(it, dict):
-            continue
-        for run in it.get("Runs", []):
-            if isinstance(run, dict) and "Device" in run:
-                return True
-    return False
-
-
-def _group_name(group: Dict[str, Any]) -> str:
-    label = str(group.get("Label", "")).strip()
-    log_mode = str(group.get("LogMode", "")).strip()
-    name = " ".join([p for p in [label, log_mode] if p])
-    return name if name else "result"
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../common")
+from benchstats import format_knee, knee_point
 
 
 def _fmt_num(v: float, decimals: int = 1) -> str:
@@ -174,99 +25,35 @@ def _fmt_num(v: float, decimals: int = 1) -> str:
 
 
 def _extract_min_med_max(
-    group: Dict[str, Any],
-    metric_key: str,
-    value_parser,
-) -> List[Tuple[int, float, float, float, float]]:
-    items = group.get("InFlights", [])
-    if not isinstance(items, list):
-        return []
-
-    out: List[Tuple[int, float, float, float, float]] = []
-    for it in items:
-        if not isinstance(it, dict):
-            continue
-        inflight = it.get("InFlight")
-        stats = it.get(metric_key, {})
-        if inflight is None or not isinstance(stats, dict):
-            continue
-        stddev_raw = stats.get("stdev")
-        if stddev_raw is None:
-            stddev_raw = stats.get("stddev")
-        out.append(
-            (
-                int(inflight),
-                value_parser(stats.get("min")),
-                value_parser(stats.get("median")),
-                value_parser(stats.get("max")),
-                value_parser(stddev_raw),
-            )
-        )
-    out.sort(key=lambda t: t[0])
-    return out
-
-
-def _select_median_iops_run(
-    inflight_item: Dict[str, Any],
-    device_filter: Optional[str] = None,
-) -> Optional[Dict[str, Any]]:
-    """
-    Pick the run whose IOPS is closest to the reported median IOPS.
-    When device_filter is set, only consider runs with that Device value.
-    """
-    iops_stats = inflight_item.get("IOPS", {})
-    if not isinstance(iops_stats, dict):
-        return None
-    target = _parse_float(iops_stats.get("median"))
-    if math.isnan(target):
-        return None
-
-    runs = inflight_item.get("Runs", [])
-    if not isinstance(runs, list) or not runs:
-        return None
-
-    best_run = None
-    best_diff = None
-    for r in runs:
-        if not isinstance(r, dict):
-            continue
-        if device_filter is not None and str(r.get("Device", "")) != device_filter:
-            continue
-        diff = abs(_parse_float(r.get("IOPS")) - target)
-        if best_diff is None or diff < best_diff:
-            best_diff = diff
-            best_run = r
-    return best_run
+    results: StressResults,
+    g: int,
+    metric: str,
+    scale: float = 1.0,
+) -> List[List[str]]:
+    inflights, stats = results.inflight_stats(g, metric)
+    return [
+        [str(inf)] + [_fmt_num(v, 1) for v in row]
+        for inf, row in zip(inflights.tolist(), (stats / scale).tolist())
+    ]
 
 
 def _extract_latency_percentiles(
-    group: Dict[str, Any],
+    results: StressResults,
+    g: int,
     percentiles: Sequence[str],
     device_filter: Optional[str] = None,
-) -> List[Tuple[int, List[float]]]:
-    items = group.get("InFlights", [])
-    if not isinstance(items, list):
-        return []
-
-    out: List[Tuple[int, List[float]]] = []
-    for it in items:
-        if not isinstance(it, dict):
-            continue
-        inflight = it.get("InFlight")
-        if inflight is None:
-            continue
-        run = _select_median_iops_run(it, device_filter=device_filter)
-        if run is None:
-            continue
-        vals = [_extract_latency_percentile_us(run, p) for p in percentiles]
-        out.append((int(inflight), vals))
-
-    out.sort(key=lambda t: t[0])
-    return out
+) -> List[List[str]]:
+    inflights, runs = results.median_iops_runs(g, device=device_filter)
+    columns = [results.latency_us(runs, p).tolist() for p in percentiles]
+    return [
+        [str(inf)] + [_fmt_num(col[i], 1) for col in columns]
+        for i, inf in enumerate(inflights.tolist())
+    ]
 
 
 def _extract_runs_table_rows(
-    group: Dict[str, Any],
+    results: StressResults,
+    g: int,
     percentiles: Sequence[str],
     has_device: bool = False,
 ) -> List[List[str]]:
@@ -275,46 +62,113 @@ def _extract_runs_table_rows(
     Columns:
       InFlight, Run, [Device,] IOPS(kIOPS), Speed(MB/s), <percentiles...>
     """
-    items = group.get("InFlights", [])
-    if not isinstance(items, list):
-        return []
+    runs = results.group_runs(g)
+    iops_k = (results.run_iops[runs] / 1000.0).tolist()
+    speed_mb = results.run_mbs[runs].tolist()
+    lat_cols = [results.latency_us(runs, p).tolist() for p in percentiles]
 
     rows: List[List[str]] = []
-    for it in sorted(
-        [x for x in items if isinstance(x, dict) and x.get("InFlight") is not None],
-        key=lambda d: int(d.get("InFlight")),
-    ):
-        inflight = int(it.get("InFlight"))
-        runs = it.get("Runs", [])
-        if not isinstance(runs, list):
-            continue
-        # For multi-device, each "run" is a group of (num_devices + SUM) rows
-        rows_per_run = 1
+    for i, r in enumerate(runs.tolist()):
+        row = [str(results.run_inflight[r]), str(results.run_number[r])]
         if has_device:
-            for i, r in enumerate(runs):
-                if isinstance(r, dict) and str(r.get("Device", "")) == "SUM":
-                    rows_per_run = i + 1
-                    break
-
-        for idx, r in enumerate(runs):
-            if not isinstance(r, dict):
-                continue
-            run_num = (idx // rows_per_run) + 1
-            iops_k = _iops_to_kiops(r.get("IOPS"))
-            speed_mb = _bandwidth_to_mbs(r.get("Speed"))
-            lat_vals = [_extract_latency_percentile_us(r, p) for p in percentiles]
-
-            row = [str(inflight), str(run_num)]
-            if has_device:
-                row.append(str(r.get("Device", "")))
-            row.extend(
-                [_fmt_num(iops_k, 1), _fmt_num(speed_mb, 1)]
-                + [_fmt_num(v, 1) for v in lat_vals]
-            )
-            rows.append(row)
+            row.append(str(results.run_device[r]))
+        row.extend(
+            [_fmt_num(iops_k[i], 1), _fmt_num(speed_mb[i], 1)]
+            + [_fmt_num(col[i], 1) for col in lat_cols]
+        )
+        rows.append(row)
     return rows
 
 
+def _group_knee(results: StressResults, g: int) -> Dict[str, Any]:
+    """
+    Saturation knee from median IOPS and p50 latency of the median-IOPS run per InFlight.
+    Multi-device groups are analyzed per device: SUM IOPS divided by the number of devices.
+    """
+    devices = 1
+    device_filter = None
+    if results.is_multi_device(g):
+        devices = max(1, len(results.device_ids(g)))
+        device_filter = "SUM"
+    inflights, stats = results.inflight_stats(g, "IOPS")
+    iops = dict(zip(inflights.tolist(), (stats[:, 1] / devices).tolist()))
+    lat_inflights, runs = results.median_iops_runs(g, device=device_filter)
+    latency = results.latency_us(runs, "p50.00").tolist()
+    return knee_point([(inf, iops[inf], lat) for inf, lat in zip(lat_inflights.tolist(), latency)])
+
+
+def _knee_txt(results: StressResults, knees: List[Dict[str, Any]], title_suffix: str) -> str:
+    rows = []
+    for g, knee in enumerate(knees):
+        name = results.group_name(g)
+        if results.is_multi_device(g):
+            name += " (per device)"
+        rows.append([name] + format_knee(knee))
+    sections = [
+        f"Saturation knee vs InFlight{title_suffix}",
+        "NOTE: knee = fitted max IOPS x unloaded latency (Little's law), the nearest measured InFlight is shown;",
+        "'>=' means IOPS still scale at the largest InFlight. Little = InFlight / (IOPS x p50 latency) at the knee.",
+        "",
+        _render_table(["Group", "KneeInFlight", "PeakIOPS(k)", "p50@knee", "Little"], rows),
+    ]
+    return "\n".join(sections).rstrip() + "\n"
+
+
+def _balance_txt(results: StressResults, threshold: float, title_suffix: str) -> str:
+    """
+    Per-device shares of SUM IOPS/Speed for multi-device groups, empty when there are none.
+    A device is low when its IOPS share is below threshold x fair share (1 / devices).
+    """
+    sections = [
+        f"Per-device balance vs InFlight{title_suffix}",
+        "NOTE: shares of the SUM row of the same run, median over runs; CV = stdev / mean of device IOPS in a run;",
+        f"low = devices with IOPS share below {threshold:g} x fair share (1 / devices).",
+        "",
+    ]
+    found = False
+    for g in range(results.group_count):
+        if not results.is_multi_device(g):
+            continue
+        found = True
+        flagged: Dict[str, List[int]] = {}
+        rows = []
+        for point in results.device_balance(g, "p99.00"):
+            devices = point["devices"]
+            fair = 1.0 / max(1, len(devices))
+            low = [d for d, share in zip(devices, point["iops_share"].tolist()) if share < threshold * fair]
+            for d in low:
+                flagged.setdefault(d, []).append(point["inflight"])
+            worst = "-"
+            latency = point["latency_us"]
+            if not np.isnan(latency).all():
+                i = int(np.nanargmax(latency))
+                worst = f"{devices[i]}: {_fmt_num(float(latency[i]), 1)}"
+            rows.append(
+                [
+                    str(point["inflight"]),
+                    "/".join(_fmt_num(v * 100.0, 1) for v in point["iops_share"].tolist()),
+                    "/".join(_fmt_num(v * 100.0, 1) for v in point["mbs_share"].tolist()),
+                    _fmt_num(point["iops_cv"] * 100.0, 1),
+                    worst,
+                    ",".join(low) or "-",
+                ]
+            )
+        devices = "/".join(results.device_ids(g))
+        sections.append(f"[{results.group_name(g)}]  Devices {devices}: shares in %, p99 latency in us")
+        sections.append(
+            _render_table(["InFlight", "IOPS share", "Speed share", "CV%", "worst p99", "low"], rows)
+        )
+        if flagged:
+            summary = "; ".join(
+                f"{d} at InFlight {','.join(str(i) for i in inflights)}" for d, inflights in sorted(flagged.items())
+            )
+            sections.append(f"Imbalanced devices: {summary}")
+        sections.append("")
+    if not found:
+        return ""
+    return "\n".join(sections).rstrip() + "\n"
+
+
 def _render_table(headers: List[str], rows: List[List[str]]) -> str:
     cols = len(headers)
     widths = [len(h) for h in headers]
@@ -331,34 +185,178 @@ def _render_table(headers: List[str], rows: List[List[str]]) -> str:
     return "\n".join(out_lines)
 
 
+def _fmt_ratio(v: float, base: float) -> str:
+    if math.isnan(v) or math.isnan(base) or base == 0:
+        return "-"
+    return f"{v / base:.2f}x"
+
+
+def _fmt_delta(v: float, base: float, decimals: int = 1) -> str:
+    if math.isnan(v) or math.isnan(base):
+        return "-"
+    return f"{v - base:+.{decimals}f}"
+
+
+def _comparison_values(results: StressResults, g: int, metric: str) -> Dict[int, float]:
+    """
+    Per InFlight value of a compared metric: "IOPS" (kIOPS) and "Speed" (MB/s) medians,
+    or a latency percentile (us) of the median-IOPS run (SUM run for multi-device).
+    """
+    if metric in ("IOPS", "Speed"):
+        inflights, stats = results.inflight_stats(g, metric)
+        scale = 1000.0 if metric == "IOPS" else 1.0
+        return dict(zip(inflights.tolist(), (stats[:, 1] / scale).tolist()))
+
+    device_filter = "SUM" if results.is_multi_device(g) else None
+    inflights, runs = results.median_iops_runs(g, device=device_filter)
+    return dict(zip(inflights.tolist(), results.latency_us(runs, metric).tolist()))
+
+
+def _extract_comparison_rows(
+    results: StressResults,
+    metric: str,
+    baseline: int,
+) -> List[List[str]]:
+    """
+    One row per InFlight: baseline value, then value / ratio / delta for every other group.
+    """
+    values = [_comparison_values(results, g, metric) for g in range(results.group_count)]
+    others = [g for g in range(results.group_count) if g != baseline]
+    inflights = sorted(set().union(*values))
+    nan = float("nan")
+
+    rows: List[List[str]] = []
+    for inf in inflights:
+        base = values[baseline].get(inf, nan)
+        row = [str(inf), _fmt_num(base, 1)]
+        for g in others:
+            v = values[g].get(inf, nan)
+            row.extend([_fmt_num(v, 1), _fmt_ratio(v, base), _fmt_delta(v, base)])
+        rows.append(row)
+    return rows
+
+
+def _comparison_txt(results: StressResults, baseline: int, title_suffix: str) -> str:
+    names = [results.group_name(g) for g in range(results.group_count)]
+    headers = ["InFlight", names[baseline]]
+    for g, name in enumerate(names):
+        if g != baseline:
+            headers.extend([name, "ratio", "delta"])
+
+    metrics = [
+        ("IOPS", "IOPS (kIOPS), median"),
+        ("Speed", "Speed (MB/s), median"),
+        ("p50.00", "Latency p50.00 (us) from median-IOPS run"),
+        ("p99.00", "Latency p99.00 (us) from median-IOPS run"),
+    ]
+    sections: List[str] = [
+        f"Comparison vs {names[baseline]}{title_suffix}",
+        "NOTE: ratio and delta are relative to the baseline; SUM-based for multi-device results.",
+        "",
+    ]
+    for metric, description in metrics:
+        sections.append(f"[{description}]")
+        sections.append(_render_table(headers, _extract_comparison_rows(results, metric, baseline)))
+        sections.append("")
+    return "\n".join(sections).rstrip() + "\n"
+
+
 def main() -> int:
     ap = argparse.ArgumentParser(
         description="Print YDB stress tool results as human-readable tables (new InFlights format)."
     )
-    ap.add_argument("input_json", help="Path to resulting JSON file (array of groups).")
+    ap.add_argument(
+        "input_json",
+        nargs="+",
+        help="Path(s) to resulting JSON file(s) (array of groups). Several files are compared side by side.",
+    )
+    ap.add_argument(
+        "--label",
+        action="append",
+        default=[],
+        help="Optional label for each input file (repeat per file).",
+    )
+    ap.add_argument(
+        "--baseline",
+        default="",
+        help=(
+            "Group to compare the others with, as printed in table headers (e.g. label and log mode). "
+            "Default: the first group. Setting it compares groups of a single file as well."
+        ),
+    )
+    ap.add_argument(
+        "--knee-json",
+        default="",
+        help="Write saturation knee analysis of every group to this JSON file.",
+    )
+    ap.add_argument(
+        "--imbalance-threshold",
+        type=float,
+        default=0.9,
+        help=(
+            "Multi-device results: flag devices whose IOPS share is below this fraction of the fair share "
+            "(1 / devices). Default: 0.9."
+        ),
+    )
+    ap.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the parsed results cache (<input_json>.cache.npz).",
+    )
     args = ap.parse_args()
 
-    with open(args.input_json, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    if len(args.label) > len(args.input_json):
+        raise SystemExit(
+            "--label provided more times than input files "
+            f"({len(args.label)} > {len(args.input_json)})"
+        )
+
+    files: List[StressResults] = []
+    for idx, path in enumerate(args.input_json):
+        file_results = load_results(path, use_cache=not args.no_cache)
+        if idx < len(args.label) and args.label[idx]:
+            file_results = file_results.with_label(args.label[idx])
+        files.append(file_results)
 
-    if not isinstance(data, list):
-        raise SystemExit("Input JSON must be an array (list) of result groups.")
-    groups: List[Dict[str, Any]] = [g for g in data if isinstance(g, dict)]
-    if not groups:
+    results = merge_results(files)
+    if results.group_count == 0:
         raise SystemExit("No result groups found in input JSON.")
+    groups = range(results.group_count)
 
-    test_type = str(groups[0].get("TestType", "")).strip()
-    title_suffix = f" ({test_type})" if test_type else ""
+    test_types = sorted(set(str(t) for t in results.test_types if t))
+    if len(test_types) > 1:
+        title_suffix = " (mixed)"
+    else:
+        title_suffix = f" ({test_types[0]})" if test_types else ""
+
+    knees = [_group_knee(results, g) for g in groups]
+    if args.knee_json:
+        with open(args.knee_json, "w", encoding="utf-8") as f:
+            json.dump(
+                [{"Group": results.group_name(g), **knee} for g, knee in zip(groups, knees)],
+                f,
+                indent=2,
+            )
+            f.write("\n")
+
+    if len(args.input_json) > 1 or args.baseline:
+        names = [results.group_name(g) for g in groups]
+        duplicates = sorted(set(n for n in names if names.count(n) > 1))
+        if duplicates:
+            raise SystemExit(
+                f"Cannot compare groups with the same name: {', '.join(duplicates)}. Use --label per input file."
+            )
+        baseline = args.baseline or names[0]
+        if baseline not in names:
+            raise SystemExit(f"Baseline {baseline!r} not found, groups: {', '.join(names)}")
+        print(_comparison_txt(results, names.index(baseline), title_suffix))
+        return 0
 
     # 1) Speed table
     speed_sections: List[str] = [f"Throughput vs InFlight{title_suffix}", ""]
     for g in groups:
-        rows_data = _extract_min_med_max(g, "Speed", _bandwidth_to_mbs)
-        rows = [
-            [str(inf), _fmt_num(mn, 1), _fmt_num(md, 1), _fmt_num(mx, 1), _fmt_num(sd, 1)]
-            for inf, mn, md, mx, sd in rows_data
-        ]
-        speed_sections.append(f"[{_group_name(g)}]  Speed (MB/s): min / median / max / stddev")
+        rows = _extract_min_med_max(results, g, "Speed")
+        speed_sections.append(f"[{results.group_name(g)}]  Speed (MB/s): min / median / max / stddev")
         speed_sections.append(_render_table(["InFlight", "min", "median", "max", "stddev"], rows))
         speed_sections.append("")
     speed_txt = "\n".join(speed_sections).rstrip() + "\n"
@@ -366,12 +364,8 @@ def main() -> int:
     # 2) IOPS table
     iops_sections: List[str] = [f"IOPS vs InFlight{title_suffix}", ""]
     for g in groups:
-        rows_data = _extract_min_med_max(g, "IOPS", _iops_to_kiops)
-        rows = [
-            [str(inf), _fmt_num(mn, 1), _fmt_num(md, 1), _fmt_num(mx, 1), _fmt_num(sd, 1)]
-            for inf, mn, md, mx, sd in rows_data
-        ]
-        iops_sections.append(f"[{_group_name(g)}]  IOPS (kIOPS): min / median / max / stddev")
+        rows = _extract_min_med_max(results, g, "IOPS", scale=1000.0)
+        iops_sections.append(f"[{results.group_name(g)}]  IOPS (kIOPS): min / median / max / stddev")
         iops_sections.append(_render_table(["InFlight", "min", "median", "max", "stddev"], rows))
         iops_sections.append("")
     iops_txt = "\n".join(iops_sections).rstrip() + "\n"
@@ -384,14 +378,10 @@ def main() -> int:
         "",
     ]
     for g in groups:
-        device_filter = "SUM" if _is_multi_device(g) else None
-        rows_data = _extract_latency_percentiles(g, ps, device_filter=device_filter)
-        rows = [
-            [str(inf)] + [_fmt_num(v, 1) for v in vals]
-            for inf, vals in rows_data
-        ]
+        device_filter = "SUM" if results.is_multi_device(g) else None
+        rows = _extract_latency_percentiles(results, g, ps, device_filter=device_filter)
         suffix = " (SUM)" if device_filter else ""
-        lat_sections.append(f"[{_group_name(g)}]  Latency (us) from median-IOPS run{suffix}")
+        lat_sections.append(f"[{results.group_name(g)}]  Latency (us) from median-IOPS run{suffix}")
         lat_sections.append(_render_table(["InFlight"] + ps, rows))
         lat_sections.append("")
     lat_txt = "\n".join(lat_sections).rstrip() + "\n"
@@ -403,9 +393,9 @@ def main() -> int:
         "",
     ]
     for g in groups:
-        has_device = _is_multi_device(g)
-        rows = _extract_runs_table_rows(g, ps, has_device=has_device)
-        runs_sections.append(f"[{_group_name(g)}]  Runs (IOPS in kIOPS, Speed in MB/s, Latency in us)")
+        has_device = results.is_multi_device(g)
+        rows = _extract_runs_table_rows(results, g, ps, has_device=has_device)
+        runs_sections.append(f"[{results.group_name(g)}]  Runs (IOPS in kIOPS, Speed in MB/s, Latency in us)")
         headers = ["InFlight", "Run"]
         if has_device:
             headers.append("Device")
@@ -421,6 +411,10 @@ def main() -> int:
     print(speed_txt)
     print(iops_txt)
     print(lat_txt)
+    print(_knee_txt(results, knees, title_suffix))
+    balance_txt = _balance_txt(results, args.imbalance_threshold, title_suffix)
+    if balance_txt:
+        print(balance_txt)
     print(runs_txt)
 
     return 0
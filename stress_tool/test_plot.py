@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from plot import FIGURES, _figure_tasks, _selected_figures, main
+from results import StressResults
+
+
+def _inflight(inflight, iops):
+    runs = [
+        {"IOPS": str(iops + d), "Speed": f"{iops + d} MB/s", "p50.00": "40 us", "Latency": {"99.0 perc": "0.1 ms"}}
+        for d in (-1, 0, 1)
+    ]
+    return {
+        "InFlight": inflight,
+        "Speed": {"min": f"{iops - 1} MB/s", "median": f"{iops} MB/s", "max": f"{iops + 1} MB/s"},
+        "IOPS": {"min": str(iops - 1), "median": str(iops), "max": str(iops + 1)},
+        "Runs": runs,
+    }
+
+
+def _group(label):
+    return {
+        "Label": label,
+        "LogMode": "LOG_NONE",
+        "TestType": "PDiskWriteLoad",
+        "InFlights": [_inflight(inflight, 100 * inflight) for inflight in (1, 2, 4, 8, 16)],
+    }
+
+
+class TestFigureSelection(unittest.TestCase):
+    def test_selected_figures(self):
+        self.assertEqual(_selected_figures(["speed, iops", "latency"]), {"speed", "iops", "latency"})
+        self.assertEqual(_selected_figures([]), set(FIGURES))
+        with self.assertRaisesRegex(SystemExit, "Unknown figure.*: bogus"):
+            _selected_figures(["speed,bogus"])
+
+    def test_figure_tasks(self):
+        results = StressResults.from_groups([_group("a")])
+        paths = [path for path, _, _ in _figure_tasks(results, "out", "", {"speed_qd1_8", "latency"})]
+        self.assertEqual(paths, ["out_speed_qd1_8.png", "out_latency.png"])
+        paths = [path for path, _, _ in _figure_tasks(results, "out", "", set(FIGURES))]
+        self.assertEqual(paths, [f"out_{name}.png" for name in FIGURES])
+        # a figure per percentile for 3+ groups
+        results = StressResults.from_groups([_group("a"), _group("b"), _group("c")])
+        paths = [path for path, _, _ in _figure_tasks(results, "out", "", {"latency"})]
+        self.assertEqual(paths, ["out_latency_p5000.png", "out_latency_p9000.png", "out_latency_p9900.png"])
+
+    def test_unknown_figure_rejected(self):
+        # before any input is read
+        argv = ["plot.py", "missing.json", "--only", "speed", "--only", "bogus"]
+        with mock.patch.object(sys, "argv", argv), self.assertRaisesRegex(SystemExit, "bogus"):
+            main()
+
+
+@unittest.skipUnless(importlib.util.find_spec("matplotlib"), "matplotlib is not installed")
+class TestRender(unittest.TestCase):
+    def test_parallel_only(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "result.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([_group("a")], f)
+            prefix = os.path.join(tmp, "out")
+            argv = ["plot.py", path, "--prefix", prefix, "--no-cache", "--only", "speed,iops", "--jobs", "2"]
+            out = io.StringIO()
+            with mock.patch.object(sys, "argv", argv), contextlib.redirect_stdout(out):
+                self.assertEqual(main(), 0)
+            expected = [f"{prefix}_speed.png", f"{prefix}_iops.png"]
+            self.assertEqual(out.getvalue().split(), expected)
+            self.assertEqual(sorted(os.listdir(tmp)), ["out_iops.png", "out_speed.png", "result.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from results import CACHE_SUFFIX, StressResults, load_results, merge_results
+
+
+def _run(iops, speed, p50, p99, device=None):
+    run = {"IOPS": iops, "Speed": speed, "p50.00": p50, "Latency": {"99.0 perc": p99}}
+    if device is not None:
+        run["Device"] = device
+    return run
+
+
+GROUPS = [
+    {
+        "Label": "Regular",
+        "LogMode": "LOG_NONE",
+        "TestType": "PDiskWriteLoad",
+        "InFlights": [
+            {
+                "InFlight": 2,
+                "Speed": {"min": "1.0 GB/s", "median": "1.1 GB/s", "max": "1.2 GB/s", "stddev": "0.1 GB/s"},
+                "IOPS": {"min": "100", "median": "110", "max": "120", "stdev": "10"},
+                "Runs": [
+                    _run("100", "1000 MB/s", "40 us", "0.1 ms"),
+                    _run("120", "1200 MB/s", "41 us", "0.2 ms"),
+                    _run("109", "1100 MB/s", "42 us", "0.3 ms"),
+                ],
+            },
+            {
+                "InFlight": 1,
+                "Speed": {"min": "500 KiB/s", "median": "500 KiB/s", "max": "500 KiB/s"},
+                "IOPS": {"min": "50", "median": "50", "max": "50"},
+                "Runs": [_run("50", "500 KiB/s", "30 us", "bad")],
+            },
+        ],
+    },
+    {
+        "Label": "Multi",
+        "InFlights": [
+            {
+                "InFlight": 1,
+                "Speed": {"min": "20 MB/s", "median": "21 MB/s", "max": "22 MB/s"},
+                "IOPS": {"min": "20", "median": "21", "max": "22"},
+                "Runs": [
+                    _run("10", "10 MB/s", "5 us", "9 us", device="0"),
+                    _run("10", "10 MB/s", "6 us", "9 us", device="1"),
+                    _run("20", "20 MB/s", "5 us", "9 us", device="SUM"),
+                    _run("12", "12 MB/s", "7 us", "9 us", device="0"),
+                    _run("10", "10 MB/s", "8 us", "9 us", device="1"),
+                    _run("22", "22 MB/s", "7 us", "9 us", device="SUM"),
+                ],
+            },
+        ],
+    },
+]
+
+
+class TestStressResults(unittest.TestCase):
+    def setUp(self):
+        self.results = StressResults.from_groups(GROUPS)
+
+    def test_model(self):
+        r = self.results
+        self.assertEqual(r.group_count, 2)
+        self.assertEqual(r.group_name(0), "Regular LOG_NONE")
+        self.assertEqual(r.group_name(1), "Multi")
+        self.assertFalse(r.is_multi_device(0))
+        self.assertTrue(r.is_multi_device(1))
+        self.assertEqual(r.device_ids(1), ["0", "1"])
+
+        inflights, speed = r.inflight_stats(0, "Speed")
+        self.assertEqual(inflights.tolist(), [1, 2])
+        np.testing.assert_allclose(speed[1], [1000, 1100, 1200, 100])
+        self.assertAlmostEqual(speed[0, 0], 0.512)
+        self.assertTrue(np.isnan(speed[0, 3]))
+
+        runs = r.group_runs(1)
+        self.assertEqual(r.run_number[runs].tolist(), [1, 1, 1, 2, 2, 2])
+        self.assertEqual(r.latency_us(r.group_runs(0), "p99.00").tolist()[1:], [100, 200, 300])
+        self.assertTrue(np.isnan(r.latency_us(r.group_runs(0), "p99")[0]))
+        self.assertTrue(np.isnan(r.latency_us(runs, "p99.99")).all())
+
+    def test_median_iops_runs(self):
+        r = self.results
+        inflights, runs = r.median_iops_runs(0)
+        self.assertEqual(inflights.tolist(), [1, 2])
+        self.assertEqual(r.latency_us(runs, "p50").tolist(), [30, 42])
+
+        inflights, runs = r.median_iops_runs(1, device="SUM")
+        self.assertEqual(r.run_iops[runs].tolist(), [20])
+
+    def test_device_balance(self):
+        (point,) = self.results.device_balance(1)
+        self.assertEqual(point["inflight"], 1)
+        self.assertEqual(point["devices"], ["0", "1"])
+        # run 1: 10/20, 10/20; run 2: 12/22, 10/22
+        np.testing.assert_allclose(point["iops_share"], [(0.5 + 12 / 22) / 2, (0.5 + 10 / 22) / 2])
+        self.assertAlmostEqual(point["iops_cv"], (0 + 1 / 11) / 2)
+        np.testing.assert_allclose(point["latency_us"], [9, 9])
+
+    def test_split_and_sum(self):
+        split = self.results.split_devices()
+        self.assertEqual([split.group_name(g) for g in range(split.group_count)],
+                         ["Regular LOG_NONE", "Multi dev0", "Multi dev1"])
+        _, iops = split.inflight_stats(1, "IOPS")
+        np.testing.assert_allclose(iops[0], [10, 11, 12, 1])
+
+        sums = self.results.sum_only()
+        self.assertEqual(sums.inflight_stats(0, "IOPS")[0].size, 0)
+        self.assertEqual(sums.run_device[sums.group_runs(1)].tolist(), ["SUM", "SUM"])
+
+    def test_merge(self):
+        single = StressResults.from_groups([{"Label": "x", "InFlights": [
+            {"InFlight": 1, "IOPS": {"median": "1"}, "Runs": [{"IOPS": "1", "p99.9": "1 ms"}]}]}])
+        merged = merge_results([self.results, single.with_label("after")])
+        self.assertEqual(merged.group_count, 3)
+        self.assertEqual(merged.group_name(2), "after")
+        self.assertEqual(merged.percentiles.tolist(), [50, 99, 99.9])
+        _, runs = merged.median_iops_runs(2)
+        self.assertEqual(merged.latency_us(runs, "p99.90").tolist(), [1000])
+        self.assertTrue(np.isnan(merged.latency_us(runs, "p50")).all())
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "result.json")
+            with open(path, "w") as f:
+                json.dump(GROUPS, f)
+
+            load_results(path, use_cache=False)
+            self.assertFalse(os.path.exists(path + CACHE_SUFFIX))
+
+            first = load_results(path)
+            self.assertTrue(os.path.exists(path + CACHE_SUFFIX))
+            cached = load_results(path)
+            for name in StressResults.ARRAYS:
+                np.testing.assert_array_equal(getattr(first, name), getattr(cached, name))
+
+            # cache of another content is ignored
+            with open(path, "w") as f:
+                json.dump(GROUPS[:1], f)
+            self.assertEqual(load_results(path).group_count, 1)
+
+            # broken cache is ignored
+            with open(path + CACHE_SUFFIX, "wb") as f:
+                f.write(b"garbage")
+            self.assertEqual(load_results(path).group_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import random
+import stat
+import sys
+import tempfile
+import unittest
+
+from results import StressResults
+from sweep import ScriptRunner, Sweep, geometric_inflights, refine_inflights
+
+
+def saturating_device(noise=0.0, seed=1):
+    # IOPS(q) = 200k * q / (q + 10), latency by Little's law
+    rnd = random.Random(seed)
+    calls = []
+
+    def measure(inflight):
+        calls.append(inflight)
+        iops = 200_000 * inflight / (inflight + 10) * (1 + rnd.uniform(-noise, noise))
+        run = {"IOPS": f"{iops:.0f}", "Speed": f"{iops * 4096 / 1e6:.1f} MB/s",
+               "p50.00": f"{inflight / iops * 1e6:.1f} us"}
+        return {"Label": "fake", "LogMode": "LOG_NONE", "TestType": "PDiskWriteLoad",
+                "InFlights": [{"InFlight": inflight, "Runs": [run]}]}
+
+    return measure, calls
+
+
+class TestSweep(unittest.TestCase):
+    def test_inflights(self):
+        self.assertEqual(geometric_inflights(1, 128), [1, 2, 4, 8, 16, 32, 64, 128])
+        self.assertEqual(geometric_inflights(1, 100), [1, 2, 4, 8, 16, 32, 64, 100])
+        self.assertEqual(geometric_inflights(1, 10, factor=1.5), [1, 2, 3, 5, 8, 10])
+        self.assertEqual(geometric_inflights(4, 4), [4])
+        self.assertEqual(refine_inflights([1, 2, 4, 8, 16, 32], 8), [6, 11])
+        self.assertEqual(refine_inflights([1, 2, 4, 8, 16, 32], 32), [23])
+        self.assertEqual(refine_inflights([1, 2], 2), [])
+
+    def test_stable_points_stop_early(self):
+        measure, calls = saturating_device()
+        group = Sweep(measure, min_runs=3, max_runs=10).run(geometric_inflights(1, 128))
+
+        inflights = [it["InFlight"] for it in group["InFlights"]]
+        self.assertEqual(inflights, sorted(set(calls)))
+        self.assertTrue(set([1, 2, 4, 8, 16, 32, 64, 128]) < set(inflights))
+        # without noise the CI collapses as soon as it exists (5 runs for 90%)
+        self.assertEqual(len(calls), 5 * len(inflights))
+        self.assertEqual(group["Label"], "fake")
+        # refined from 8 to the measured point closest to the true knee (10)
+        self.assertEqual(group["Sweep"]["Knee"]["KneeQD"], 11)
+        self.assertAlmostEqual(group["Sweep"]["Knee"]["KneeQDFit"], 10, delta=0.01)
+
+        results = StressResults.from_groups([group])
+        _, iops = results.inflight_stats(0, "IOPS")
+        self.assertAlmostEqual(iops[0, 1], 200_000 / 11, delta=1)
+
+    def test_noisy_points_hit_max_runs(self):
+        measure, calls = saturating_device(noise=0.2)
+        group = Sweep(measure, max_runs=7, ci_width=0.01, refine_rounds=0).run([1, 2, 4])
+        self.assertEqual(len(calls), 21)
+        self.assertEqual([p["Runs"] for p in group["Sweep"]["Points"]], [7, 7, 7])
+
+
+class TestScriptRunner(unittest.TestCase):
+    def test_discard_only_first_run(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # fake script: records its arguments and writes a one-group result to --output
+            script = os.path.join(tmp_dir, "fake.py")
+            with open(script, "w") as f:
+                f.write(
+                    f"#!{sys.executable}\n"
+                    "import json, sys\n"
+                    "args = sys.argv[1:]\n"
+                    f"with open({os.path.join(tmp_dir, 'calls')!r}, 'a') as f:\n"
+                    "    f.write(json.dumps(args) + '\\n')\n"
+                    "with open(args[args.index('--output') + 1], 'w') as f:\n"
+                    "    json.dump([{'Label': 'fake', 'InFlights': []}], f)\n"
+                )
+            os.chmod(script, os.stat(script).st_mode | stat.S_IXUSR)
+
+            for kind in ("pdisk", "ddisk", "uring"):
+                runner = ScriptRunner(kind, ["--disk", "/dev/null"], 8, tmp_dir)
+                runner.script = script
+                self.assertEqual(runner(1)["Label"], "fake")
+                runner(2)
+
+            with open(os.path.join(tmp_dir, "calls")) as f:
+                calls = [json.loads(line) for line in f]
+            self.assertEqual(["--no-discard" in args for args in calls], [False, True] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from results import load_results, merge_results
+from table import _comparison_txt, _extract_comparison_rows, main
+
+
+def _run(iops, speed, p50, p99):
+    return {"IOPS": iops, "Speed": speed, "p50.00": p50, "Latency": {"99.0 perc": p99}}
+
+
+def _inflight(inflight, iops, speed, p50, p99):
+    return {
+        "InFlight": inflight,
+        "Speed": {"min": speed, "median": speed, "max": speed},
+        "IOPS": {"min": iops, "median": iops, "max": iops},
+        "Runs": [_run(iops, speed, p50, p99)],
+    }
+
+
+def _group(inflights):
+    return {"Label": "", "LogMode": "LOG_NONE", "TestType": "PDiskWriteLoad", "InFlights": inflights}
+
+
+# the candidate is 1.5x faster at InFlight 1 and 2, and has an extra InFlight 4
+BEFORE = [_group([
+    _inflight(1, "10000", "40 MB/s", "100 us", "0.2 ms"),
+    _inflight(2, "20000", "80 MB/s", "120 us", "0.3 ms"),
+])]
+AFTER = [_group([
+    _inflight(1, "15000", "60 MB/s", "80 us", "0.15 ms"),
+    _inflight(2, "30000", "120 MB/s", "90 us", "0.2 ms"),
+    _inflight(4, "40000", "160 MB/s", "110 us", "0.4 ms"),
+])]
+
+
+class TestComparison(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for name, groups in (("before", BEFORE), ("after", AFTER)):
+            path = os.path.join(self.tmp.name, f"{name}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(groups, f)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def results(self):
+        return merge_results([
+            load_results(path, use_cache=False).with_label(label)
+            for path, label in zip(self.paths, ("before", "after"))
+        ])
+
+    def main(self, *args):
+        out = io.StringIO()
+        argv = ["table.py", *self.paths, "--label", "before", "--label", "after", "--no-cache", *args]
+        with mock.patch.object(sys, "argv", argv), contextlib.redirect_stdout(out):
+            self.assertEqual(main(), 0)
+        return out.getvalue()
+
+    def test_rows(self):
+        results = self.results()
+        self.assertEqual(_extract_comparison_rows(results, "IOPS", 0), [
+            ["1", "10.0", "15.0", "1.50x", "+5.0"],
+            ["2", "20.0", "30.0", "1.50x", "+10.0"],
+            # missing in the baseline
+            ["4", "-", "40.0", "-", "-"],
+        ])
+        self.assertEqual(_extract_comparison_rows(results, "p99.00", 0)[:2], [
+            ["1", "200.0", "150.0", "0.75x", "-50.0"],
+            ["2", "300.0", "200.0", "0.67x", "-100.0"],
+        ])
+        # the other way round
+        self.assertEqual(_extract_comparison_rows(results, "Speed", 1)[0], ["1", "60.0", "40.0", "0.67x", "-20.0"])
+
+    def test_txt(self):
+        txt = _comparison_txt(self.results(), 0, " (PDiskWriteLoad)")
+        self.assertTrue(txt.startswith("Comparison vs before LOG_NONE (PDiskWriteLoad)\n"))
+        for section in ("IOPS (kIOPS), median", "Speed (MB/s), median", "p50.00", "p99.00"):
+            self.assertIn(section, txt)
+        self.assertIn("after LOG_NONE", txt)
+
+    def test_main(self):
+        self.assertEqual(self.main(), _comparison_txt(self.results(), 0, " (PDiskWriteLoad)") + "\n")
+        self.assertEqual(
+            self.main("--baseline", "after LOG_NONE"),
+            _comparison_txt(self.results(), 1, " (PDiskWriteLoad)") + "\n",
+        )
+
+    def test_main_errors(self):
+        with self.assertRaisesRegex(SystemExit, "not found"):
+            self.main("--baseline", "missing")
+        argv = ["table.py", *self.paths, "--no-cache"]
+        with mock.patch.object(sys, "argv", argv), self.assertRaisesRegex(SystemExit, "same name"):
+            main()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+#
+# Benchmark of multinode_aggegate_result.py parser on a synthetic log of run_workloads.sh:
+# compares streaming parser with the original approach (readlines + chain of regexes)
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+from multinode_aggegate_result import Parser
+
+
+JAVA_OPERATIONS = ("READ", "UPDATE", "INSERT", "SCAN")
+
+
+def generate_java_log(f, workloads, hosts, status_lines):
+    ts = 1678230636
+    for w in range(workloads):
+        f.write("Wed Mar  8 00:10:36 UTC 2023: zipfian workload {} from {} ycsb instances started on {}\n".format(
+            "abcdef"[w % 6], hosts, ts))
+        f.write("Wed Mar  8 00:10:36 UTC 2023: ./bin/ycsb run ydb -P workloads/workloada -threads 64\n")
+        for h in range(hosts):
+            f.write("[{}] 00:10:53 [SUCCESS] ycsb-host{}.example.com\n".format(h + 1, h))
+            f.write("Command line: -db site.ycsb.db.YDBClient -P workloads/workloada -t\n")
+            for i in range(status_lines):
+                f.write("2023-03-08 00:{:02d}:{:02d}:123 {} sec: {} operations; 98911.9 current ops/sec; "
+                        "[READ: Count=494559, Max=41215, Min=186, Avg=620.1, 90=876, 99=1289, 99.9=3555, 99.99=12303] "
+                        "[UPDATE: Count=494560, Max=42111, Min=201, Avg=655.3, 90=901, 99=1342, 99.9=3713, 99.99=12799]\n".format(
+                            i // 60 % 60, i % 60, (i + 1) * 10, (i + 1) * 989119))
+            f.write("[OVERALL], RunTime(ms), 600110\n")
+            f.write("[OVERALL], Throughput(ops/sec), 98911.97\n")
+            for op in JAVA_OPERATIONS:
+                for name, value in (("Operations", 494559), ("AverageLatency(us)", 620.1), ("MinLatency(us)", 186),
+                                    ("MaxLatency(us)", 41215), ("95thPercentileLatency(us)", 1002),
+                                    ("99thPercentileLatency(us)", 1289), ("Return=OK", 494559)):
+                    f.write("[{}], {}, {}\n".format(op, name, value))
+            f.write("[TotalOKs] 1978236\n")
+            f.write("[TotalErrors] 0\n")
+            f.write("[TotalNotFound] 12\n")
+        f.write("Wed Mar  8 00:20:36 UTC 2023: done\n")
+        ts += 660
+
+
+# the original parser: every line is tested against every pattern
+def legacy_parse_java(filename):
+    workload_p = re.compile(".*: ([a-zA-Z]+) workload (.) from ([1-9]+) ycsb instances started on ([0-9]+)$")
+    workload_done_p = re.compile(".*: done$")
+    host_p = re.compile(r"\[\d+\] \d\d:\d\d:\d\d \[SUCCESS\] (?P<host>.*)")
+    ops_p = re.compile(r"^\[OVERALL\], Throughput\(ops/sec\), ([0-9]+)\..*")
+    time_p = re.compile(r"\[OVERALL\], RunTime\(ms\), ([0-9]+)$")
+    latency_99_p = re.compile(r"\[(?:INSERT|READ|UPDATE|SCAN)(?:-FAILED)?], 99thPercentileLatency\(us\), (\d+)")
+    oks_p = re.compile(r"^\[TotalOKs\] ([0-9]+)$")
+    errors_p = re.compile(r"^\[TotalErrors\] ([0-9]+)$")
+    not_found_p = re.compile(r"^\[TotalNotFound\] ([0-9]+)$")
+
+    matched = 0
+    f = open(filename)
+    for line in f.readlines():
+        for p in (workload_p, host_p, ops_p, time_p, latency_99_p, oks_p, errors_p, not_found_p, workload_done_p):
+            if p.match(line):
+                matched += 1
+                break
+    f.close()
+    return matched
+
+
+def measure(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark YCSB log parser on a synthetic log")
+    parser.add_argument("--workloads", type=int, default=12, help="workloads in the log")
+    parser.add_argument("--hosts", type=int, default=32, help="YCSB hosts per workload")
+    parser.add_argument("--status-lines", type=int, default=600, help="status lines per host output")
+    parser.add_argument("--repeat", type=int, default=3, help="take the best of N runs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = os.path.join(tmp_dir, "ycsb.log")
+        with open(log_path, "w") as f:
+            generate_java_log(f, args.workloads, args.hosts, args.status_lines)
+        size_mb = os.path.getsize(log_path) / 1024 / 1024
+
+        def run_streaming(timeline):
+            log_parser = Parser(timeline)
+            log_parser.parse(log_path, "ydb")
+            if len(log_parser.results) != args.workloads:
+                raise RuntimeError("parsed {} workloads instead of {}".format(len(log_parser.results), args.workloads))
+
+        legacy = measure(lambda: legacy_parse_java(log_path), args.repeat)
+        streaming = measure(lambda: run_streaming(False), args.repeat)
+        timeline = measure(lambda: run_streaming(True), args.repeat)
+
+    print("log size: {:.1f} MB".format(size_mb))
+    print("legacy:    {:.3f} s, {:.1f} MB/s".format(legacy, size_mb / legacy))
+    print("streaming: {:.3f} s, {:.1f} MB/s".format(streaming, size_mb / streaming))
+    print("speedup:   {:.1f}x".format(legacy / streaming))
+    print("streaming with timeline: {:.3f} s, {:.1f} MB/s".format(timeline, size_mb / timeline))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,14 +3,17 @@
 # When YCSB runs on multiple nodes via pssh, this script parses the log and aggregates a result
 
 import argparse
-import concurrent
+import concurrent.futures
+import csv
+import glob
 import math
 import re
+import statistics
 import sys
 import ydb
 import os
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 
 def create_ydb_results_table(session, path):
@@ -50,56 +53,31 @@ def create_ydb_results_table(session, path):
         raise e
 
 
-def insert_ydb_results_row(session, path, row):
-    sql = """
-        --!syntax_v1
-        UPSERT INTO `{path}`
-        (
-            datetime,
-            version,
-            record_count,
-            label,
-            cluster,
-            git_repository,
-            git_commit_timestamp,
-            git_branch,
-            run_type,
-            workload,
-            ycsb_instances_count,
-            distribution,
-            rpsK,
-            latency99ms,
-            oks,
-            errors,
-            not_found,
-            min_instance_time_ms,
-            max_instance_time_ms
-        )
-        VALUES
-        (
-            DateTime::MakeDatetime(DateTime::FromSeconds(CAST({ts} as Uint32))),
-            "{version}",
-            {record_count},
-            "{label}",
-            "{cluster}",
-            "{git_repository}",
-            DateTime::FromSeconds(CAST({git_commit_timestamp} as Uint32)),
-            "{git_branch}",
-            "{run_type}",
-            "{workload}",
-            {ycsb_instances_count},
-            "{distribution}",
-            {rpsK},
-            {latency},
-            {oks},
-            {errors},
-            {not_found},
-            {min_instance_time_ms},
-            {max_instance_time_ms}
-        );
-        """.format(**row, path=path)
-
-    session.transaction().execute(sql, commit_tx=True)
+# column types of results table for BulkUpsert, see create_ydb_results_table
+def ydb_results_column_types():
+    columns = ydb.BulkUpsertColumns()
+    for name, column_type in (
+            ("datetime", ydb.PrimitiveType.Datetime),
+            ("version", ydb.PrimitiveType.Utf8),
+            ("record_count", ydb.PrimitiveType.Uint64),
+            ("label", ydb.PrimitiveType.Utf8),
+            ("cluster", ydb.PrimitiveType.Utf8),
+            ("git_repository", ydb.PrimitiveType.Utf8),
+            ("git_commit_timestamp", ydb.PrimitiveType.Timestamp),
+            ("git_branch", ydb.PrimitiveType.Utf8),
+            ("run_type", ydb.PrimitiveType.Utf8),
+            ("workload", ydb.PrimitiveType.Utf8),
+            ("ycsb_instances_count", ydb.PrimitiveType.Uint32),
+            ("distribution", ydb.PrimitiveType.Utf8),
+            ("rpsK", ydb.PrimitiveType.Uint32),
+            ("latency99ms", ydb.PrimitiveType.Uint32),
+            ("oks", ydb.PrimitiveType.Uint64),
+            ("errors", ydb.PrimitiveType.Uint64),
+            ("not_found", ydb.PrimitiveType.Uint64),
+            ("min_instance_time_ms", ydb.PrimitiveType.Uint32),
+            ("max_instance_time_ms", ydb.PrimitiveType.Uint32)):
+        columns.add_column(name, ydb.OptionalType(column_type))
+    return columns
 
 
 def format_number(num, decimal_places=1):
@@ -113,10 +91,114 @@ def format_number(num, decimal_places=1):
     return str(int(num))
 
 
-workload_p = re.compile(".*: ([a-zA-Z]+) workload (.) from ([1-9]+) ycsb instances started on ([0-9]+)$")
-workload_done_p = re.compile(".*: done$")
+# difference between intended and service latency (ms), e.g. "+12.5 ms, x2.3"
+def format_co_gap(intended_latency, latency):
+    if latency is None:
+        return "-"
+    gap = "{:+} ms".format(round(intended_latency - latency, 3))
+    if latency > 0:
+        gap += ", x{:.1f}".format(intended_latency / latency)
+    return gap
+
+
+workload_p = re.compile(".*: ([a-zA-Z]+) workload (.) from ([0-9]+) ycsb instances started on ([0-9]+)$")
 
 host_p = re.compile(r"\[\d+\] \d\d:\d\d:\d\d \[SUCCESS\] (?P<host>.*)")
+host_failure_p = re.compile(r"\[\d+\] \d\d:\d\d:\d\d \[FAILURE\] (?P<host>\S+)")
+
+# go-ycsb: 4m50.943532166s, 1h2m3.5s
+go_finished_p = re.compile(r"Run finished, takes (?:(\d+)h)?(?:(\d+)m)?(\d+(?:\.\d+)?)s$")
+go_total_p = re.compile(r"TOTAL.*Count: ([0-9]+), OPS: ([0-9]+).*99th.us.: ([0-9]+)")
+go_count_p = re.compile(r"Count: ([0-9]+)")
+
+# go-ycsb interval report (--interval), the same as summary, but printed before "Run finished"
+go_interval_p = re.compile(r"TOTAL\s+- Takes\(s\): ([0-9.]+), Count: ([0-9]+), OPS: [0-9.]+, Avg\(us\): ([0-9]+)")
+
+# Java YCSB status (-s):
+# 2023-03-08 00:10:46:123 10 sec: 989119 operations; 98911.9 current ops/sec; [READ: Count=494559, Avg=620.1, 99=1289]
+java_status_p = re.compile(r"\S+ \S+ (\d+) sec: \d+ operations; (?:([0-9.]+) current ops/sec;)?")
+java_status_operation_p = re.compile(r"\[([A-Z][A-Z-]*): Count=(\d+), [^\]]*?Avg=([0-9.]+), [^\]]*?\b99=(\d+)")
+
+# Java YCSB operations which 99th percentile is taken into account
+JAVA_LATENCY_OPERATIONS = frozenset(
+    op + suffix for op in ("INSERT", "READ", "UPDATE", "SCAN") for suffix in ("", "-FAILED"))
+
+JAVA_LATENCY_99_PREFIX = ", 99thPercentileLatency(us), "
+
+# Java YCSB with measurement.interval=both also reports latency from the intended start
+# of operation according to the target throughput, e.g. "[Intended-READ]", i.e. including
+# time the operation waited because of previous slow operations (coordinated omission)
+JAVA_INTENDED_PREFIX = "Intended-"
+
+# operations which are not merged into cluster latency histogram
+HISTOGRAM_SKIP_OPERATIONS = frozenset(("CLEANUP",))
+
+# cluster-wide percentiles calculated from merged histograms
+CLUSTER_PERCENTILES = (50, 95, 99, 99.9)
+
+# timeline: ramp-up ends when cluster throughput reaches this share of the median,
+# dip is when throughput of all hosts falls below this share of the median
+TIMELINE_RAMP_UP_SHARE = 0.9
+TIMELINE_DIP_SHARE = 0.7
+
+
+# Latency histogram: latency in us -> number of operations.
+#
+# Java YCSB (measurementtype=histogram or hdrhistogram+histogram) reports 1 ms buckets:
+# "[READ], 3, 1234" means 1234 operations with latency in [3, 4) ms, "[READ], >1000, 5"
+# is overflow. Plain measurementtype=hdrhistogram prints only percentiles, which can't
+# be merged. go-ycsb with measurementtype=csv reports every operation as
+# "READ,<timestamp us>,<latency us>". Counts can be merged between hosts and operations,
+# so percentiles of the merge are exact (up to the resolution of buckets), unlike any
+# combination of per-host percentiles.
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, value_us, count=1):
+        self.counts[value_us] = self.counts.get(value_us, 0) + count
+
+    def merge(self, other):
+        for value_us, count in other.counts.items():
+            self.add(value_us, count)
+
+    def total(self):
+        return sum(self.counts.values())
+
+    # returns latency in us, None if histogram is empty
+    def percentile(self, p):
+        total = self.total()
+        if total == 0:
+            return None
+        threshold = total * p / 100
+        accumulated = 0
+        for value_us in sorted(self.counts):
+            accumulated += self.counts[value_us]
+            if accumulated >= threshold:
+                return value_us
+        return max(self.counts)
+
+
+# point of the timeline built from periodic status lines
+class TimelinePoint:
+    def __init__(self, elapsed_s, ops_per_sec, avg_latency_us=None, p99_latency_us=None):
+        # since start of the workload
+        self.elapsed_s = elapsed_s
+
+        self.ops_per_sec = ops_per_sec
+        self.avg_latency_us = avg_latency_us
+        self.p99_latency_us = p99_latency_us
+
+        # number of hosts summed up (in case of total only)
+        self.hosts = 1
+
+
+# throughput dip of the cluster timeline
+class TimelineDip:
+    def __init__(self, start_s, end_s, min_ops_per_sec):
+        self.start_s = start_s
+        self.end_s = end_s
+        self.min_ops_per_sec = min_ops_per_sec
 
 
 # YCSB result: either of one instance (host) or total (aggregated from all hosts)
@@ -132,15 +214,44 @@ class WorkloadResult:
 
         self.per_host = [] # in case of total only
 
+        # YCSB on the host has failed (pssh [FAILURE]), its output is not aggregated
+        self.failed = False
+        self.failed_hosts = [] # in case of total only
+
         self.throughput = 0
         self.latency = 0
 
+        # 99th percentile of intended latency, when reported
+        self.intended_latency = 0
+
         self.oks = 0
         self.errors = 0
         self.not_found = 0
         self.max_time_ms = 0
         self.min_time_ms = 0
 
+        # operation -> LatencyHistogram, when YCSB reports histograms
+        self.histograms = {}
+
+        # percentile -> latency in ms, calculated from histograms merged
+        # between hosts and operations (in case of total only)
+        self.percentiles = {}
+        self.intended_percentiles = {}
+
+        # list of TimelinePoint from status lines, summed between hosts in case of total
+        self.timeline = []
+
+        # in case of total only
+        self.ramp_up_s = None
+        self.dips = []
+
+    def add_histogram_value(self, operation, value_us, count=1):
+        histogram = self.histograms.get(operation)
+        if histogram is None:
+            histogram = LatencyHistogram()
+            self.histograms[operation] = histogram
+        histogram.add(value_us, count)
+
     def __str__(self):
         return "{} {} {} workload {} with throughput {} and time {}".format(
             self.when,
@@ -161,21 +272,173 @@ def calc_aggregated_result(results):
     for r in results:
         total.throughput += r.throughput
         total.latency = max(total.latency, r.latency)
+        total.intended_latency = max(total.intended_latency, r.intended_latency)
         total.oks += r.oks
         total.errors += r.errors
         total.not_found += r.not_found
         total.max_time_ms = max(total.max_time_ms, r.max_time_ms)
         total.min_time_ms = min(total.min_time_ms, r.min_time_ms)
+        for operation, histogram in r.histograms.items():
+            if operation not in total.histograms:
+                total.histograms[operation] = LatencyHistogram()
+            total.histograms[operation].merge(histogram)
+
+    merged = LatencyHistogram()
+    merged_intended = LatencyHistogram()
+    for operation, histogram in total.histograms.items():
+        if operation.startswith(JAVA_INTENDED_PREFIX):
+            if operation[len(JAVA_INTENDED_PREFIX):] not in HISTOGRAM_SKIP_OPERATIONS:
+                merged_intended.merge(histogram)
+        elif operation not in HISTOGRAM_SKIP_OPERATIONS:
+            merged.merge(histogram)
+    for histogram, percentiles in ((merged, total.percentiles), (merged_intended, total.intended_percentiles)):
+        if histogram.total():
+            for p in CLUSTER_PERCENTILES:
+                percentiles[p] = histogram.percentile(p) / 1000
+
+    total.timeline = calc_cluster_timeline(results)
+    total.ramp_up_s, total.dips = analyze_timeline(total.timeline)
     return total
 
 
+# sum per host timelines aligned by seconds since start of the workload:
+# throughput is summed, average latency is weighted by throughput, p99 is max between hosts
+def calc_cluster_timeline(results):
+    cluster = {}
+    latency_weights = {}
+    for r in results:
+        for point in r.timeline:
+            second = round(point.elapsed_s)
+            total = cluster.get(second)
+            if total is None:
+                total = TimelinePoint(second, 0)
+                total.hosts = 0
+                cluster[second] = total
+                latency_weights[second] = 0
+
+            total.hosts += 1
+            total.ops_per_sec += point.ops_per_sec
+            if point.avg_latency_us is not None and point.ops_per_sec > 0:
+                total.avg_latency_us = (total.avg_latency_us or 0) + point.avg_latency_us * point.ops_per_sec
+                latency_weights[second] += point.ops_per_sec
+            if point.p99_latency_us is not None:
+                total.p99_latency_us = max(total.p99_latency_us or 0, point.p99_latency_us)
+
+    for second, total in cluster.items():
+        if latency_weights[second]:
+            total.avg_latency_us /= latency_weights[second]
+
+    return [cluster[second] for second in sorted(cluster)]
+
+
+# returns ramp-up time and list of TimelineDip relative to the median throughput,
+# only points reported by all hosts are taken into account (i.e. not when some hosts have finished)
+def analyze_timeline(timeline):
+    if not timeline:
+        return None, []
+
+    hosts = max(p.hosts for p in timeline)
+    points = [p for p in timeline if p.hosts == hosts]
+    median_ops = statistics.median(p.ops_per_sec for p in points)
+    if median_ops <= 0:
+        return None, []
+
+    ramp_up_s = None
+    for p in points:
+        if p.ops_per_sec >= median_ops * TIMELINE_RAMP_UP_SHARE:
+            ramp_up_s = p.elapsed_s
+            break
+    if ramp_up_s is None:
+        return None, []
+
+    steps = [b.elapsed_s - a.elapsed_s for a, b in zip(points, points[1:])]
+    step = statistics.median(steps) if steps else 0
+
+    dips = []
+    dip = None
+    for p in points:
+        if p.elapsed_s <= ramp_up_s:
+            continue
+        if p.ops_per_sec < median_ops * TIMELINE_DIP_SHARE:
+            if dip is None:
+                # throughput is reported for the interval ending at the point
+                dip = TimelineDip(p.elapsed_s - step, p.elapsed_s, p.ops_per_sec)
+                dips.append(dip)
+            dip.end_s = p.elapsed_s
+            dip.min_ops_per_sec = min(dip.min_ops_per_sec, p.ops_per_sec)
+        else:
+            dip = None
+
+    return ramp_up_s, dips
+
+
+# state while we parse: current workload and the host whose pssh output block we are in
+class ParserState:
+    def __init__(self):
+        self.workload = ""
+        self.distribution = ""
+        self.when = None
+        self.ycsb_instances_count = 0
+        self.workload_results = []
+        self.failed_hosts = []
+        self.host_result = WorkloadResult()
+
+        # cockroach: next line is a result row
+        self.expect_result_row = False
+
+        # go: summary follows "Run finished"
+        self.met_finished = False
+
+        # go: previous interval report (Takes(s), Count, Avg(us)), because reports are cumulative
+        self.prev_interval = None
+
+
+# files written next to the log by run_workloads.sh and this script
+RESULT_FILE_SUFFIXES = (".res", ".csv", ".live")
+
+
+# log files from command line: files, glob patterns or directories with logs
+def collect_log_files(paths):
+    files = []
+    for path in paths:
+        matches = sorted(glob.glob(path)) if any(c in path for c in "*?[") else [path]
+        if not matches:
+            print("WARNING: no files match {}".format(path), file=sys.stderr)
+        for match in matches:
+            if not os.path.isdir(match):
+                files.append(match)
+                continue
+            for name in sorted(os.listdir(match)):
+                filename = os.path.join(match, name)
+                if name.startswith(".") or name.endswith(RESULT_FILE_SUFFIXES) or not os.path.isfile(filename):
+                    continue
+                files.append(filename)
+
+    # keep the order, but parse each file once
+    return list(dict.fromkeys(files))
+
+
+# parse a single log, runs in a worker process
+def parse_log_file(filename, type, timeline):
+    log_parser = Parser(timeline)
+    log_parser.parse(filename, type)
+    return log_parser.results
+
+
 # parse output of run_workloads.sh (i.e. pssh/ycsb output)
+#
+# The log is streamed line by line and each line is routed by its leading token
+# to the only matcher which can accept it, so that parsing cost doesn't depend on
+# the number of patterns and a log of any size is never loaded into memory.
 class Parser:
-    def __init__(self):
+    def __init__(self, timeline=False):
         # seconds since epoch -> WorkloadResult
         self.results = {}
 
-    def add_workload(self, workload, distribution, when, ycsb_instances_count, workload_results):
+        # parse periodic status lines into WorkloadResult.timeline
+        self.timeline = timeline
+
+    def add_workload(self, workload, distribution, when, ycsb_instances_count, workload_results, failed_hosts=None):
         if not workload:
             return
         total = calc_aggregated_result(workload_results)
@@ -185,6 +448,11 @@ class Parser:
         total.ycsb_instances_count = ycsb_instances_count
         total.per_host = workload_results
         total.per_host.sort(key=lambda x: x.host)
+        total.failed_hosts = sorted(failed_hosts or [])
+
+        if total.failed_hosts:
+            print("WARNING: {} workload {} failed on hosts: {}".format(
+                distribution, workload, " ".join(total.failed_hosts)))
 
         if total.max_time_ms == 0:
             print("WARNING: load skipped, because time is 0", str(total))
@@ -196,6 +464,67 @@ class Parser:
 
         self.results[total.when.timestamp()] = total
 
+    def _finish_host(self, state):
+        if not state.host_result.host:
+            return
+        if state.host_result.failed:
+            state.failed_hosts.append(state.host_result.host)
+        else:
+            state.workload_results.append(state.host_result)
+
+    def _finish_workload(self, state):
+        self._finish_host(state)
+        self.add_workload(
+            state.workload,
+            state.distribution,
+            state.when,
+            state.ycsb_instances_count,
+            state.workload_results,
+            state.failed_hosts)
+        state.host_result = WorkloadResult()
+        state.workload = ""
+
+    # pssh host header: "[1] 00:10:53 [SUCCESS] 127.0.0.1" or
+    # "[2] 00:10:54 [FAILURE] 127.0.0.2 Exited with error code 1"
+    def _parse_host_line(self, state, line):
+        failed = False
+        m = host_p.match(line)
+        if not m:
+            m = host_failure_p.match(line)
+            if not m:
+                return
+            failed = True
+        self._finish_host(state)
+        state.host_result = WorkloadResult()
+        state.host_result.host = m.group('host')
+        state.host_result.failed = failed
+        state.expect_result_row = False
+        state.met_finished = False
+        state.prev_interval = None
+
+    # lines logged by run_workloads_impl.sh itself
+    def _parse_runner_line(self, state, line):
+        line = line.rstrip("\n")
+        if line.endswith(": done"):
+            self._finish_workload(state)
+            return
+
+        if " workload " not in line:
+            return
+
+        m = workload_p.match(line)
+        if m:
+            state.host_result = WorkloadResult()
+            state.workload_results = []
+            state.failed_hosts = []
+            state.distribution = m.group(1)
+            state.workload = m.group(2)
+            state.ycsb_instances_count = int(m.group(3))
+            state.when = datetime.fromtimestamp(int(m.group(4)), timezone.utc)
+            state.expect_result_row = False
+            state.met_finished = False
+            state.prev_interval = None
+
     # Parse output of Cockroach YCSB output
     # Example:
     #
@@ -205,281 +534,249 @@ class Parser:
     # ...
     #_elapsed___errors_____ops(total)___ops/sec(cum)__avg(ms)__p50(ms)__p95(ms)__p99(ms)_pMax(ms)__result
     #15952.9s        0       40000511         2507.4    197.4      1.4     11.0    234.9 103079.2
-    def parse_cockroach(self, filename):
-        result_title_p = re.compile(".*__result$")
-
-        # state while we parse
-        current_workload_results = []
-        current_workload = ""
-        current_distribution = ""
-        current_when = None
-        current_ycsb_instances_count = 0
-        current_host_result = WorkloadResult()
-        current_prev_line_result = False
-
-        f = open(filename)
-        for line in f.readlines():
-            if current_prev_line_result:
-                # per host results
-                current_prev_line_result = False
-                columns = line.split()
-
-                current_host_result.min_time_ms = 0
-
-                time_string = columns[0]
-                if time_string[-1:] == "s":
-                    current_host_result.min_time_ms = round(float(time_string[:-1]) * 1000)
-                current_host_result.max_time_ms = current_host_result.min_time_ms
-
-                current_host_result.errors = int(columns[1])
-                current_host_result.oks = int(columns[2])
-                current_host_result.throughput = round(float(columns[3]))
-                current_host_result.latency = round(float(columns[7]))
-
-                continue
-            current_prev_line_result = False
-
-            m = workload_p.match(line)
-            if m:
-                current_host_result = WorkloadResult()
-                current_workload_results = []
-                current_distribution = m.groups()[0]
-                current_workload = m.groups()[1]
-                current_ycsb_instances_count = m.groups()[2]
-                when_string = m.groups()[3]
-                current_when = datetime.fromtimestamp(int(when_string), timezone.utc)
-                continue
-
-            m = host_p.match(line)
-            if m:
-                if current_host_result.host:
-                    current_workload_results.append(current_host_result)
-                current_host_result = WorkloadResult()
-                current_host_result.host = m.group('host')
-                continue
-
-            m = workload_done_p.match(line)
-            if m:
-                if current_host_result.host:
-                    current_workload_results.append(current_host_result)
-                self.add_workload(
-                    current_workload,
-                    current_distribution,
-                    current_when,
-                    current_ycsb_instances_count,
-                    current_workload_results)
-                current_host_result = WorkloadResult()
-                current_workload = ""
-                continue
-
-            m = result_title_p.match(line)
-            if m:
-                current_prev_line_result = True
-                continue
+    def parse_cockroach_line(self, state, line):
+        if state.expect_result_row:
+            # per host results
+            state.expect_result_row = False
+            columns = line.split()
+            result = state.host_result
+
+            result.min_time_ms = 0
+
+            time_string = columns[0]
+            if time_string[-1:] == "s":
+                result.min_time_ms = round(float(time_string[:-1]) * 1000)
+            result.max_time_ms = result.min_time_ms
+
+            result.errors = int(columns[1])
+            result.oks = int(columns[2])
+            result.throughput = round(float(columns[3]))
+            result.latency = round(float(columns[7]))
+            return
 
-        if current_host_result.host:
-            current_workload_results.append(current_host_result)
-        self.add_workload(
-            current_workload,
-            current_distribution,
-            current_when,
-            current_ycsb_instances_count,
-            current_workload_results)
+        if line.startswith("["):
+            self._parse_host_line(state, line)
+        elif line.endswith("__result\n") or line.endswith("__result"):
+            state.expect_result_row = True
+        else:
+            self._parse_runner_line(state, line)
 
     #Run finished, takes 8.259992138s
     #READ   - Takes(s): 8.2, Count: 331628, OPS: 40310.3, Avg(us): 821, Min(us): 335, Max(us): 33247, 50th(us): 767, 90th(us): 1019, 95th(us): 1180, 99th(us): 1835, 99.9th(us): 5927, 99.99th(us): 23039
     #READ_ERROR - Takes(s): 7.2, Count: 1706, OPS: 237.9, Avg(us): 511775, Min(us): 24, Max(us): 1212415, 50th(us): 5731, 90th(us): 1032191, 95th(us): 1044479, 99th(us): 1054719, 99.9th(us): 1212415, 99.99th(us): 1212415
     #TOTAL  - Takes(s): 8.2, Count: 331628, OPS: 40308.6, Avg(us): 821, Min(us): 335, Max(us): 33247, 50th(us): 767, 90th(us): 1019, 95th(us): 1180, 99th(us): 1835, 99.9th(us): 5927, 99.99th(us): 23039
-    def parse_go(self, filename):
-        # 4m50.943532166
-        result_title_p = re.compile("^Run finished, takes (\d+)?m?(\d+\.\d+)s$")
-        error_p = re.compile("^[A-Z]+_ERROR.*Count: ([0-9]+).*")
-        total_p = re.compile("^TOTAL.*Count: ([0-9]+), OPS: ([0-9]+).*99th.us.: ([0-9]+)")
-
-        # state while we parse
-        current_workload_results = []
-        current_workload = ""
-        current_distribution = ""
-        current_when = None
-        current_ycsb_instances_count = 0
-        current_host_result = WorkloadResult()
-        met_finished = False
-
-        f = open(filename)
-        for line in f.readlines():
-            m = result_title_p.match(line)
+    def parse_go_line(self, state, line):
+        if line.startswith("["):
+            self._parse_host_line(state, line)
+            return
+
+        if line.startswith("Run finished, takes "):
+            m = go_finished_p.match(line)
             if m:
-                minutes = m.group(1)
-                seconds = m.group(2)
+                hours, minutes, seconds = m.groups()
 
+                hours_ms = int(hours) * 3_600_000 if hours else 0
                 minutes_ms = int(minutes) * 60_000 if minutes else 0
                 seconds_ms = float(seconds) * 1_000
-                total_ms = minutes_ms + seconds_ms
+                total_ms = hours_ms + minutes_ms + seconds_ms
 
-                current_host_result.min_time_ms = total_ms
-                current_host_result.max_time_ms = total_ms
-                met_finished = True
-                continue
+                state.host_result.min_time_ms = total_ms
+                state.host_result.max_time_ms = total_ms
+                state.met_finished = True
+            return
 
-            if met_finished:
-                m = error_p.match(line)
+        if "," in line and line[:1].isupper():
+            # measurementtype=csv: "READ,1678230646123456,1289"
+            columns = line.rstrip("\n").split(",")
+            if len(columns) == 3 and " " not in columns[0] and columns[2].isdigit():
+                state.host_result.add_histogram_value(columns[0], int(columns[2]))
+                return
+
+        if state.met_finished:
+            # interval reports before "Run finished" have the same format, so
+            # operation lines are taken into account only after it
+            operation, sep, _ = line.partition(" ")
+            if operation.endswith("_ERROR"):
+                m = go_count_p.search(line)
                 if m:
-                    current_host_result.errors += int(m.groups()[0])
-                    continue
+                    state.host_result.errors += int(m.group(1))
+                return
 
-                m = total_p.match(line)
+            if operation == "TOTAL":
+                m = go_total_p.match(line)
                 if m:
-                    current_host_result.oks = int(m.groups()[0])
-                    current_host_result.throughput = int(m.groups()[1])
-                    current_host_result.latency = int(int(m.groups()[2]) / 1000)
-
-                continue
-
-            m = workload_p.match(line)
-            if m:
-                met_finished = False
-
-                current_host_result = WorkloadResult()
-                current_workload_results = []
-                current_distribution = m.groups()[0]
-                current_workload = m.groups()[1]
-                current_ycsb_instances_count = m.groups()[2]
-                when_string = m.groups()[3]
-                current_when = datetime.fromtimestamp(int(when_string), timezone.utc)
-                continue
-
-            m = host_p.match(line)
-            if m:
-                met_finished = False
-
-                if current_host_result.host:
-                    current_workload_results.append(current_host_result)
-                current_host_result = WorkloadResult()
-                current_host_result.host = m.groups()[0]
-                continue
-
-            m = workload_done_p.match(line)
-            if m:
-                if current_host_result.host:
-                    current_workload_results.append(current_host_result)
-                self.add_workload(
-                    current_workload,
-                    current_distribution,
-                    current_when,
-                    current_ycsb_instances_count,
-                    current_workload_results)
-                current_host_result = WorkloadResult()
-                current_workload = ""
-                continue
-
-        if current_host_result.host:
-            current_workload_results.append(current_host_result)
-        self.add_workload(
-            current_workload,
-            current_distribution,
-            current_when,
-            current_ycsb_instances_count,
-            current_workload_results)
-
-    # parse output of the original Java YCSB
-    def parse(self, filename, type):
-        if type == "cockroach":
-            return self.parse_cockroach(filename)
-        if type == "go" or type == "postgresql":
-            return self.parse_go(filename)
+                    state.host_result.oks = int(m.group(1))
+                    state.host_result.throughput = int(m.group(2))
+                    state.host_result.latency = int(int(m.group(3)) / 1000)
+                return
+
+            if sep and operation.isupper():
+                return
+        elif line.startswith("TOTAL"):
+            if self.timeline:
+                self._parse_go_interval(state, line)
+            return
 
-        # Java YCSB result
+        self._parse_runner_line(state, line)
 
-        ops_p = re.compile("^\[OVERALL\], Throughput\(ops/sec\), ([0-9]+)\..*")
-        time_p = re.compile("\[OVERALL\], RunTime\(ms\), ([0-9]+)$")
-        latency_99_p = re.compile("\[(?:INSERT|READ|UPDATE|SCAN)(?:-FAILED)?], 99thPercentileLatency\(us\), (\d+)")
+    #TOTAL  - Takes(s): 10.0, Count: 99994, OPS: 9999.2, Avg(us): 1589, ...
+    def _parse_go_interval(self, state, line):
+        m = go_interval_p.match(line)
+        if not m:
+            return
+        takes = float(m.group(1))
+        count = int(m.group(2))
+        avg_us = int(m.group(3))
 
-        oks_p = re.compile("^\[TotalOKs\] ([0-9]+)$")
-        errors_p = re.compile("^\[TotalErrors\] ([0-9]+)$")
-        not_found_p = re.compile("^\[TotalNotFound\] ([0-9]+)$")
+        prev_takes, prev_count, prev_avg_us = state.prev_interval or (0.0, 0, 0)
+        if takes <= prev_takes:
+            return
+        state.prev_interval = (takes, count, avg_us)
 
-        # state while we parse
-        current_workload_results = []
-        current_workload = ""
-        current_distribution = ""
-        current_when = None
-        current_ycsb_instances_count = 0
-        current_host_result = WorkloadResult()
+        count_delta = count - prev_count
+        avg_latency_us = None
+        if count_delta > 0:
+            avg_latency_us = (avg_us * count - prev_avg_us * prev_count) / count_delta
+        point = TimelinePoint(takes, count_delta / (takes - prev_takes), avg_latency_us)
+        state.host_result.timeline.append(point)
 
-        f = open(filename)
-        for line in f.readlines():
-            m = workload_p.match(line)
-            if m:
-                current_host_result = WorkloadResult()
-                current_workload_results = []
-                current_distribution = m.groups()[0]
-                current_workload = m.groups()[1]
-                current_ycsb_instances_count = m.groups()[2]
-                when_string = m.groups()[3]
-                current_when = datetime.fromtimestamp(int(when_string), timezone.utc)
-                continue
+    # Java YCSB
+    #
+    # [OVERALL], RunTime(ms), 10110
+    # [OVERALL], Throughput(ops/sec), 98911.97
+    # [READ], 99thPercentileLatency(us), 1289
+    # [READ], 1, 482 (histogram bucket)
+    # [TotalOKs] 1000000
+    def parse_java_line(self, state, line):
+        if not line.startswith("["):
+            if line[:1].isdigit() and " sec: " in line:
+                if self.timeline:
+                    self._parse_java_status(state, line)
+            else:
+                self._parse_runner_line(state, line)
+            return
 
-            m = host_p.match(line)
-            if m:
-                if current_host_result.host:
-                    current_workload_results.append(current_host_result)
-                current_host_result = WorkloadResult()
-                current_host_result.host = m.groups()[0]
-                continue
+        end = line.find("]")
+        if end < 0:
+            return
+        tag = line[1:end]
+
+        if tag == "OVERALL":
+            columns = line.split(", ", 2)
+            if len(columns) != 3:
+                return
+            metric, value = columns[1], columns[2]
+            if metric == "Throughput(ops/sec)":
+                state.host_result.throughput = int(value.split(".", 1)[0])
+            elif metric == "RunTime(ms)":
+                state.host_result.max_time_ms = int(value)
+                state.host_result.min_time_ms = state.host_result.max_time_ms
+        elif tag == "TotalOKs":
+            state.host_result.oks = int(line[end + 1:])
+        elif tag == "TotalErrors":
+            state.host_result.errors = int(line[end + 1:])
+        elif tag == "TotalNotFound":
+            state.host_result.not_found = int(line[end + 1:])
+        elif tag.isdigit():
+            self._parse_host_line(state, line)
+        elif line.startswith(JAVA_LATENCY_99_PREFIX, end + 1):
+            if tag in JAVA_LATENCY_OPERATIONS:
+                value = int(line[end + 1 + len(JAVA_LATENCY_99_PREFIX):])
+                state.host_result.latency = max(state.host_result.latency, value / 1000)
+            elif tag.startswith(JAVA_INTENDED_PREFIX) and tag[len(JAVA_INTENDED_PREFIX):] in JAVA_LATENCY_OPERATIONS:
+                value = int(line[end + 1 + len(JAVA_LATENCY_99_PREFIX):])
+                state.host_result.intended_latency = max(state.host_result.intended_latency, value / 1000)
+        else:
+            self._parse_java_bucket(state, tag, line[end + 3:])
 
-            m = ops_p.match(line)
-            if m:
-                current_host_result.throughput = round(float(m.groups()[0]))
-                continue
+    def _parse_java_status(self, state, line):
+        m = java_status_p.match(line)
+        if not m or m.group(2) is None:
+            return
 
-            m = time_p.match(line)
-            if m:
-                current_host_result.max_time_ms = int(m.groups()[0])
-                current_host_result.min_time_ms = current_host_result.max_time_ms
+        count = 0
+        latency_sum = 0
+        p99_latency_us = None
+        for operation, operation_count, avg, p99 in java_status_operation_p.findall(line, m.end()):
+            if operation in HISTOGRAM_SKIP_OPERATIONS:
                 continue
+            count += int(operation_count)
+            latency_sum += int(operation_count) * float(avg)
+            p99_latency_us = max(p99_latency_us or 0, int(p99))
+
+        point = TimelinePoint(
+            int(m.group(1)),
+            float(m.group(2)),
+            latency_sum / count if count else None,
+            p99_latency_us)
+        state.host_result.timeline.append(point)
+
+    def _parse_java_bucket(self, state, operation, bucket):
+        first = bucket[:1]
+        if not (first.isdigit() or first == ">"):
+            return
+        columns = bucket.split(", ")
+        if len(columns) != 2:
+            return
+        bucket_ms, count = columns
+        if first == ">":
+            # overflow bucket ">1000" is accounted as its lower bound
+            value_ms = bucket_ms[1:]
+        elif bucket_ms.isdigit():
+            # bucket "3" is [3, 4) ms, accounted as its upper bound
+            value_ms = int(bucket_ms) + 1
+        else:
+            return
+        count = int(count)
+        if count:
+            state.host_result.add_histogram_value(operation, int(value_ms) * 1000, count)
 
-            m = latency_99_p.match(line)
-            if m:
-                current_host_result.latency = max(current_host_result.latency, int(m.groups()[0]) / 1000)
-                continue
+    def line_parser(self, type):
+        if type == "cockroach":
+            return self.parse_cockroach_line
+        if type == "go" or type == "postgresql":
+            return self.parse_go_line
+        return self.parse_java_line
 
-            m = oks_p.match(line)
-            if m:
-                current_host_result.oks = int(m.groups()[0])
-                continue
+    # parse lines of any iterable, e.g. opened log file or output of the running YCSB
+    def parse_lines(self, lines, type):
+        parse_line = self.line_parser(type)
+        state = ParserState()
+        for line in lines:
+            parse_line(state, line)
+        self._finish_workload(state)
 
-            m = errors_p.match(line)
-            if m:
-                current_host_result.errors = int(m.groups()[0])
-                continue
+    def parse_cockroach(self, filename):
+        self.parse(filename, "cockroach")
 
-            m = not_found_p.match(line)
-            if m:
-                current_host_result.not_found = int(m.groups()[0])
-                continue
+    def parse_go(self, filename):
+        self.parse(filename, "go")
 
-            m = workload_done_p.match(line)
-            if m:
-                if current_host_result.host:
-                    current_workload_results.append(current_host_result)
-                self.add_workload(
-                    current_workload,
-                    current_distribution,
-                    current_when,
-                    current_ycsb_instances_count,
-                    current_workload_results)
-                current_host_result = WorkloadResult()
-                current_workload = ""
+    def parse(self, filename, type):
+        with open(filename, errors="replace") as f:
+            self.parse_lines(f, type)
+
+    # add results of another log, workloads are keyed (and ordered) by start time
+    def merge_results(self, results, source):
+        for ts, result in results.items():
+            if ts in self.results:
+                print("WARNING: {} workload {} started at {} in {} is already parsed from another log, skipped".format(
+                    result.distribution, result.workload, result.when, source))
                 continue
+            self.results[ts] = result
+        self.results = dict(sorted(self.results.items()))
+
+    # parse multiple logs in a pool of processes
+    def parse_files(self, filenames, type, jobs=None):
+        if len(filenames) == 1 or jobs == 1:
+            for filename in filenames:
+                self.merge_results(parse_log_file(filename, type, self.timeline), filename)
+            return
 
-        if current_host_result.host:
-            current_workload_results.append(current_host_result)
-        self.add_workload(
-            current_workload,
-            current_distribution,
-            current_when,
-            current_ycsb_instances_count,
-            current_workload_results)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(parse_log_file, filename, type, self.timeline) for filename in filenames]
+            for filename, future in zip(filenames, futures):
+                self.merge_results(future.result(), filename)
 
     def dump_workloads_ydb(self, args):
         if len(self.results) == 0:
@@ -525,33 +822,87 @@ class Parser:
                 path = args.database + "/" + args.table
 
                 pool.retry_operation_sync(lambda session: create_ydb_results_table(session, path))
-                
-                for ts,result in self.results.items():
-                    row = {
-                        "ts": ts,
-                        "version": args.ydb_version,
-                        "record_count": args.record_count,
-                        "label": args.label,
-                        "cluster": args.label_cluster,
-                        "git_repository": args.git_repository,
-                        "git_commit_timestamp": args.git_commit_timestamp,
-                        "git_branch": args.git_branch,
-                        "run_type": args.run_type,
-                        "workload": result.workload,
-                        "ycsb_instances_count": result.ycsb_instances_count,
-                        "distribution": result.distribution,
-                        "rpsK": math.floor(result.throughput / 1000),
-                        "latency": math.ceil(result.latency),
-                        "oks": result.oks,
-                        "errors": result.errors,
-                        "not_found": result.not_found,
-                        "min_instance_time_ms": result.min_time_ms,
-                        "max_instance_time_ms": result.max_time_ms
-                    }
-
-                    pool.retry_operation_sync(lambda session: insert_ydb_results_row(session, path, row))
-
-    def dump_workloads_txt(self):
+
+            git_commit_timestamp = None
+            if args.git_commit_timestamp:
+                git_commit_timestamp = int(args.git_commit_timestamp) * 1_000_000
+
+            rows = []
+            for ts,result in self.results.items():
+                rows.append({
+                    "datetime": int(ts),
+                    "version": args.ydb_version,
+                    "record_count": args.record_count,
+                    "label": args.label,
+                    "cluster": args.label_cluster,
+                    "git_repository": args.git_repository,
+                    "git_commit_timestamp": git_commit_timestamp,
+                    "git_branch": args.git_branch,
+                    "run_type": args.run_type,
+                    "workload": result.workload,
+                    "ycsb_instances_count": int(result.ycsb_instances_count),
+                    "distribution": result.distribution,
+                    "rpsK": math.floor(result.throughput / 1000),
+                    "latency99ms": math.ceil(result.latency),
+                    "oks": result.oks,
+                    "errors": result.errors,
+                    "not_found": result.not_found,
+                    "min_instance_time_ms": round(result.min_time_ms),
+                    "max_instance_time_ms": round(result.max_time_ms),
+                })
+
+            # all results in a single typed request instead of a query per row
+            column_types = ydb_results_column_types()
+            ydb.retry_operation_sync(lambda: driver.table_client.bulk_upsert(path, rows, column_types))
+
+    def dump_timeline_txt(self, result, series=False):
+        if not result.timeline:
+            return
+
+        if result.ramp_up_s is None:
+            print("    timeline: no throughput")
+        else:
+            print("    timeline: ramp-up {} s, {} throughput dips below {}% of median".format(
+                result.ramp_up_s, len(result.dips), round(TIMELINE_DIP_SHARE * 100)))
+        for dip in result.dips:
+            print("        dip at {} for {} s: {} Op/s".format(
+                (result.when + timedelta(seconds=dip.start_s)).strftime('%Y-%m-%d %H:%M:%S %Z'),
+                round(dip.end_s - dip.start_s),
+                format_number(dip.min_ops_per_sec)))
+
+        if not series:
+            return
+        for point in result.timeline:
+            print("        {} {} s: {} Op/s from {} hosts, avg latency {} us, p99 latency {} us".format(
+                (result.when + timedelta(seconds=point.elapsed_s)).strftime('%H:%M:%S'),
+                point.elapsed_s,
+                format_number(point.ops_per_sec),
+                point.hosts,
+                round(point.avg_latency_us) if point.avg_latency_us is not None else "-",
+                point.p99_latency_us if point.p99_latency_us is not None else "-"))
+
+    # per host and cluster ("total") timelines aligned to wall-clock time
+    def dump_timeline_csv(self, filename):
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["workload_start", "distribution", "workload", "host", "time", "elapsed_s",
+                             "ops_per_sec", "avg_latency_us", "p99_latency_us", "hosts"])
+            for ts, result in self.results.items():
+                for r in [result] + result.per_host:
+                    for point in r.timeline:
+                        writer.writerow([
+                            result.when.isoformat(),
+                            result.distribution,
+                            result.workload,
+                            r.host,
+                            (result.when + timedelta(seconds=point.elapsed_s)).isoformat(),
+                            point.elapsed_s,
+                            round(point.ops_per_sec, 1),
+                            round(point.avg_latency_us, 1) if point.avg_latency_us is not None else "",
+                            point.p99_latency_us if point.p99_latency_us is not None else "",
+                            point.hosts])
+
+    def dump_workloads_txt(self, timeline=False):
         for ts,result in self.results.items():
             print("{} {} workload {}: {} Op/s, latency 99% {} ms: {} oks, {} not_found, {} errors, {} ms run time".format(
                 result.when.strftime('%Y-%m-%d %H:%M %Z'),
@@ -564,14 +915,41 @@ class Parser:
                 format_number(result.errors),
                 result.max_time_ms))
 
+            if result.failed_hosts:
+                print("    failed hosts (not aggregated): {}".format(" ".join(result.failed_hosts)))
+
+            if result.percentiles:
+                print("    cluster latency from merged histograms: {}".format(", ".join(
+                    "p{} {} ms".format(p, result.percentiles[p]) for p in CLUSTER_PERCENTILES)))
+
+            if result.intended_latency:
+                print("    intended latency 99% {} ms, coordinated omission gap {}".format(
+                    result.intended_latency, format_co_gap(result.intended_latency, result.latency)))
+
+            if result.intended_percentiles:
+                print("    cluster intended latency and gap: {}".format(", ".join(
+                    "p{} {} ms ({})".format(
+                        p,
+                        result.intended_percentiles[p],
+                        format_co_gap(result.intended_percentiles[p], result.percentiles.get(p)))
+                    for p in CLUSTER_PERCENTILES)))
+
+            self.dump_timeline_txt(result, timeline)
+
             for r in result.per_host:
-                print("    {}: {} Op/s, time {} ms, latency 99% {} ms".format(r.host, format_number(r.throughput), r.max_time_ms, r.latency))
+                intended = ""
+                if r.intended_latency:
+                    intended = ", intended latency 99% {} ms".format(r.intended_latency)
+                print("    {}: {} Op/s, time {} ms, latency 99% {} ms{}".format(
+                    r.host, format_number(r.throughput), r.max_time_ms, r.latency, intended))
             print()
 
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("log_file", help="file with multiple YCSB results")
+    parser.add_argument("log_file", nargs="+",
+                        help="file with multiple YCSB results, multiple files, glob patterns and directories are accepted")
+    parser.add_argument("--jobs", type=int, help="number of processes to parse multiple files (default: CPU count)")
     parser.add_argument("--type", help="ydb|cockroach|go", default="ydb")
     parser.add_argument("-e", "--endpoint", help="YDB endpoint")
     parser.add_argument("-d", "--database", help="YDB database")
@@ -586,16 +964,27 @@ def main():
     parser.add_argument("--git-commit-timestamp", help="git commit timestamp")
     parser.add_argument("--git-branch", help="branch")
     parser.add_argument("--run-type", help="type of run (additional attribute)")
+    parser.add_argument("--timeline", action="store_true", help="print cluster throughput timeline from status lines")
+    parser.add_argument("--timeline-csv", help="write per host and cluster timelines to CSV file")
 
     args = parser.parse_args()
 
-    log_parser = Parser()
-    log_parser.parse(args.log_file, args.type)
-    log_parser.dump_workloads_txt()
+    log_parser = Parser(timeline=args.timeline or args.timeline_csv is not None)
+    log_files = collect_log_files(args.log_file)
+    if not log_files:
+        print("No log files found", file=sys.stderr)
+        return 1
+    log_parser.parse_files(log_files, args.type, args.jobs)
+    log_parser.dump_workloads_txt(args.timeline)
+
+    if args.timeline_csv:
+        log_parser.dump_timeline_csv(args.timeline_csv)
 
     if args.endpoint:
        log_parser.dump_workloads_ydb(args)
 
     return 0
 
-main()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/python3
+#
+# Runs YCSB command on multiple hosts via ssh (replacement of "parallel-ssh -i"):
+# all hosts are started at once (or limited by --parallelism), output of every host is
+# streamed as soon as it arrives: tagged with the host to the live log and into the YCSB
+# parser, which reports result of each host when it finishes. Output of finished hosts
+# is printed in parallel-ssh format, so that the log is parsed by multinode_aggegate_result.py.
+#
+# When a host fails, the workload is either marked ([FAILURE] block is excluded from
+# aggregation) or, with --fail-fast, aborted on all other hosts.
+
+import argparse
+import asyncio
+import sys
+import time
+
+from multinode_aggegate_result import Parser, ParserState, format_number
+
+# YCSB prints long status lines
+LINE_LIMIT = 1024 * 1024
+
+
+def log(message):
+    print("{}: {}".format(time.strftime("%a %b %d %H:%M:%S %Z %Y"), message), file=sys.stderr, flush=True)
+
+
+class HostRun:
+    def __init__(self, host):
+        self.host = host
+        self.state = ParserState()
+        self.state.host_result.host = host
+        self.process = None
+        self.lines = []
+        self.exit_code = None
+
+        # reason of failure when there is no exit code
+        self.error = ""
+
+        self.start_time = None
+        self.finish_time = None
+
+    def succeeded(self):
+        return not self.error and self.exit_code == 0
+
+    def elapsed(self):
+        if self.start_time is None or self.finish_time is None:
+            return 0
+        return self.finish_time - self.start_time
+
+
+class ParallelRun:
+    def __init__(self, hosts, command, type="ydb", parallelism=0, timeout=0, fail_fast=False, live_log=None):
+        self.runs = [HostRun(host) for host in hosts]
+        self.command = command
+        self.parse_line = Parser().line_parser(type)
+        self.parallelism = parallelism or len(hosts)
+        self.timeout = timeout or None
+        self.fail_fast = fail_fast
+        self.live_log = live_log
+
+        self.aborted = False
+        self.reported = 0
+
+    def ssh_args(self, host):
+        args = ["ssh", "-o", "BatchMode=yes"]
+        if self.fail_fast:
+            # remote YCSB gets SIGHUP when we abort the connection
+            args.append("-tt")
+        return args + [host, self.command]
+
+    async def run(self):
+        semaphore = asyncio.Semaphore(self.parallelism)
+        await asyncio.gather(*[self._run_host(run, semaphore) for run in self.runs])
+        failed = [run.host for run in self.runs if not run.succeeded()]
+        if failed:
+            log("failed hosts: {}".format(" ".join(failed)))
+            return 1
+        return 0
+
+    async def _run_host(self, run, semaphore):
+        async with semaphore:
+            if self.aborted:
+                run.error = "Aborted"
+                self._report(run)
+                return
+
+            run.start_time = time.monotonic()
+            try:
+                run.process = await asyncio.create_subprocess_exec(
+                    *self.ssh_args(run.host),
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                    limit=LINE_LIMIT)
+                await asyncio.wait_for(self._read_output(run), self.timeout)
+                run.exit_code = await run.process.wait()
+                if self.aborted and run.exit_code != 0:
+                    run.error = "Aborted"
+            except asyncio.TimeoutError:
+                run.error = "Timed out"
+                run.process.kill()
+                await run.process.wait()
+            except OSError as e:
+                run.error = str(e)
+            run.finish_time = time.monotonic()
+
+            self._report(run)
+            if not run.succeeded() and self.fail_fast and not self.aborted:
+                self._abort(run)
+
+    async def _read_output(self, run):
+        async for raw in run.process.stdout:
+            line = raw.decode(errors="replace").replace("\r\n", "\n")
+            if not line.endswith("\n"):
+                line += "\n"
+            run.lines.append(line)
+            self.parse_line(run.state, line)
+            if self.live_log:
+                self.live_log.write("{}: {}".format(run.host, line))
+                self.live_log.flush()
+
+    def _abort(self, failed_run):
+        self.aborted = True
+        log("{} has failed, aborting the run on other hosts".format(failed_run.host))
+        for run in self.runs:
+            if run.process is not None and run.process.returncode is None:
+                run.process.terminate()
+
+    # print output of the host in parallel-ssh -i format
+    def _report(self, run):
+        self.reported += 1
+        header = "[{}] {} ".format(self.reported, time.strftime("%H:%M:%S"))
+        if run.succeeded():
+            header += "[SUCCESS] {}".format(run.host)
+        elif run.error:
+            header += "[FAILURE] {} {}".format(run.host, run.error)
+        else:
+            header += "[FAILURE] {} Exited with error code {}".format(run.host, run.exit_code)
+        sys.stdout.write(header + "\n")
+        sys.stdout.writelines(run.lines)
+        sys.stdout.flush()
+
+        result = run.state.host_result
+        summary = "{} {} in {:.1f} s: {} Op/s, latency 99% {} ms".format(
+            run.host,
+            "finished" if run.succeeded() else "failed",
+            run.elapsed(),
+            format_number(result.throughput),
+            result.latency)
+        if self.live_log:
+            self.live_log.write(summary + "\n")
+            self.live_log.flush()
+        else:
+            log(summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run command on multiple hosts at once and stream the output")
+    parser.add_argument("command", help="command to run on every host")
+    parser.add_argument("-H", "--hosts", required=True, help="space separated list of hosts")
+    parser.add_argument("--type", default="ydb", help="ydb|cockroach|go, format of YCSB output")
+    parser.add_argument("-p", "--parallelism", type=int, default=0, help="max hosts to run at once (default: all)")
+    parser.add_argument("-t", "--timeout", type=int, default=0, help="timeout in seconds (default: no timeout)")
+    parser.add_argument("--fail-fast", action="store_true", help="abort the command on all hosts when one fails")
+    parser.add_argument("--live-log", help="append output of hosts tagged with host name as it arrives")
+    args = parser.parse_args()
+
+    hosts = args.hosts.split()
+    if not hosts:
+        print("No hosts", file=sys.stderr)
+        return 1
+
+    live_log = open(args.live_log, "a") if args.live_log else None
+    try:
+        runner = ParallelRun(
+            hosts,
+            args.command,
+            type=args.type,
+            parallelism=args.parallelism,
+            timeout=args.timeout,
+            fail_fast=args.fail_fast,
+            live_log=live_log)
+        return asyncio.run(runner.run())
+    finally:
+        if live_log:
+            live_log.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -82,6 +82,10 @@ log_path="$LOG_DIR/${dt}_${name}"
 
 echo "Raw log file: ${log_path}"
 
+# per host output as it arrives, see parallel_run.py
+export YCSB_LIVE_LOG="${log_path}.live"
+echo "Live log file: ${YCSB_LIVE_LOG}"
+
 $this_dir/run_workloads_impl.sh --type $TYPE $EXTRA_ARGS $source_files &> "$log_path"
 $this_dir/multinode_aggegate_result.py --type $TYPE $log_path | tee ${log_path}.res
 
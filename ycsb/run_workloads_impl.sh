@@ -78,19 +78,38 @@ run_workload () {
     log "$distribution workload $what from $c ycsb instances started on `date +%s`"
 
     cmd=`eval echo "$cmd_run_template"`
+    if [[ -n "$YCSB_EXTRA_ARGS" ]]; then
+        cmd="$cmd $YCSB_EXTRA_ARGS"
+    fi
     log "$cmd"
-    $debug parallel-ssh -i -t 0 -H "$host_list" -p 30 "$cmd"
+    if [[ "$YCSB_RUNNER" == "pssh" ]]; then
+        $debug parallel-ssh -i -t 0 -H "$host_list" -p 30 "$cmd"
+    else
+        $debug python3 "$PATH_TO_SCRIPT/parallel_run.py" --type $TYPE \
+            ${YCSB_PARALLELISM:+-p $YCSB_PARALLELISM} \
+            ${YCSB_FAIL_FAST:+--fail-fast} \
+            ${YCSB_LIVE_LOG:+--live-log "$YCSB_LIVE_LOG"} \
+            -H "$host_list" "$cmd"
+    fi
 
     log "done"
 }
 
+# parallel_run.py returns only when YCSB has exited on every host, so the fixed
+# pause is needed only with parallel-ssh
+pause_between_workloads () {
+    if [[ "$YCSB_RUNNER" == "pssh" ]]; then
+        $debug sleep "$SLEEP_TIME"
+    fi
+}
+
 run_workloads () {
     host_list="$1"
     distribution="$2"
     c=`echo "$host_list" | wc -w`
 
     for workload in $WORKLOADS; do
-        $debug sleep $SLEEP_TIME
+        pause_between_workloads
         run_workload $workload $YCSB_THREADS "$host_list"
     done
 }
@@ -336,11 +355,11 @@ if [[ -n $RUN_WORKLOAD_D ]] && [ "$RUN_WORKLOAD_D" -eq 1 ]; then
     running_hosts=$(echo "$hosts" | tr ' ' '\n' | head -1)
     distribution=latest
     if [[ -n "$need_load" ]]; then
-        $debug sleep "$SLEEP_TIME"
+        pause_between_workloads
         load_data d
     fi
 
-    $debug sleep "$SLEEP_TIME"
+    pause_between_workloads
     OP_COUNT=$OP_COUNT_TOTAL
     run_workload d $YCSB_THREADS_DE "$running_hosts"
     need_load=1
@@ -350,11 +369,11 @@ if [[ -n $RUN_WORKLOAD_E ]] && [ "$RUN_WORKLOAD_E" -eq 1 ]; then
     running_hosts=$(echo "$hosts" | tr ' ' '\n' | head -1)
     distribution=zipfian
     if [[ -n "$need_load" ]]; then
-        $debug sleep "$SLEEP_TIME"
+        pause_between_workloads
         load_data e
     fi
 
-    $debug sleep "$SLEEP_TIME"
+    pause_between_workloads
     OP_COUNT=$OP_COUNT_E
     run_workload e $YCSB_THREADS_DE "$running_hosts"
 fi
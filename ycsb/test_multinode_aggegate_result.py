@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+from multinode_aggegate_result import Parser, collect_log_files
+
+JAVA_LOG = """\
+Wed Mar  8 00:10:36 UTC 2023: zipfian workload a from 2 ycsb instances started on 1678230636
+Wed Mar  8 00:10:36 UTC 2023: ./bin/ycsb run ydb -P workloads/workloada
+[1] 00:10:53 [SUCCESS] host1
+2023-03-08 00:10:46:123 10 sec: 989119 operations; 98911.9 current ops/sec; [READ: Count=494559, 99=1289]
+[OVERALL], RunTime(ms), 10110
+[OVERALL], Throughput(ops/sec), 98911.97
+[READ], 99thPercentileLatency(us), 1289
+[UPDATE], 99thPercentileLatency(us), 2345
+[CLEANUP], 99thPercentileLatency(us), 99999
+[TotalOKs] 1000000
+[TotalErrors] 3
+[TotalNotFound] 7
+[2] 00:10:54 [SUCCESS] host2
+[OVERALL], RunTime(ms), 10000
+[OVERALL], Throughput(ops/sec), 100000.0
+[READ], 99thPercentileLatency(us), 3001
+[TotalOKs] 1000000
+[TotalErrors] 0
+[TotalNotFound] 1
+Wed Mar  8 00:11:36 UTC 2023: done
+"""
+
+GO_LOG = """\
+Wed Mar  8 00:10:36 UTC 2023: uniform workload b from 10 ycsb instances started on 1678230636
+[1] 00:10:53 [SUCCESS] host1
+TOTAL  - Takes(s): 5.0, Count: 100, OPS: 20.0, Avg(us): 821, 99th(us): 99000
+Run finished, takes 1m8.259992138s
+READ   - Takes(s): 68.2, Count: 331628, OPS: 40310.3, Avg(us): 821, 99th(us): 1835, 99.9th(us): 5927
+READ_ERROR - Takes(s): 67.2, Count: 1706, OPS: 237.9, Avg(us): 511775, 99th(us): 1054719
+TOTAL  - Takes(s): 68.2, Count: 331628, OPS: 40308.6, Avg(us): 821, 99th(us): 1835, 99.9th(us): 5927
+[2] 00:10:54 [SUCCESS] host2
+Run finished, takes 48.1s
+TOTAL  - Takes(s): 48.1, Count: 331000, OPS: 40000.1, Avg(us): 821, 99th(us): 2835, 99.9th(us): 5927
+Wed Mar  8 00:11:36 UTC 2023: done
+"""
+
+JAVA_FAILURE_LOG = """\
+Wed Mar  8 00:10:36 UTC 2023: zipfian workload a from 2 ycsb instances started on 1678230636
+[1] 00:10:53 [SUCCESS] host1
+[OVERALL], RunTime(ms), 10000
+[OVERALL], Throughput(ops/sec), 1000.0
+[READ], 99thPercentileLatency(us), 2000
+[2] 00:10:54 [FAILURE] host2 Exited with error code 1
+[OVERALL], RunTime(ms), 5000
+[OVERALL], Throughput(ops/sec), 99999.0
+[READ], 99thPercentileLatency(us), 99000
+Wed Mar  8 00:11:36 UTC 2023: done
+"""
+
+JAVA_HISTOGRAM_LOG = """\
+Wed Mar  8 00:10:36 UTC 2023: zipfian workload a from 2 ycsb instances started on 1678230636
+[1] 00:10:53 [SUCCESS] host1
+[OVERALL], RunTime(ms), 10000
+[READ], Operations, 100
+[READ], 95thPercentileLatency(us), 1000
+[READ], 0, 90
+[READ], 1, 9
+[READ], 2, 0
+[READ], >1000, 1
+[CLEANUP], 0, 1000
+[2] 00:10:54 [SUCCESS] host2
+[OVERALL], RunTime(ms), 10000
+[UPDATE], 0, 50
+[UPDATE], 4, 50
+Wed Mar  8 00:11:36 UTC 2023: done
+"""
+
+JAVA_INTENDED_LOG = """\
+Wed Mar  8 00:10:36 UTC 2023: zipfian workload a from 2 ycsb instances started on 1678230636
+[1] 00:10:53 [SUCCESS] host1
+[OVERALL], RunTime(ms), 10000
+[READ], 99thPercentileLatency(us), 2000
+[Intended-READ], 99thPercentileLatency(us), 9000
+[READ], 0, 100
+[Intended-READ], 0, 50
+[Intended-READ], 9, 50
+[2] 00:10:54 [SUCCESS] host2
+[OVERALL], RunTime(ms), 10000
+[UPDATE], 99thPercentileLatency(us), 3000
+[Intended-UPDATE], 99thPercentileLatency(us), 4000
+[Intended-CLEANUP], 99thPercentileLatency(us), 99000
+[UPDATE], 1, 100
+[Intended-UPDATE], 1, 100
+Wed Mar  8 00:11:36 UTC 2023: done
+"""
+
+GO_CSV_LOG = """\
+Wed Mar  8 00:10:36 UTC 2023: uniform workload b from 2 ycsb instances started on 1678230636
+[1] 00:10:53 [SUCCESS] host1
+Run finished, takes 10.0s
+operation,timestamp_us,latency_us
+READ,1678230646000001,100
+READ,1678230646000002,300
+[2] 00:10:54 [SUCCESS] host2
+Run finished, takes 10.0s
+UPDATE,1678230646000003,200
+UPDATE,1678230646000004,400
+Wed Mar  8 00:11:36 UTC 2023: done
+"""
+
+def java_status_log(host_ops):
+    lines = ["Wed Mar  8 00:10:36 UTC 2023: zipfian workload c from 2 ycsb instances started on 1678230600\n"]
+    for i, (host, ops) in enumerate(host_ops):
+        lines.append("[{}] 00:10:53 [SUCCESS] {}\n".format(i + 1, host))
+        lines.append("2023-03-08 00:10:00:000 0 sec: 0 operations; est completion in 0 second\n")
+        for n, value in enumerate(ops):
+            lines.append("2023-03-08 00:10:00:000 {} sec: 1 operations; {} current ops/sec; "
+                         "est completion in 1 minute [READ: Count={}, Max=100, Min=1, Avg=500.0, 90=800, 99={}] "
+                         "[CLEANUP: Count=1, Max=1, Min=1, Avg=9999, 90=1, 99=99999]\n".format(
+                             (n + 1) * 10, value, value * 10, 1000 + n))
+        lines.append("[OVERALL], RunTime(ms), 60000\n")
+    lines.append("Wed Mar  8 00:11:36 UTC 2023: done\n")
+    return "".join(lines)
+
+
+GO_INTERVAL_LOG = """\
+Wed Mar  8 00:10:36 UTC 2023: uniform workload b from 1 ycsb instances started on 1678230636
+[1] 00:10:53 [SUCCESS] host1
+TOTAL  - Takes(s): 10.0, Count: 1000, OPS: 100.0, Avg(us): 100, 99th(us): 500
+TOTAL  - Takes(s): 20.0, Count: 3000, OPS: 150.0, Avg(us): 200, 99th(us): 500
+Run finished, takes 20.0s
+TOTAL  - Takes(s): 20.0, Count: 3000, OPS: 150.0, Avg(us): 200, 99th(us): 500
+Wed Mar  8 00:11:36 UTC 2023: done
+"""
+
+COCKROACH_LOG = """\
+Wed Mar  8 00:10:36 CET 2023: uniform workload a from 1 ycsb instances started on 1678230636
+[1] 00:10:53 [SUCCESS] 127.0.0.1
+_elapsed___errors_____ops(total)___ops/sec(cum)__avg(ms)__p50(ms)__p95(ms)__p99(ms)_pMax(ms)__result
+15952.9s        0       40000511         2507.4    197.4      1.4     11.0    234.9 103079.2
+Wed Mar  8 04:10:36 CET 2023: done
+"""
+
+
+def parse(log, type, timeline=False):
+    parser = Parser(timeline)
+    parser.parse_lines(log.splitlines(keepends=True), type)
+    return list(parser.results.values())
+
+
+class TestParser(unittest.TestCase):
+    def test_java(self):
+        results = parse(JAVA_LOG, "ydb")
+        self.assertEqual(len(results), 1)
+        total = results[0]
+        self.assertEqual(total.workload, "a")
+        self.assertEqual(total.distribution, "zipfian")
+        self.assertEqual(total.ycsb_instances_count, 2)
+        self.assertEqual(total.when.timestamp(), 1678230636)
+        self.assertEqual([r.host for r in total.per_host], ["host1", "host2"])
+        self.assertEqual(total.throughput, 198911)
+        self.assertEqual(total.per_host[0].latency, 2.345)
+        self.assertEqual(total.latency, 3.001)
+        self.assertEqual(total.oks, 2000000)
+        self.assertEqual(total.errors, 3)
+        self.assertEqual(total.not_found, 8)
+        self.assertEqual(total.min_time_ms, 10000)
+        self.assertEqual(total.max_time_ms, 10110)
+
+    def test_go(self):
+        results = parse(GO_LOG, "go")
+        self.assertEqual(len(results), 1)
+        total = results[0]
+        self.assertEqual(total.ycsb_instances_count, 10)
+        self.assertEqual([r.host for r in total.per_host], ["host1", "host2"])
+        self.assertEqual(total.throughput, 80308)
+        self.assertEqual(total.errors, 1706)
+        self.assertEqual(total.latency, 2)
+        self.assertAlmostEqual(total.max_time_ms, 68259.992138)
+        self.assertAlmostEqual(total.min_time_ms, 48100)
+
+    def test_failed_host(self):
+        results = parse(JAVA_FAILURE_LOG, "ydb")
+        total = results[0]
+        self.assertEqual([r.host for r in total.per_host], ["host1"])
+        self.assertEqual(total.failed_hosts, ["host2"])
+        self.assertEqual(total.throughput, 1000)
+        self.assertEqual(total.latency, 2)
+
+    def test_java_histogram(self):
+        total = parse(JAVA_HISTOGRAM_LOG, "ydb")[0]
+        self.assertEqual(total.histograms["READ"].total(), 100)
+        self.assertEqual(total.histograms["UPDATE"].total(), 100)
+        self.assertEqual(total.percentiles, {50: 1, 95: 5, 99: 5, 99.9: 1000})
+
+    def test_java_intended(self):
+        total = parse(JAVA_INTENDED_LOG, "ydb")[0]
+        self.assertEqual(total.latency, 3)
+        self.assertEqual(total.intended_latency, 9)
+        self.assertEqual(total.per_host[1].intended_latency, 4)
+        self.assertEqual(total.percentiles, {50: 1, 95: 2, 99: 2, 99.9: 2})
+        self.assertEqual(total.intended_percentiles, {50: 2, 95: 10, 99: 10, 99.9: 10})
+
+    def test_go_csv(self):
+        total = parse(GO_CSV_LOG, "go")[0]
+        self.assertEqual(total.percentiles, {50: 0.2, 95: 0.4, 99: 0.4, 99.9: 0.4})
+
+    def test_no_histogram(self):
+        total = parse(JAVA_LOG, "ydb")[0]
+        self.assertEqual(total.percentiles, {})
+
+    def test_java_timeline(self):
+        log = java_status_log([
+            ("host1", [100, 1000, 1000, 200, 1000, 1000]),
+            ("host2", [100, 1000, 1000, 300, 1000]),
+        ])
+        self.assertEqual(parse(log, "ydb")[0].timeline, [])
+
+        total = parse(log, "ydb", timeline=True)[0]
+        self.assertEqual(len(total.per_host[0].timeline), 6)
+        self.assertEqual([p.ops_per_sec for p in total.timeline], [200, 2000, 2000, 500, 2000, 1000])
+        self.assertEqual(total.timeline[-1].hosts, 1)
+        self.assertEqual(total.timeline[0].avg_latency_us, 500)
+        self.assertEqual(total.timeline[3].p99_latency_us, 1003)
+        self.assertEqual(total.ramp_up_s, 20)
+        self.assertEqual(len(total.dips), 1)
+        self.assertEqual((total.dips[0].start_s, total.dips[0].end_s), (30, 40))
+        self.assertEqual(total.dips[0].min_ops_per_sec, 500)
+
+    def test_go_timeline(self):
+        total = parse(GO_INTERVAL_LOG, "go", timeline=True)[0]
+        timeline = total.per_host[0].timeline
+        self.assertEqual([(p.elapsed_s, p.ops_per_sec) for p in timeline], [(10, 100), (20, 200)])
+        self.assertEqual(timeline[1].avg_latency_us, 250)
+        self.assertEqual(total.oks, 3000)
+
+    def test_multiple_logs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            later = os.path.join(tmp_dir, "20230308_0020_b")
+            with open(later, "w") as f:
+                f.write(JAVA_LOG.replace("workload a", "workload b").replace("1678230636", "1678231000"))
+            earlier = os.path.join(tmp_dir, "20230308_0010_a")
+            with open(earlier, "w") as f:
+                f.write(JAVA_LOG)
+            with open(earlier + ".res", "w") as f:
+                f.write("aggregated result\n")
+
+            files = collect_log_files([tmp_dir, os.path.join(tmp_dir, "*_a")])
+            self.assertEqual(files, [earlier, later])
+
+            parser = Parser()
+            parser.parse_files(files, "ydb", jobs=2)
+            self.assertEqual([r.workload for r in parser.results.values()], ["a", "b"])
+
+            # the same workload from another log is not counted twice
+            parser.parse_files([earlier], "ydb")
+            self.assertEqual(len(parser.results), 2)
+
+    def test_cockroach(self):
+        results = parse(COCKROACH_LOG, "cockroach")
+        self.assertEqual(len(results), 1)
+        total = results[0]
+        self.assertEqual(total.throughput, 2507)
+        self.assertEqual(total.oks, 40000511)
+        self.assertEqual(total.latency, 235)
+        self.assertEqual(total.max_time_ms, 15952900)
+
+
+if __name__ == '__main__':
+    unittest.main()